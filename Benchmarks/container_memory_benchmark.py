@@ -0,0 +1,56 @@
+"""
+Memory and creation time per container of every container representation.
+
+Usage:
+    python -m Benchmarks.container_memory_benchmark [--containers 200000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Dict, Optional, Sequence
+from Scripts.Utils.containers import CONTAINER_MODES, ContainerFactory
+from Scripts.Utils.port_objects_definition import ContainerSize, ContainerType, CTInterface
+
+def benchmark_mode(mode:str,
+                   num_containers:int) -> Dict[str, float]:
+    """
+    Create num_containers containers with the factory in the given mode and give each a
+    yard location and interfaces, like a discharge does. Every mode keeps the containers
+    it returns, in table mode the ContainerRow views the yard holds next to the table.
+
+    returns the traced bytes and the creation time per container
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    factory = ContainerFactory(mode)
+    containers = []
+    for index in range(num_containers):
+        container = factory.create_container(ContainerType.LADEN, ContainerSize.TWENTY_FT, {"dwell_time": 100.0})
+        container.from_interface = CTInterface.VESSEL_INTERFACE
+        container.to_interface = CTInterface.YARD_INTERFACE
+        container.block = "Block1"
+        container.bay = index % 40 + 1
+        container.cell = index % 6 + 1
+        container.tier = index % 5 + 1
+        containers.append(container)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes_per_container": current / num_containers,
+            "us_per_container": 1e6 * elapsed / num_containers}
+
+def main(argv:Optional[Sequence[str]]=None) -> Dict[str, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description="Compare the memory per container of the container representations.")
+    parser.add_argument("--containers", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    results = {mode: benchmark_mode(mode, args.containers) for mode in CONTAINER_MODES}
+    print(f"{'mode':<10}{'bytes/container':>17}{'us/container':>14}")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['bytes_per_container']:>17.1f}{result['us_per_container']:>14.2f}")
+    return results
+
+if __name__ == "__main__":
+    main()
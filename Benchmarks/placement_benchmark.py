@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of the cost per placement of every container placement strategy, on
+list-backed Block and on ArrayBlock.
+
+Usage:
+    python -m Benchmarks.placement_benchmark [--blocks 4] [--bays 40] [--cells 6] [--tiers 5] [--placements 2000]
+"""
+import argparse
+import time
+from typing import Dict, Optional, Sequence
+import numpy as np
+import simpy
+from Scripts.Utils.containers import Container
+from Scripts.Utils.port_objects_definition import ContainerSize, ContainerType
+from Scripts.YardPlanner.array_block import ArrayBlock
+from Scripts.YardPlanner.blocks import Block
+from Scripts.YardPlanner.container_placement_rule import PLACEMENT_STRATEGIES, get_placement_strategy
+
+def benchmark_strategy(name:str,
+                       num_blocks:int,
+                       num_bays:int,
+                       num_cells:int,
+                       num_tiers:int,
+                       num_placements:int,
+                       seed:int,
+                       block_class:type=ArrayBlock) -> Dict[str, float]:
+    """
+    Place num_placements random containers into fresh blocks of block_class with the named strategy.
+
+    returns the mean time per placement in microseconds and the number of containers placed
+    """
+    env = simpy.Environment()
+    blocks = []
+    for index in range(num_blocks):
+        block = block_class(env, capacity=10**9, name=f"{name}-Block{index}")
+        block.configure(num_bays, num_cells, num_tiers)
+        block.distance_to_berth = 100.0 * index
+        blocks.append(block)
+    strategy = get_placement_strategy(name)
+    rng = np.random.default_rng(seed)
+    sizes = rng.choice(list(ContainerSize), num_placements)
+    types = rng.choice(list(ContainerType), num_placements)
+    dwell_times = rng.exponential(5000.0, num_placements)
+    containers = [Container(container_type, size, float(dwell))
+                  for container_type, size, dwell in zip(types, sizes, dwell_times)]
+    by_name = {block.name: block for block in blocks}
+
+    placed = 0
+    elapsed = 0.0
+    for container in containers:
+        start = time.perf_counter()
+        block_name, bay, cell = strategy.find_placement_by_bay(blocks, container)
+        elapsed += time.perf_counter() - start
+        if block_name is None:
+            continue
+        by_name[block_name].store_container(container, container._size, bay, cell)
+        placed += 1
+    return {"us_per_placement": 1e6 * elapsed / num_placements, "placed": placed}
+
+def main(argv:Optional[Sequence[str]]=None) -> Dict[str, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description="Compare the cost per placement of the placement strategies.")
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--bays", type=int, default=40)
+    parser.add_argument("--cells", type=int, default=6)
+    parser.add_argument("--tiers", type=int, default=5)
+    parser.add_argument("--placements", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'block':<12}{'strategy':<15}{'us/placement':>14}{'x first_fit':>13}{'placed':>8}")
+    for block_class in (Block, ArrayBlock):
+        for name in PLACEMENT_STRATEGIES:
+            results[f"{block_class.__name__}.{name}"] = benchmark_strategy(
+                name, args.blocks, args.bays, args.cells, args.tiers, args.placements, args.seed, block_class)
+        baseline = results[f"{block_class.__name__}.first_fit"]["us_per_placement"]
+        for name in PLACEMENT_STRATEGIES:
+            result = results[f"{block_class.__name__}.{name}"]
+            print(f"{block_class.__name__:<12}{name:<15}{result['us_per_placement']:>14.1f}"
+                  f"{result['us_per_placement'] / baseline:>13.1f}{result['placed']:>8}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,4 @@
 from .berth_planner import BerthPlanner
-from .vessel import Vessel, VesselArrival, HatchProfile
\ No newline at end of file
+from .vessel import Vessel, VesselArrival, HatchProfile
+from .arrival_source import ScheduledArrival, read_schedule, write_schedule
+from .hatch_queue import Hatch, HatchQueue
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Sources of vessel arrivals for the arrival driver of the berth planner.
+
+A schedule is an iterator of ScheduledArrival in arrival time order. It is read lazily,
+one row at a time from a CSV file or one record batch at a time from a Parquet file, so
+a schedule of any length is driven in bounded memory. Reading Parquet needs pyarrow.
+
+Columns of a schedule file, only vessel and arrival_time are required:
+    vessel, arrival_time, berth_position, cranes, num_cranes, hatch_profiles, pre_pcat, post_pcat, length, width
+cranes and hatch_profiles are names separated by NAME_SEPARATOR, empty for all of the planner's.
+A vessel with num_cranes > 0 takes that many of any cranes of the crane pool instead.
+berth_position is in meters along the quay, empty for no preferred place.
+"""
+import csv
+import os
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+NAME_SEPARATOR = ";"
+COLUMNS:Tuple[str, ...] = ("vessel", "arrival_time", "berth_position", "cranes", "num_cranes", "hatch_profiles",
+                           "pre_pcat", "post_pcat", "length", "width")
+
+class ScheduledArrival(NamedTuple):
+    """
+    One vessel call. The vessel is created by the berth planner only when it arrives.
+    """
+    vessel: str
+    arrival_time: float
+    berth_position: Optional[float] = None  # preferred place along the quay in meters, none if None
+    cranes: Tuple[str, ...] = ()  # names of the cranes of the vessel, all the cranes if empty
+    num_cranes: int = 0  # number of any cranes of the crane pool, used instead of cranes if positive
+    hatch_profiles: Tuple[str, ...] = ()  # names of the hatch profiles of the vessel, all the profiles if empty
+    pre_pcat: float = 1000.0
+    post_pcat: float = 1000.0
+    length: float = 300.0
+    width: float = 30.0
+
+def _names(value:Any) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return tuple(name.strip() for name in value.split(NAME_SEPARATOR) if name.strip())
+    return tuple(value)
+
+def arrival_from_row(row:Dict[str, Any]) -> ScheduledArrival:
+    """
+    Build an arrival from a row of a schedule file. Missing or empty columns take the
+    defaults of ScheduledArrival.
+    """
+    values = {column: value for column, value in row.items() if value is not None and value != ""}
+    if "vessel" not in values or "arrival_time" not in values:
+        raise ValueError(f"A schedule row needs a vessel and an arrival_time, got {row}")
+    defaults = ScheduledArrival._field_defaults
+    return ScheduledArrival(vessel=str(values["vessel"]),
+                            arrival_time=float(values["arrival_time"]),
+                            berth_position=float(values["berth_position"]) if "berth_position" in values else None,
+                            cranes=_names(values.get("cranes")),
+                            num_cranes=int(values.get("num_cranes", defaults["num_cranes"])),
+                            hatch_profiles=_names(values.get("hatch_profiles")),
+                            pre_pcat=float(values.get("pre_pcat", defaults["pre_pcat"])),
+                            post_pcat=float(values.get("post_pcat", defaults["post_pcat"])),
+                            length=float(values.get("length", defaults["length"])),
+                            width=float(values.get("width", defaults["width"])))
+
+def read_csv_schedule(path:str) -> Iterator[ScheduledArrival]:
+    """
+    Stream the arrivals of a CSV schedule with a header row, one row at a time.
+    """
+    with open(path, newline="") as schedule_file:
+        for row in csv.DictReader(schedule_file):
+            yield arrival_from_row(row)
+
+def read_parquet_schedule(path:str,
+                          batch_size:int=65536) -> Iterator[ScheduledArrival]:
+    """
+    Stream the arrivals of a Parquet schedule, one record batch at a time.
+
+    @param path: the Parquet file
+    @param batch_size: rows read at a time
+    """
+    import pyarrow.parquet as pq
+    schedule_file = pq.ParquetFile(path)
+    columns = [column for column in COLUMNS if column in schedule_file.schema_arrow.names]
+    for batch in schedule_file.iter_batches(batch_size=batch_size, columns=columns):
+        for row in batch.to_pylist():
+            yield arrival_from_row(row)
+
+def read_schedule(path:str,
+                  batch_size:int=65536) -> Iterator[ScheduledArrival]:
+    """
+    Stream the arrivals of a .csv or .parquet schedule file.
+
+    @param path: the schedule file
+    @param batch_size: rows read at a time from a Parquet file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return read_csv_schedule(path)
+    if extension in (".parquet", ".pq"):
+        return read_parquet_schedule(path, batch_size)
+    raise ValueError(f"Unknown schedule format {extension}, expected .csv or .parquet")
+
+def write_schedule(path:str,
+                   arrivals:Iterable[ScheduledArrival]) -> None:
+    """
+    Write arrivals to a .csv schedule file, one row at a time.
+    """
+    if os.path.splitext(path)[1].lower() != ".csv":
+        raise ValueError("write_schedule writes .csv files")
+    with open(path, "w", newline="") as schedule_file:
+        writer = csv.writer(schedule_file)
+        writer.writerow(COLUMNS)
+        for arrival in arrivals:
+            writer.writerow(NAME_SEPARATOR.join(value) if isinstance(value, tuple) else value for value in arrival)
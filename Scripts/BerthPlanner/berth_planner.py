@@ -1,9 +1,14 @@
-from typing import List, Any, Optional, Dict, Tuple
+import math
+from typing import List, Any, Callable, Iterable, Optional, Dict, Tuple, Union
 import simpy
-from Scripts.Resources.resources import Berth, Crane
+from Scripts.Resources.resources import Berth, Crane, Quay
+from Scripts.Resources.crane_pool import CranePool
 from Scripts.BerthPlanner.vessel import Vessel, VesselArrival, HatchProfile
+from Scripts.BerthPlanner.arrival_source import ScheduledArrival, read_schedule
 from Scripts.YardPlanner.yard_planner import YardPlanner
-from Scripts.Utils.log import Logger
+from Scripts.Statistics.random_streams import RandomStreams
+from Scripts.Utils.log import Logger, console
+from Scripts.Utils.event_trace import EventKind, EventTrace, TextLogView
 
 class BerthPlanner:
     """
@@ -13,15 +18,28 @@ class BerthPlanner:
     def __init__(self, 
                  env:simpy.Environment,
                  yard_planner:YardPlanner,
-                 logger:Logger) -> None:
+                 logger:Logger,
+                 streams:Optional[RandomStreams]=None,
+                 trace:Optional[EventTrace]=None,
+                 crane_reach:float=math.inf) -> None:
+        """
+        @param streams: source of every random stream of the scenario, streams of DEFAULT_SEED if None
+        @param trace: trace shared by the berth, cranes and vessels, a trace logging to logger if None
+        @param crane_reach: largest distance from a crane to a vessel that asks for any cranes
+        """
         self.env = env
-        self.berth:Berth = None  # List of available berths
+        self.streams:RandomStreams = streams if streams is not None else RandomStreams(DEFAULT_SEED) # Source of every random stream
+        self.berth:Union[Berth, Quay] = None  # The berth, or the quay, the vessels berth at
         self.cranes:List[Crane] = []  # List of crane instances
+        self.crane_pool:CranePool = CranePool(env)  # Hands the cranes out to the vessels
+        self.crane_reach:float = crane_reach
         self.vessels: List[Vessel] = [] # List of Vessels instances
-        self.scheduler:VesselArrival = VesselArrival(env) # List of vessel arrival instances
+        self._vessel_ids:set = set() # Ids of self.vessels, for constant time membership checks
+        self.scheduler:VesselArrival = VesselArrival(env, self.streams.generator("arrivals")) # List of vessel arrival instances
         self.hatch_profiles:List[HatchProfile] = []  # List of hatch profiles
         self.yard_planner:YardPlanner = yard_planner #Add the yard planner
         self.logger:Logger = logger #Add the logger
+        self.trace:EventTrace = trace if trace is not None else EventTrace(text_view=TextLogView(logger=logger))
 
     def add_berth(self, 
                   name:str, 
@@ -32,13 +50,37 @@ class BerthPlanner:
         """
         self.berth = Berth(name, self.env, capacity=capacity)
         return self.berth
+
+    def add_quay(self,
+                 name:str,
+                 length:float,
+                 overtaking:bool=True) -> Quay:
+        """
+        Adds a continuous quay in place of the berth. Every vessel then takes a segment
+        of the quay as long as the vessel, as near as possible to its berth position.
+
+        @param length: length of the quay in meters
+        @param overtaking: let a waiting vessel that fits berth before earlier ones that do not
+        """
+        self.berth = Quay(name, self.env, length, overtaking)
+        return self.berth
     
     def add_crane(self, 
-                  name:str,) -> List[Crane]:
+                  name:str,
+                  coarse:bool=False,
+                  streaming_stats:bool=False,
+                  position:float=0.0) -> List[Crane]:
         """
         Adds a crane to the berth planner. It can have any number of cranes
+
+        @param coarse: handle each hatch row of the crane as one aggregated timeout
+        @param streaming_stats: keep only running statistics of the crane's move times
+        @param position: initial position of the crane along the quay
         """
-        self.cranes.append(Crane(name, self.env, self.yard_planner, self.logger, capacity=1))
+        self.cranes.append(Crane(name, self.env, self.yard_planner, self.logger, capacity=1,
+                                 streams=self.streams, coarse=coarse, trace=self.trace,
+                                 streaming_stats=streaming_stats, position=position))
+        self.crane_pool.add(self.cranes[-1])
         return self.cranes
     
     def add_hatch_profile(self, 
@@ -69,15 +111,17 @@ class BerthPlanner:
                         name,
                         self.logger,
                         length,
-                        width)
+                        width,
+                        trace=self.trace)
         self.vessels.append(vessel)
+        self._vessel_ids.add(id(vessel))
         return vessel
 
     def add_to_schedule(self,
                         vessel:Vessel,
                         arrival_time:float,
-                        berth_position:int,
-                        cranes:List[Crane],
+                        berth_position:Optional[float],
+                        cranes:Union[List[Crane], int],
                         prePcat:Optional[float]=1000.00,
                         postPcat:Optional[float]=1000.00)->None:
         """
@@ -85,14 +129,14 @@ class BerthPlanner:
 
         @param vessel: vessel object 
         @param arrival_time: The arrival time of the vessel
-        @berth_position: The position of the berth where the ship will be docked
-        @num_cranes: The cranes needed to operate in the ship
+        @berth_position: The preferred position in meters along the quay where the ship will be docked, none if None
+        @num_cranes: The cranes needed to operate in the ship, or their number, any of the crane pool
         @prePcat: The pre inspection time done by authorities on the ship
         @postPcat: The post inspection time done by the port aunthorities on this ship
 
         returns None
         """
-        if (isinstance(vessel, Vessel) and vessel in self.vessels):
+        if (isinstance(vessel, Vessel) and id(vessel) in self._vessel_ids):
             self.scheduler.add_schedule(vessel,
                                         arrival_time,
                                         berth_position,
@@ -107,49 +151,160 @@ class BerthPlanner:
         The berth is released when the crane finishes the job.
 
         @@params vessel: The vessel object
-        @@params cranes: The list of crane object available in the model
+        @@params cranes: The list of crane object available in the model, or the number
+                         of cranes, any within crane_reach of the vessel
         """
         # Request the berth and yield the request
-        berth_request = self.berth.request()
+        berth_request = self.berth.request_for(vessel)
         yield berth_request
         if (berth_request in self.berth.users):
-            self.logger.log(f'The {vessel.name} started the pre-inspection at {self.env.now}')
-            print(f'The {vessel.name} started the pre-inspection at {self.env.now}')
+            vessel.berth_time = self.env.now
+            vessel_code = self.trace.name_code(vessel.name)
+            self.trace.record(EventKind.PRE_INSPECTION_STARTED, self.env.now, vessel_code)
+            console("The %s started the pre-inspection at %s", vessel.name, self.env.now)
             yield self.env.timeout(vessel.prePcat)
-            self.logger.log(f'The {vessel.name} finished the pre-inspection at {self.env.now}')
-            self.logger.log(f'The {vessel.name} is started the operation at {self.env.now}')
-            print(f'The {vessel.name} finished the pre-inspection at {self.env.now}')
-            print(f'The {vessel.name} is started the operation at {self.env.now}')
+            berth_code = self.trace.name_code(self.berth.name)
+            self.trace.record(EventKind.PRE_INSPECTION_FINISHED, self.env.now, vessel_code, berth=berth_code)
+            self.trace.record(EventKind.OPERATION_STARTED, self.env.now, vessel_code, berth=berth_code)
+            console("The %s finished the pre-inspection at %s", vessel.name, self.env.now)
+            console("The %s is started the operation at %s", vessel.name, self.env.now)
             vessel.on_berth_acquired(self.berth, berth_request)
-            for crane_name in cranes:
-                crane = next((c for c in self.cranes if c.name == crane_name.name), None)
-                if crane:
-                    self.env.process(self.await_crane_acquisition(vessel, crane))
+            if isinstance(cranes, int):
+                for _ in range(cranes):
+                    self.env.process(self.await_crane_acquisition(vessel))
+            else:
+                for crane_name in cranes:
+                    crane = self.crane_pool.cranes.get(crane_name.name)
+                    if crane:
+                        self.env.process(self.await_crane_acquisition(vessel, crane))
+
+    def vessel_position(self,
+                        vessel:Vessel) -> Optional[float]:
+        """
+        Position of the vessel along the quay: the middle of its quay segment, or its berth position.
+        """
+        request = vessel.berth_request
+        if getattr(request, "start", None) is not None:
+            return request.start + request.length / 2
+        return float(vessel.berth_position) if vessel.berth_position is not None else None
 
     def await_crane_acquisition(self, 
                                 vessel:Vessel, 
-                                crane:Crane) -> None:
-        crane_request = crane.request()
-        yield crane_request
-        if (crane_request in crane.users):
-            vessel.start_crane_operations(crane)
-            vessel.on_crane_acquired(crane, crane_request)
+                                crane:Optional[Crane]=None) -> None:
+        """
+        Get a crane from the crane pool and start it on the vessel.
+
+        @@params crane: the crane, any crane within crane_reach of the vessel if None
+        """
+        if crane is not None:
+            grant = self.crane_pool.request(crane.name)
+        else:
+            grant, = self.crane_pool.request_any(1, self.vessel_position(vessel), self.crane_reach)
+        yield grant
+        vessel.start_crane_operations(grant.crane)
+        vessel.on_crane_acquired(grant.crane, grant.crane_request)
+
+    def vessel_arrived(self,
+                       vessel:Vessel,
+                       cranes:List[Crane]) -> None:
+        """
+        Record the arrival of a vessel and start its request of the berth.
+        """
+        console("The %s is arrived at %s", vessel.name, self.env.now)
+        self.trace.record(EventKind.VESSEL_ARRIVED, self.env.now, self.trace.name_code(vessel.name))
+        self.env.process(self.await_berth_acquisition(vessel, cranes))
 
     def handle_vessel_arrival(self, 
                               vessel:Vessel, 
                               arrival_time:float,
                               cranes:List[Crane]) -> None:
         yield self.env.timeout(arrival_time - self.env.now)
-        print(f'The {vessel.name} is arrived at {self.env.now}')
-        self.logger.log(f'The {vessel.name} is arrived at {self.env.now}')
-        self.env.process(self.await_berth_acquisition(vessel, cranes))
+        self.vessel_arrived(vessel, cranes)
+
+    def create_vessel(self,
+                      arrival:ScheduledArrival) -> Vessel:
+        """
+        Create the vessel of a streamed arrival with its hatch profiles. The vessel is not
+        kept in self.vessels, so the planner holds only the vessels in port.
+
+        @param arrival: the arrival, its hatch profiles are names of self.hatch_profiles
+        """
+        vessel = Vessel(self.env, arrival.vessel, self.logger, arrival.length, arrival.width, trace=self.trace)
+        if arrival.hatch_profiles:
+            profiles = {profile.name: profile for profile in self.hatch_profiles}
+            unknown = [name for name in arrival.hatch_profiles if name not in profiles]
+            if unknown:
+                raise ValueError(f"Unknown hatch profiles {unknown} for {arrival.vessel}")
+            for name in arrival.hatch_profiles:
+                vessel.add_hatch_profile(profiles[name])
+        else:
+            for profile in self.hatch_profiles:
+                vessel.add_hatch_profile(profile)
+        return vessel
+
+    def _schedule_event(self,
+                        arrival:ScheduledArrival,
+                        vessel_factory:Callable[[ScheduledArrival], Vessel]) -> Dict[str, Any]:
+        if arrival.num_cranes:
+            arrival_cranes = arrival.num_cranes
+        elif arrival.cranes:
+            unknown = [name for name in arrival.cranes if name not in self.crane_pool]
+            if unknown:
+                raise ValueError(f"Unknown cranes {unknown} for {arrival.vessel}")
+            arrival_cranes = [self.crane_pool.cranes[name] for name in arrival.cranes]
+        else:
+            arrival_cranes = list(self.cranes)
+        return {"vessel": vessel_factory(arrival),
+                "arrival_time": arrival.arrival_time,
+                "berth_position": arrival.berth_position,
+                "cranes": arrival_cranes,
+                "pre-pcat": arrival.pre_pcat,
+                "post-pcat": arrival.post_pcat}
 
-    def process_arrivals(self) -> None:
-        for event in self.scheduler.schedule:
+    def drive_arrivals(self,
+                       arrivals:Iterable[Union[Dict[str, Any], ScheduledArrival]],
+                       vessel_factory:Optional[Callable[[ScheduledArrival], Vessel]]=None) -> None:
+        """
+        The arrival driver: a single process that takes the arrivals one at a time, in time
+        order, waits for each and lets the vessel arrive. Only the next arrival is pending,
+        and the vessel of a ScheduledArrival is created when it arrives.
+
+        @@params arrivals: schedule events of VesselArrival or ScheduledArrival, sorted by arrival time
+        @@params vessel_factory: creates the vessel of a ScheduledArrival, create_vessel if None
+        """
+        vessel_factory = vessel_factory if vessel_factory is not None else self.create_vessel
+        for arrival in arrivals:
+            arrival_time = arrival["arrival_time"] if isinstance(arrival, dict) else arrival.arrival_time
+            if arrival_time < self.env.now:
+                raise ValueError(f"The schedule is not sorted by arrival time: {arrival_time} after {self.env.now}")
+            yield self.env.timeout(arrival_time - self.env.now)
+            event = arrival if isinstance(arrival, dict) else self._schedule_event(arrival, vessel_factory)
             vessel = event["vessel"]
-            arrival_time = event["arrival_time"]
-            cranes = event["cranes"]
-            vessel.prePcat = event["pre-pcat"]
-            vessel.postPcat = event["post-pcat"]
-            vessel.arrivalTime = event["arrival_time"]
-            self.env.process(self.handle_vessel_arrival(vessel, arrival_time, cranes))
\ No newline at end of file
+            vessel.prePcat = float(event["pre-pcat"])
+            vessel.postPcat = float(event["post-pcat"])
+            vessel.arrivalTime = float(event["arrival_time"])
+            vessel.berth_position = event["berth_position"]
+            self.vessel_arrived(vessel, event["cranes"])
+
+    def process_arrivals(self,
+                         source:Union[None, str, Iterable[ScheduledArrival]]=None,
+                         vessel_factory:Optional[Callable[[ScheduledArrival], Vessel]]=None) -> simpy.Process:
+        """
+        Start the arrival driver.
+
+        @@params source: the schedule of self.scheduler if None, else a .csv or .parquet
+                         schedule file streamed with read_schedule, or arrivals. A list of
+                         arrivals is sorted, any other iterable must be in time order.
+        @@params vessel_factory: creates the vessel of each streamed arrival, create_vessel if None
+
+        returns the driver process
+        """
+        if source is None:
+            arrivals = sorted(self.scheduler.schedule, key=lambda event: event["arrival_time"])
+        elif isinstance(source, str):
+            arrivals = read_schedule(source)
+        elif isinstance(source, (list, tuple)):
+            arrivals = sorted(source, key=lambda arrival: arrival.arrival_time)
+        else:
+            arrivals = source
+        return self.env.process(self.drive_arrivals(arrivals, vessel_factory))
\ No newline at end of file
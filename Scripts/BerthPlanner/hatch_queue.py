@@ -0,0 +1,158 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+import simpy
+from simpy.core import BoundClass
+from simpy.resources.store import StoreGet, StorePut
+
+class Hatch(NamedTuple):
+    """ A hatch of a vessel: its place along the vessel and its profile. """
+    index: int
+    profile: Any
+
+class HatchGet(StoreGet):
+    """
+    Request of the next hatch for a crane. It is triggered at once, with the hatch or
+    with None if no hatch is left.
+    """
+    def __init__(self,
+                 queue:"HatchQueue",
+                 crane:Any) -> None:
+        self.crane:Any = crane
+        super().__init__(queue)
+
+class HatchQueue(simpy.Store):
+    """
+    The hatches of a vessel as a shared work queue for its cranes.
+
+    The items are the hatches not started yet, in the order of their place along the
+    vessel. The side of a crane is the stretch of hatches between the hatches its
+    neighbours work on. A free crane takes the nearest hatch of its side, toward the
+    busier neighbour when two are as near. When its side is empty, it steals from the
+    busiest neighbour: it takes the middle hatch of the largest stretch left, which
+    splits that stretch between the neighbour and itself. A crane that joins starts
+    the same way. A crane leaves only when no hatch is left, so every crane stays busy
+    until the end and the vessel does not wait on one crane with a long side.
+
+    Every hatch is handed out once and must be reported done once, and finished fires
+    when the last one is done.
+    """
+    def __init__(self,
+                 env:simpy.Environment,
+                 profiles:List[Any]=()) -> None:
+        """
+        @param profiles: the hatch profiles of the vessel, in their order along it
+        """
+        super().__init__(env)
+        self.items:List[Hatch] = [Hatch(index, profile) for index, profile in enumerate(profiles)]
+        self._indices:List[int] = list(range(len(self.items)))  # indices of the items, in the same order
+        self._next_index:int = len(self.items)
+        self._positions:Dict[Any, int] = {}  # index of the hatch each crane works or last worked
+        self._outstanding:Set[int] = set()  # indices of the hatches handed out and not done
+        self.remaining:int = len(self.items)  # hatches not finished
+        self.finished:simpy.Event = env.event()
+        if not self.remaining:
+            self.finished.succeed()
+
+    put = BoundClass(StorePut)
+    get = BoundClass(HatchGet)
+
+    def _do_put(self, event:StorePut) -> Optional[bool]:
+        self.add(event.item)
+        event.succeed()
+        return None
+
+    def _do_get(self, event:HatchGet) -> Optional[bool]:
+        event.succeed(self.take(event.crane))
+        return True
+
+    def add(self,
+            profile:Any) -> Hatch:
+        """
+        Add a hatch after the last one of the vessel.
+        """
+        index = self._next_index
+        self._next_index += 1
+        hatch = Hatch(index, profile)
+        self.items.append(hatch)
+        self._indices.append(index)
+        if self.finished.triggered:
+            self.finished = self.env.event()
+        self.remaining += 1
+        return hatch
+
+    def _side(self,
+              crane:Any) -> Tuple[float, float]:
+        position = self._positions[crane]
+        others = sorted(other for other_crane, other in self._positions.items() if other_crane is not crane)
+        split = bisect_left(others, position)
+        left = others[split - 1] if split > 0 else float("-inf")
+        right = others[split] if split < len(others) else float("inf")
+        return left, right
+
+    def _largest_stretch(self,
+                         crane:Any) -> int:
+        """ Index of the middle hatch of the largest stretch between the other cranes. """
+        others = sorted(other for other_crane, other in self._positions.items() if other_crane is not crane)
+        bounds = [float("-inf")] + others + [float("inf")]
+        best, best_count = None, 0
+        for left, right in zip(bounds, bounds[1:]):
+            first, last = bisect_right(self._indices, left), bisect_left(self._indices, right)
+            if last - first > best_count:
+                best, best_count = (first, last), last - first
+        first, last = best
+        return self._indices[(first + last - 1) // 2]
+
+    def take(self,
+             crane:Any) -> Optional[Hatch]:
+        """
+        Take the next hatch for the crane at once, without an event: the request of a
+        hatch never waits.
+
+        returns the hatch, or None if no hatch is left
+        """
+        if not self._indices:
+            self._positions.pop(crane, None)
+            return None
+        below = above = None
+        if crane in self._positions:
+            left, right = self._side(crane)
+            position = self._positions[crane]
+            split = bisect_left(self._indices, position)
+            below = self._indices[split - 1] if split > 0 and self._indices[split - 1] > left else None
+            above = self._indices[split] if split < len(self._indices) and self._indices[split] < right else None
+        if below is None and above is None:
+            index = self._largest_stretch(crane)
+        elif below is None or above is None:
+            index = below if above is None else above
+        elif position - below != above - position:
+            index = below if position - below < above - position else above
+        else:
+            # As near either way, help the busier neighbour
+            below_count = split - bisect_right(self._indices, left)
+            above_count = bisect_left(self._indices, right) - split
+            index = below if below_count > above_count else above
+        slot = bisect_left(self._indices, index)
+        del self._indices[slot]
+        hatch = self.items.pop(slot)
+        self._positions[crane] = index
+        self._outstanding.add(index)
+        return hatch
+
+    def leave(self,
+              crane:Any) -> None:
+        """ The crane stops working the vessel before the queue runs out. """
+        self._positions.pop(crane, None)
+
+    def done(self,
+             hatch:Hatch) -> None:
+        """
+        Record that the hatch is finished.
+
+        raises ValueError if the hatch was not handed out by take or is done already
+        """
+        if hatch.index not in self._outstanding:
+            raise ValueError(f"Hatch {hatch.index} is not being worked")
+        self._outstanding.remove(hatch.index)
+        self.remaining -= 1
+        if not self.remaining:
+            self.finished.succeed()
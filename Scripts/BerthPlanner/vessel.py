@@ -1,6 +1,10 @@
+from typing import Optional, Union
 from Scripts.Resources.resources import *
 from Scripts.Utils.port_objects_definition import *
-from Scripts.Utils.log import Logger
+from Scripts.Utils.log import Logger, console
+from Scripts.Utils.event_trace import EventKind, EventTrace, TextLogView
+from Scripts.BerthPlanner.hatch_queue import HatchQueue
+import numpy as np
 
 class HatchProfile:
     """
@@ -61,28 +65,37 @@ class Vessel:
                  name:str,
                  logger:Logger,
                  length:Optional[float]=300, 
-                 width:Optional[float]=30):
+                 width:Optional[float]=30,
+                 trace:Optional[EventTrace]=None):
         """
         Constructor for the vessel class.
 
         @param name: name of the ship
         @param length: length of the ship
         @param width: width of the ship
+        @param trace: trace of the vessel events, a trace logging to logger if None
         """
         self.env = env
         self.name:str = name
         self.length:float = length
         self.width:float = width
         self.hatch_profiles:List[HatchProfile] = []  # List to store hatch profiles
+        self._hatch_queue:Optional[HatchQueue] = None  # The hatches as the work queue of the cranes
         self.finished_hatches:int = 0
         self.finished_hatch_profiles:List[HatchProfile] = []
         self.berth:Berth = None
         self.berth_request:Berth.request = None
-        self.cranes:List[Tuple[Crane, Crane.request]] = []
+        self.cranes:Dict[str, Tuple[Crane, Crane.request]] = {}  # the cranes working the vessel, by name
         self._prePcat:int = 0
         self._postPcat:int = 0
         self._arrivalTime:int = 0
+        self.berth_position:Optional[float] = None  # Preferred place at the berth, meters along a quay
+        self.berth_time:Optional[float] = None  # Time the vessel got its berth
+        self.departure_time:Optional[float] = None  # Time the vessel left its berth
+        self.departing:bool = False  # The post pcat inspection has started
         self.logger:Logger = logger
+        self.trace:EventTrace = trace if trace is not None else EventTrace(text_view=TextLogView(logger=logger))
+        self.trace_code:int = self.trace.name_code(name)
         Vessel.count += 1
     
     @property
@@ -118,6 +131,23 @@ class Vessel:
             raise ValueError("arrivalTime must be an integer")
         self._arrivalTime = time
 
+    @property
+    def hatch_queue(self) -> HatchQueue:
+        """ The hatches shared by the cranes of the vessel, built when the first crane starts. """
+        if self._hatch_queue is None:
+            self._hatch_queue = HatchQueue(self.env, self.hatch_profiles)
+        return self._hatch_queue
+
+    @property
+    def berth_waiting_time(self) -> Optional[float]:
+        """ Time between the arrival and getting a berth, None until the vessel has a berth. """
+        return None if self.berth_time is None else self.berth_time - self.arrivalTime
+
+    @property
+    def turnaround_time(self) -> Optional[float]:
+        """ Time between the arrival and leaving the berth, None until the vessel has left. """
+        return None if self.departure_time is None else self.departure_time - self.arrivalTime
+
     def set_berth(self, 
                   berth:Berth, 
                   berth_request:Berth.request) -> Berth:
@@ -130,43 +160,55 @@ class Vessel:
         return self.berth
     
     def release_berth(self) -> None:
-        if self.berth and not self.cranes:
-            self.logger.log(f"The {self.name} starts the post_pcat inspection at {self.env.now}")
-            print(f"The {self.name} starts the post_pcat inspection at {self.env.now}")
+        """
+        Process of the departure, started when the berth is acquired: once every hatch is
+        finished, the post pcat inspection, then the berth is released. A crane that finds
+        no hatch left can be released during the post pcat inspection.
+        """
+        hatch_queue = self.hatch_queue
+        while hatch_queue.remaining:
+            yield hatch_queue.finished
+        if self.berth and not self.departing:
+            self.departing = True
+            berth_code = self.trace.name_code(self.berth.name)
+            self.trace.record(EventKind.POST_INSPECTION_STARTED, self.env.now, self.trace_code, berth=berth_code)
+            console("The %s starts the post_pcat inspection at %s", self.name, self.env.now)
             yield self.env.timeout(self.postPcat)
-            self.logger.log(f"The {self.name} finished the post_pcat inspection at {self.env.now}")
-            print(f"The {self.name} finished the post_pcat inspection at {self.env.now}")
+            self.trace.record(EventKind.POST_INSPECTION_FINISHED, self.env.now, self.trace_code, berth=berth_code)
+            console("The %s finished the post_pcat inspection at %s", self.name, self.env.now)
             self.berth.release(self.berth_request)
             self.berth.occupied_by.remove(self)
-            self.logger.log(f"{self.berth.name} has completed all tasks for {self.name} at {self.env.now}")
-            self.logger.log(f'{self.name} leaving the berth at {self.env.now}')
-            print(f"{self.berth.name} has completed and left berth for {self.name} at {self.env.now}")
+            self.departure_time = self.env.now
+            self.trace.record(EventKind.VESSEL_DEPARTED, self.env.now, self.trace_code, berth=berth_code)
+            console("%s has completed and left berth for %s at %s", self.berth.name, self.name, self.env.now)
             self.berth = None
             self.berth_request = None
     
     def add_crane(self, 
                   crane:Crane, 
                   crane_request:Crane.request) -> None:
-        self.cranes.append((crane, crane_request))
+        self.cranes[crane.name] = (crane, crane_request)
         crane.vessel = self
 
     def release_cranes(self, 
                        crane:Crane) -> None:
-        for crane_in_vessel, req in self.cranes:
-            if crane_in_vessel.name == crane.name:
+        entry = self.cranes.pop(crane.name, None)
+        if entry is not None:
+            _, req = entry
+            # A crane of a pool goes back to the pool, to the next vessel waiting for it
+            if crane.pool is not None:
+                crane.pool.release(crane, req)
+            else:
                 crane.release(req)
-                crane.vessel = None
-                self.cranes.remove((crane,req))
-                self.logger.log(f'The {crane.name} is released from the {self.name} at {self.env.now}')
-
-        if not self.cranes:
-            self.env.process(self.release_berth())
+            crane.vessel = None
+            self.trace.record(EventKind.CRANE_RELEASED, self.env.now, self.trace_code, self.trace.name_code(crane.name))
 
     def on_berth_acquired(self,
                           berth:Berth, 
                           berth_request:Berth.request):
-        # Callback for when the berth is acquired
+        # Callback for when the berth is acquired, the vessel leaves once its hatches are finished
         self.set_berth(berth, berth_request)
+        self.env.process(self.release_berth())
 
     def on_crane_acquired(self, 
                           crane:Crane, 
@@ -211,6 +253,8 @@ class Vessel:
         Method to add a hatch profile to the vessel
         """
         self.hatch_profiles.append(hatch_profile)
+        if self._hatch_queue is not None:
+            self._hatch_queue.add(hatch_profile)
 
     def total_containers_to_load(self)-> str:
         """
@@ -236,19 +280,24 @@ class VesselArrival:
     """
     This class handles the vessel arrival process
     """
-    def __init__(self,env:simpy.Environment):
+    def __init__(self,
+                 env:simpy.Environment,
+                 rng:Optional[np.random.Generator]=None):
         """
         Constructor for the vessel Arrival
+
+        @param rng: random stream of the arrival process
         """
         self.env = env
+        self.rng:np.random.Generator = rng if rng is not None else np.random.default_rng()
         self.schedule:List[Dict] = []
         self.num_vessels:int = 0
 
     def add_schedule(self,
                      vessel:Vessel,
                      arrival_time:float,
-                     berth_position:int,
-                     cranes:List[Crane],
+                     berth_position:Optional[float],
+                     cranes:Union[List[Crane], int],
                      prePcat:Optional[float]=1000.00,
                      postPcat:Optional[float]=1000.00) -> None:
         """
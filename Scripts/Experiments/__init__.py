@@ -0,0 +1,3 @@
+from .output_analysis import StoppingRule, BatchMeansResult, mser5, batch_means
+from .scenario import HatchRow, BlockLayout, ScenarioConfig, Scenario, build_scenario, run_scenario
+from .traffic import VesselClass, Traffic, DEFAULT_VESSEL_CLASSES, generate_traffic
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Output analysis of simulation KPIs: warm-up truncation with MSER-5, batch means confidence
+intervals and the precision check of the sequential stopping rules.
+"""
+import math
+from typing import NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+import scipy.stats as stats
+
+class StoppingRule(NamedTuple):
+    """
+    When a run has reached the precision needed. Every checkpoint_interval of simulated time
+    the run records the time average of each KPI over the interval. Once it has min_checkpoints,
+    it checks every check_every checkpoints if the batch means confidence interval of every
+    KPI, after MSER-5 truncation of the warm-up, is precise enough, and stops if so.
+    ScenarioConfig.simulation_time remains the longest run.
+
+    kpis: names of Scenario.kpi_monitors
+    relative_precision: largest half width as a share of the mean
+    absolute_precision: largest half width, precise if either bound is met
+    """
+    kpis: Tuple[str, ...] = ("Berth1.utilization",)
+    relative_precision: float = 0.05
+    absolute_precision: Optional[float] = None
+    confidence: float = 0.95
+    checkpoint_interval: float = 3600.0
+    min_checkpoints: int = 100
+    check_every: int = 20
+    num_batches: int = 20
+
+class BatchMeansResult(NamedTuple):
+    mean: float
+    half_width: float
+    truncated: int  # observations removed as warm-up
+    batch_size: int
+    num_batches: int
+
+def mser5(observations:Sequence[float]) -> int:
+    """
+    Return the warm-up truncation point of a series by MSER-5 (White, 1997): the series is
+    averaged in batches of 5, and the number d of batches dropped minimizes the squared
+    standard error of the mean of the remaining batches, sum((Z_j - mean)^2) / (m - d)^2.
+    Only the first half of the batches are candidates for truncation.
+
+    @param observations: the series, in time order
+
+    returns the number of observations to drop
+    """
+    observations = np.asarray(observations, dtype=float)
+    num_batches = len(observations) // 5
+    if num_batches < 2:
+        return 0
+    batches = observations[:num_batches * 5].reshape(num_batches, 5).mean(axis=1)
+    # Suffix sums give the statistic of every truncation point in one pass
+    counts = np.arange(num_batches, 0, -1, dtype=float)
+    sums = np.cumsum(batches[::-1])[::-1]
+    squares = np.cumsum((batches ** 2)[::-1])[::-1]
+    statistic = (squares - sums ** 2 / counts) / counts ** 2
+    candidates = num_batches // 2 + 1
+    return 5 * int(np.argmin(statistic[:candidates]))
+
+def batch_means(observations:Sequence[float],
+                num_batches:int=20,
+                confidence:float=0.95,
+                truncate:bool=True) -> BatchMeansResult:
+    """
+    Return the mean of a series and the half width of its confidence interval by
+    nonoverlapping batch means, after the MSER-5 warm-up truncation.
+
+    @param observations: the series, in time order
+    @param num_batches: number of batches, fewer if there are fewer observations
+    @param confidence: confidence level of the interval
+    @param truncate: remove the warm-up first
+    """
+    observations = np.asarray(observations, dtype=float)
+    truncated = mser5(observations) if truncate else 0
+    kept = observations[truncated:]
+    num_batches = min(num_batches, len(kept))
+    if num_batches < 2:
+        mean = float(kept.mean()) if len(kept) else math.nan
+        return BatchMeansResult(mean, math.inf, truncated, len(kept), num_batches)
+    batch_size = len(kept) // num_batches
+    # The observations that do not fill a batch are dropped from the start, next to the warm-up
+    kept = kept[len(kept) - batch_size * num_batches:]
+    means = kept.reshape(num_batches, batch_size).mean(axis=1)
+    half_width = float(stats.t.ppf(0.5 + confidence / 2, num_batches - 1) * means.std(ddof=1) / math.sqrt(num_batches))
+    return BatchMeansResult(float(means.mean()), half_width, len(observations) - len(kept), batch_size, num_batches)
+
+def is_precise(mean:float,
+               half_width:float,
+               relative_precision:Optional[float]=None,
+               absolute_precision:Optional[float]=None) -> bool:
+    """
+    Whether a confidence interval meets a relative or an absolute precision target.
+    """
+    if not math.isfinite(half_width):
+        return False
+    if absolute_precision is not None and half_width <= absolute_precision:
+        return True
+    return relative_precision is not None and half_width <= relative_precision * abs(mean)
@@ -0,0 +1,171 @@
+"""
+Run independent replications of a scenario in parallel and report confidence intervals.
+
+Usage:
+    python -m Scripts.Experiments.replications [--replications 30] [--workers N] [--seed 42] [--coarse]
+        [--cache results_cache/] [--refresh-cache]
+        [--precision 0.05 --metric turnaround.mean [--metric ...]]
+
+With --precision, replications are added until the confidence interval half width of
+every --metric is within that share of its mean, --replications being the most to run.
+"""
+import argparse
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import scipy.stats as stats
+from Scripts.Experiments.output_analysis import is_precise
+from Scripts.Experiments.scenario import ScenarioConfig
+from Scripts.Experiments.result_cache import ResultCache, cached_run
+from Scripts.Statistics.random_streams import RandomStreams
+
+def replication_configs(config:ScenarioConfig,
+                        replications:int) -> List[ScenarioConfig]:
+    """
+    Return one copy of the configuration per replication, each with an independent seed
+    spawned from the configuration seed.
+
+    @param config: the scenario configuration
+    @param replications: number of replications
+    """
+    seeds = RandomStreams(config.seed).spawn(replications)
+    return [config._replace(seed=seed) for seed in seeds]
+
+def summarize(results:List[Dict[str, Any]],
+              confidence:float=0.95) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate the metrics of the replications into means and Student t confidence intervals.
+
+    @param results: the results returned by run_scenario for each replication
+    @param confidence: confidence level of the intervals
+
+    returns for every metric its number of replications, mean, standard deviation and
+    half width of the confidence interval (nan with fewer than two replications)
+    """
+    values:Dict[str, List[float]] = {}
+    for result in results:
+        for name, value in result["metrics"].items():
+            values.setdefault(name, []).append(value)
+    summary = {}
+    for name, samples in values.items():
+        samples = np.asarray(samples, dtype=float)
+        n = len(samples)
+        std = float(samples.std(ddof=1)) if n > 1 else float("nan")
+        half_width = float(stats.t.ppf(0.5 + confidence / 2, n - 1) * std / np.sqrt(n)) if n > 1 else float("nan")
+        summary[name] = {"n": n, "mean": float(samples.mean()), "std": std, "half_width": half_width}
+    return summary
+
+def run_replications(config:ScenarioConfig,
+                     replications:int,
+                     workers:Optional[int]=None,
+                     cache:Optional[ResultCache]=None,
+                     refresh:bool=False) -> List[Dict[str, Any]]:
+    """
+    Run the replications of a scenario, each built from scratch in a worker process.
+
+    @param config: the scenario configuration, its seed is the master seed of the replications
+    @param replications: number of replications
+    @param workers: number of worker processes, one per core if None. With 1 the
+                    replications run in this process.
+    @param cache: result cache of the replications, they always run if None
+    @param refresh: run the replications even when cached and replace the stored results
+
+    returns the results of the replications, in replication order
+    """
+    configs = replication_configs(config, replications)
+    run = functools.partial(cached_run, cache=cache, refresh=refresh)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [run(replication) for replication in configs]
+    with ProcessPoolExecutor(max_workers=min(workers, replications)) as executor:
+        return list(executor.map(run, configs))
+
+def run_replications_until(config:ScenarioConfig,
+                           metrics:Sequence[str],
+                           relative_precision:Optional[float]=0.05,
+                           absolute_precision:Optional[float]=None,
+                           confidence:float=0.95,
+                           min_replications:int=5,
+                           max_replications:int=100,
+                           workers:Optional[int]=None,
+                           cache:Optional[ResultCache]=None,
+                           refresh:bool=False) -> List[Dict[str, Any]]:
+    """
+    Add replications of a scenario until the confidence interval of every metric is precise
+    enough (sequential procedure). Replications are added one round of workers at a time,
+    so a round never waits for more replications than there are workers.
+
+    @param config: the scenario configuration, its seed is the master seed of the replications
+    @param metrics: names of the metrics of run_scenario the precision applies to
+    @param relative_precision: largest half width as a share of the mean
+    @param absolute_precision: largest half width, precise if either bound is met
+    @param confidence: confidence level of the intervals
+    @param min_replications: replications run before the first check
+    @param max_replications: most replications run
+    @param workers: number of worker processes, one per core if None
+    @param cache: result cache of the replications, they always run if None
+    @param refresh: run the replications even when cached and replace the stored results
+
+    returns the results of the replications run, in replication order
+    """
+    if min_replications < 2 or max_replications < min_replications:
+        raise ValueError("Need 2 <= min_replications <= max_replications")
+    # Replication i has the same seed as with run_replications, whenever the procedure stops
+    configs = replication_configs(config, max_replications)
+    run = functools.partial(cached_run, cache=cache, refresh=refresh)
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    results:List[Dict[str, Any]] = []
+    try:
+        while len(results) < max_replications:
+            count = min_replications if not results else min(workers, max_replications - len(results))
+            batch = configs[len(results):len(results) + count]
+            results.extend(executor.map(run, batch) if executor is not None else map(run, batch))
+            summary = summarize(results, confidence)
+            missing = [metric for metric in metrics if metric not in summary]
+            if missing:
+                raise ValueError(f"Unknown metrics {missing}")
+            if all(is_precise(summary[metric]["mean"], summary[metric]["half_width"],
+                              relative_precision, absolute_precision) for metric in metrics):
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
+
+def main(argv:Optional[Sequence[str]]=None) -> Dict[str, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description="Run independent replications of the port scenario.")
+    parser.add_argument("--replications", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per core by default")
+    parser.add_argument("--seed", type=int, default=42, help="master seed of the replications")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--coarse", action="store_true", help="handle each hatch row as one crane timeout")
+    parser.add_argument("--cache", default=None, help="SQLite file or directory of the result cache, no cache if not given")
+    parser.add_argument("--refresh-cache", action="store_true", help="rerun cached replications and replace their results")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="stop adding replications once every --metric half width is within this share of its mean")
+    parser.add_argument("--metric", action="append", default=None, help="metric of the precision, turnaround.mean by default")
+    parser.add_argument("--min-replications", type=int, default=5)
+    args = parser.parse_args(argv)
+    if args.replications < 1:
+        parser.error("--replications must be at least 1")
+
+    config = ScenarioConfig(seed=args.seed, coarse_cranes=args.coarse)
+    cache = ResultCache(args.cache) if args.cache else None
+    if args.precision is not None:
+        results = run_replications_until(config, args.metric or ["turnaround.mean"], args.precision,
+                                         confidence=args.confidence, min_replications=args.min_replications,
+                                         max_replications=args.replications, workers=args.workers,
+                                         cache=cache, refresh=args.refresh_cache)
+    else:
+        results = run_replications(config, args.replications, args.workers, cache, args.refresh_cache)
+    summary = summarize(results, args.confidence)
+    print(f"{'metric':<40}{'mean':>14}{'+/-':>12}{'n':>5}")
+    for name, result in summary.items():
+        print(f"{name:<40}{result['mean']:>14.2f}{result['half_width']:>12.2f}{result['n']:>5}")
+    return summary
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import enum
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+import numpy as np
+from Scripts.Experiments.scenario import ScenarioConfig, run_scenario
+
+# Fields that do not change the results of a run and are left out of its key
+UNKEYED_FIELDS = ("log_path", "trace_path", "streaming_statistics")
+CACHE_FORMAT_VERSION:int = 1
+
+def _canonical(value:Any) -> Any:
+    """
+    Convert a configuration value to plain JSON types, in a form that does not depend on
+    the process: enums by name, NamedTuples as dictionaries, seed sequences by state.
+    """
+    if isinstance(value, enum.Enum):
+        return f"{type(value).__name__}.{value.name}"
+    if isinstance(value, np.random.SeedSequence):
+        return {"entropy": value.entropy, "spawn_key": list(value.spawn_key), "pool_size": value.pool_size}
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return {name: _canonical(field) for name, field in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(name): _canonical(item) for name, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    Return a digest of the simulation source code, so that results of older code are not reused.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if name != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, "rb") as source:
+                    digest.update(source.read())
+    return digest.hexdigest()
+
+def scenario_key(config:ScenarioConfig,
+                 version:Optional[str]=None) -> str:
+    """
+    Return the content address of a scenario: a digest of every field that affects its
+    results (berths, cranes, hatch profiles, yard layout, distributions, seed) and of the code.
+
+    @param config: the scenario configuration
+    @param version: code version, the digest of the source code if None
+    """
+    fields = {name: _canonical(value) for name, value in config._asdict().items() if name not in UNKEYED_FIELDS}
+    key = {"format": CACHE_FORMAT_VERSION, "code": version or code_version(), "config": fields}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+class ResultCache:
+    """
+    Results of scenario runs in a SQLite database, keyed by scenario_key.
+
+    The database runs in WAL mode, so worker processes can read while another one writes.
+    Every process opens its own connection. When the stored results exceed max_bytes, the
+    least recently used ones are evicted.
+    """
+    def __init__(self,
+                 path:str,
+                 max_bytes:int=256 * 1024 ** 2) -> None:
+        """
+        Constructor for the result cache
+
+        @param path: the SQLite file, or a directory to create cache.sqlite in
+        @param max_bytes: total size of the stored results kept by the eviction
+        """
+        if os.path.isdir(path) or path.endswith(os.sep):
+            os.makedirs(path, exist_ok=True)
+            path = os.path.join(path, "cache.sqlite")
+        self.path:str = path
+        self.max_bytes:int = max_bytes
+        self._connection:Optional[sqlite3.Connection] = None
+        self._pid:Optional[int] = None
+        self._connect()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Connections cannot be shared between processes, a worker opens its own
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state:Dict[str, Any]) -> None:
+        self.path = state["path"]
+        self.max_bytes = state["max_bytes"]
+        self._connection = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS results ("
+                               "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                               "created REAL NOT NULL, last_access REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key:str) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored results of a key, or None, and mark them as recently used.
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key:str, value:Dict[str, Any]) -> None:
+        """
+        Store the results of a key, replacing older ones, and evict the least recently used
+        results beyond max_bytes.
+        """
+        data = json.dumps(value)
+        now = time.time()
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("INSERT OR REPLACE INTO results (key, value, size, created, last_access) "
+                               "VALUES (?, ?, ?, ?, ?)", (key, data, len(data), now, now))
+            self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _evict(self, connection:sqlite3.Connection) -> None:
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM results ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+    def delete(self, key:str) -> None:
+        self._connect().execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM results")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+def cached_run(config:ScenarioConfig,
+               cache:Optional[ResultCache]=None,
+               refresh:bool=False) -> Dict[str, Any]:
+    """
+    Return the results of a scenario from the cache, running it only on a miss.
+
+    @param config: the scenario configuration
+    @param cache: the result cache, the scenario always runs if None
+    @param refresh: run the scenario even on a hit and replace the stored results
+    """
+    if cache is None:
+        return run_scenario(config)
+    key = scenario_key(config)
+    if not refresh:
+        results = cache.get(key)
+        if results is not None:
+            return results
+    results = run_scenario(config)
+    cache.put(key, results)
+    return results
@@ -0,0 +1,248 @@
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import simpy
+from Scripts.BerthPlanner.berth_planner import BerthPlanner
+from Scripts.Experiments.output_analysis import BatchMeansResult, StoppingRule, batch_means, is_precise
+from Scripts.BerthPlanner.vessel import HatchProfile, Vessel
+from Scripts.Statistics.random_streams import RandomStreams
+from Scripts.Statistics.time_generator import SeedLike
+from Scripts.Utils.containers import ContainerLocationRegistry
+from Scripts.Utils.event_trace import EventTrace, TextLogView
+from Scripts.Utils.log import Logger, is_quiet, set_quiet
+from Scripts.Utils.monitors import TimeWeightedMonitor
+from Scripts.Utils.port_objects_definition import *
+from Scripts.YardPlanner.yard_planner import YardPlanner
+
+class HatchRow(NamedTuple):
+    operation_type: ContainerHandling
+    container_type: ContainerType
+    container_size: ContainerSize
+    min_value: int
+    max_value: int
+
+class BlockLayout(NamedTuple):
+    name: str
+    capacity: int
+    num_bays: int
+    num_cells: int
+    num_tiers: int
+    storage: str = "list"  # key of BLOCK_STORAGES
+
+class ScenarioConfig(NamedTuple):
+    """
+    Everything needed to build and run one terminal scenario. The defaults are the
+    scenario of main.py: two vessels, one berth of capacity 2, two cranes and two blocks.
+    """
+    seed: SeedLike = 42
+    simulation_time: float = 1000000.0
+    berth_capacity: int = 2
+    quay_length: Optional[float] = None  # a continuous quay of this length in meters instead of the berth
+    num_cranes: int = 2
+    cranes_per_vessel: Optional[int] = None  # any cranes of the pool per vessel, every crane by name if None
+    crane_reach: Optional[float] = None  # largest distance from a crane to its vessel, unlimited if None
+    coarse_cranes: bool = False
+    streaming_statistics: bool = True  # cranes keep running statistics instead of every move time
+    # Crane move time distribution, a scipy name and its parameters
+    move_time_distribution: str = "norm"
+    move_time_params: Tuple[Tuple[str, float], ...] = (("loc", 200.0), ("scale", 25.0))
+    hatch_rows: Tuple[HatchRow, ...] = (
+        HatchRow(ContainerHandling.DISCHARGE, ContainerType.LADEN, ContainerSize.TWENTY_FT, 100, 120),
+        HatchRow(ContainerHandling.LOAD, ContainerType.LADEN, ContainerSize.FORTY_FT, 200, 220),
+    )
+    hatches_per_vessel: int = 2
+    arrival_times: Tuple[float, ...] = (10.0, 20.0)  # one vessel arrives at each time
+    pre_pcat: float = 1000.0
+    post_pcat: float = 1000.0
+    blocks: Tuple[BlockLayout, ...] = (
+        BlockLayout("Block1", 1000, 50, 6, 6),
+        BlockLayout("Block2", 1000, 50, 6, 6),
+    )
+    placement_rule: str = "first_fit"
+    container_mode: str = "object"
+    log_path: Optional[str] = None  # text log of the events, no text log if None
+    trace_path: Optional[str] = None  # directory of the event trace chunks, the events are not kept if None
+    stopping: Optional[StoppingRule] = None  # run to simulation_time if None
+
+class Scenario:
+    """
+    The simulation objects of a built scenario.
+    """
+    def __init__(self,
+                 config:ScenarioConfig,
+                 env:simpy.Environment,
+                 berth_planner:BerthPlanner,
+                 yard_planner:YardPlanner,
+                 vessels:List[Vessel],
+                 trace:EventTrace,
+                 logger:Optional[Logger]=None) -> None:
+        self.config:ScenarioConfig = config
+        self.env:simpy.Environment = env
+        self.berth_planner:BerthPlanner = berth_planner
+        self.yard_planner:YardPlanner = yard_planner
+        self.vessels:List[Vessel] = vessels
+        self.trace:EventTrace = trace
+        self.logger:Optional[Logger] = logger
+        self.output_analysis:Dict[str, BatchMeansResult] = {}
+
+    def kpi_monitors(self) -> Dict[str, Tuple[TimeWeightedMonitor, float]]:
+        """
+        Return the monitor of every KPI a stopping rule can use, with the factor that
+        scales the monitored value to the KPI.
+        """
+        berth = self.berth_planner.berth
+        monitors = {f"{berth.name}.utilization": (berth.busy_monitor, 1 / berth.capacity),
+                    f"{berth.name}.queue_length": (berth.queue_monitor, 1.0)}
+        for crane in self.berth_planner.cranes:
+            monitors[f"{crane.name}.utilization"] = (crane.busy_monitor, 1 / crane.capacity)
+            monitors[f"{crane.name}.queue_length"] = (crane.queue_monitor, 1.0)
+        for block in self.yard_planner.block_list:
+            monitors[f"{block.name}.occupancy"] = (block.occupancy_monitor, 1.0)
+        return monitors
+
+    def run(self) -> None:
+        self.berth_planner.process_arrivals()
+        if self.config.stopping is None:
+            self.env.run(until=self.config.simulation_time)
+        else:
+            self._run_until_precise(self.config.stopping)
+        self.trace.close()
+        if self.logger is not None:
+            self.logger.close()
+
+    def _run_until_precise(self,
+                           rule:StoppingRule) -> None:
+        """
+        Run in steps of rule.checkpoint_interval, recording the time average of every KPI
+        over each step, until the KPIs are precise enough or simulation_time is reached.
+        """
+        monitors = self.kpi_monitors()
+        unknown = [kpi for kpi in rule.kpis if kpi not in monitors]
+        if unknown:
+            raise ValueError(f"Unknown KPIs {unknown}, expected some of {sorted(monitors)}")
+        series:Dict[str, List[float]] = {kpi: [] for kpi in rule.kpis}
+        integrals = {kpi: monitors[kpi][0].integral() for kpi in rule.kpis}
+        while self.env.now < self.config.simulation_time:
+            start = self.env.now
+            self.env.run(until=min(start + rule.checkpoint_interval, self.config.simulation_time))
+            for kpi in rule.kpis:
+                monitor, scale = monitors[kpi]
+                integral = monitor.integral()
+                series[kpi].append((integral - integrals[kpi]) / (self.env.now - start) * scale)
+                integrals[kpi] = integral
+            checkpoints = len(series[rule.kpis[0]])
+            if checkpoints >= rule.min_checkpoints and checkpoints % rule.check_every == 0:
+                self.output_analysis = {kpi: batch_means(values, rule.num_batches, rule.confidence)
+                                        for kpi, values in series.items()}
+                if all(is_precise(result.mean, result.half_width, rule.relative_precision, rule.absolute_precision)
+                       for result in self.output_analysis.values()):
+                    return
+        self.output_analysis = {kpi: batch_means(values, rule.num_batches, rule.confidence)
+                                for kpi, values in series.items()}
+
+    def results(self) -> Dict[str, Any]:
+        """
+        Return the compact results of the run: one flat dictionary of metrics, plus the
+        per vessel times and per crane statistics they are computed from.
+        """
+        vessels = {vessel.name: {"berth_waiting": vessel.berth_waiting_time,
+                                 "turnaround": vessel.turnaround_time} for vessel in self.vessels}
+        cranes = {crane.name: crane.stats_collector.summary() for crane in self.berth_planner.cranes}
+        metrics:Dict[str, float] = {}
+        for name in ("berth_waiting", "turnaround"):
+            values = [times[name] for times in vessels.values() if times[name] is not None]
+            if values:
+                metrics[f"{name}.mean"] = float(np.mean(values))
+                metrics[f"{name}.max"] = float(np.max(values))
+        for crane_name, summary in cranes.items():
+            for key, stats in summary.items():
+                metrics[f"{crane_name}.{key}.count"] = float(stats["count"])
+                metrics[f"{crane_name}.{key}.average"] = float(stats["average"])
+        # Time-weighted KPIs over the whole run
+        berth = self.berth_planner.berth
+        metrics[f"{berth.name}.utilization"] = float(berth.utilization())
+        metrics[f"{berth.name}.average_queue_length"] = float(berth.average_queue_length())
+        for crane in self.berth_planner.cranes:
+            metrics[f"{crane.name}.utilization"] = float(crane.utilization())
+        for block in self.yard_planner.block_list:
+            metrics[f"{block.name}.average_occupancy"] = float(block.average_occupancy())
+        for kpi, result in self.output_analysis.items():
+            metrics[f"{kpi}.batch_mean"] = result.mean
+            metrics[f"{kpi}.half_width"] = result.half_width
+        metrics["run_time"] = float(self.env.now)
+        metrics["vessels_completed"] = float(sum(times["turnaround"] is not None for times in vessels.values()))
+        return {"metrics": metrics, "vessels": vessels, "cranes": cranes}
+
+def build_scenario(config:ScenarioConfig) -> Scenario:
+    """
+    Build the simulation objects of a scenario.
+
+    @param config: the scenario configuration
+    """
+    # The container registry is shared by the process, start every scenario from an empty one
+    ContainerLocationRegistry.clear()
+    streams = RandomStreams(config.seed)
+    logger = Logger(config.log_path) if config.log_path is not None else None
+    # Without a trace directory the trace only feeds the text log and keeps no events
+    trace = EventTrace(config.trace_path, text_view=TextLogView(logger=logger) if logger is not None else None)
+    env = simpy.Environment()
+
+    yard_planner = YardPlanner(env, config.placement_rule, config.container_mode)
+    for layout in config.blocks:
+        yard_planner.add_block(layout.capacity, layout.name, layout.storage)
+        yard_planner.get_block(layout.name).configure(layout.num_bays, layout.num_cells, layout.num_tiers)
+
+    berth_planner = BerthPlanner(env, yard_planner, logger, streams, trace,
+                                 crane_reach=config.crane_reach if config.crane_reach is not None else math.inf)
+    if config.quay_length is None:
+        berth_planner.add_berth("Berth1", capacity=config.berth_capacity)
+    else:
+        berth_planner.add_quay("Berth1", config.quay_length)
+    move_time_params = dict(config.move_time_params)
+    for index in range(config.num_cranes):
+        # Cranes start evenly spread along a quay
+        position = (index + 0.5) * config.quay_length / config.num_cranes if config.quay_length is not None else 0.0
+        berth_planner.add_crane(f"Crane{index + 1}", coarse=config.coarse_cranes,
+                                streaming_stats=config.streaming_statistics, position=position)
+        crane = berth_planner.cranes[-1]
+        crane.loading_time = streams.time_generator(f"{crane.name}.loading", config.move_time_distribution,
+                                                    **move_time_params)
+        crane.unloading_time = streams.time_generator(f"{crane.name}.unloading", config.move_time_distribution,
+                                                      **move_time_params)
+
+    hatch_profile = HatchProfile("Hatch_1")
+    for row in config.hatch_rows:
+        hatch_profile.add_row(*row)
+    berth_planner.add_hatch_profile(hatch_profile)
+
+    vessels = []
+    for index, arrival_time in enumerate(config.arrival_times):
+        vessel = berth_planner.add_vessel(f"Vessel{index + 1}")
+        for _ in range(config.hatches_per_vessel):
+            vessel.add_hatch_profile(hatch_profile)
+        berth_planner.add_to_schedule(vessel=vessel,
+                                      arrival_time=float(arrival_time),
+                                      berth_position=None,
+                                      cranes=berth_planner.cranes if config.cranes_per_vessel is None
+                                             else config.cranes_per_vessel,
+                                      prePcat=float(config.pre_pcat),
+                                      postPcat=float(config.post_pcat))
+        vessels.append(vessel)
+    return Scenario(config, env, berth_planner, yard_planner, vessels, trace, logger)
+
+def run_scenario(config:ScenarioConfig,
+                 quiet:bool=True) -> Dict[str, Any]:
+    """
+    Build and run a scenario and return its results.
+
+    @param config: the scenario configuration
+    @param quiet: silence the console output of the simulation during the run
+    """
+    scenario = build_scenario(config)
+    was_quiet = is_quiet()
+    set_quiet(quiet)
+    try:
+        scenario.run()
+    finally:
+        set_quiet(was_quiet)
+    return scenario.results()
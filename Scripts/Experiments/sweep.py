@@ -0,0 +1,257 @@
+"""
+Parameter sweeps over berth, crane, yard and arrival configurations.
+
+A design file is a JSON object with either a full factorial grid,
+    {"grid": {"berth_capacity": [1, 2], "num_cranes": [1, 2, 3]}}
+or a Latin hypercube over ranges,
+    {"lhs": {"num_bays": [20, 60], "arrival_interval": [500.0, 5000.0]}, "samples": 200, "seed": 1}
+and optionally "base", ScenarioConfig fields shared by every run, and "replications".
+Integer bounds give integer samples. The parameters are the scalar ScenarioConfig
+fields plus the derived ones of DERIVED_PARAMETERS and "move_time.<name>".
+
+Usage:
+    python -m Scripts.Experiments.sweep design.json results.jsonl [--workers N] [--replications 5]
+        [--cache results_cache/] [--refresh-cache]
+
+Every finished run is appended to the results file as one JSON line. Running the same
+command again skips the runs already in the file, so an interrupted sweep resumes.
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+import numpy as np
+from scipy.stats import qmc
+from Scripts.Experiments.scenario import ScenarioConfig
+from Scripts.Experiments.result_cache import ResultCache, cached_run, scenario_key
+from Scripts.Statistics.random_streams import RandomStreams
+
+# Parameters that are not ScenarioConfig fields, they are mapped onto the configuration by apply_parameters
+BLOCK_PARAMETERS:Tuple[str, ...] = ("num_bays", "num_cells", "num_tiers", "capacity")
+ARRIVAL_PARAMETERS:Tuple[str, ...] = ("num_vessels", "arrival_interval")
+DERIVED_PARAMETERS:Tuple[str, ...] = BLOCK_PARAMETERS + ARRIVAL_PARAMETERS
+SCALAR_FIELDS:Tuple[str, ...] = ("simulation_time", "berth_capacity", "quay_length", "num_cranes", "cranes_per_vessel",
+                                 "crane_reach", "coarse_cranes",
+                                 "move_time_distribution", "hatches_per_vessel", "pre_pcat", "post_pcat",
+                                 "placement_rule", "container_mode")
+MOVE_TIME_PREFIX:str = "move_time."
+
+class SweepRun(NamedTuple):
+    run_id: str
+    point: Dict[str, Any]
+    replication: int
+    config: ScenarioConfig
+
+def grid_design(space:Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Return every combination of the parameter values.
+
+    @param space: the values of each parameter
+    """
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def latin_hypercube_design(space:Dict[str, Tuple[float, float]],
+                           samples:int,
+                           seed:Optional[int]=None) -> List[Dict[str, Any]]:
+    """
+    Return a Latin hypercube sample of the parameter ranges. A parameter whose bounds are
+    both integers is sampled as an integer in [low, high].
+
+    @param space: the (low, high) bounds of each parameter
+    @param samples: number of points
+    @param seed: seed of the design
+    """
+    names = list(space)
+    unit = qmc.LatinHypercube(d=len(names), seed=seed).random(samples)
+    points = [dict() for _ in range(samples)]
+    for column, name in enumerate(names):
+        low, high = space[name]
+        if low > high:
+            raise ValueError(f"Lower bound of {name} is above its upper bound")
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.minimum(low + np.floor(unit[:, column] * (high - low + 1)), high).astype(int).tolist()
+        else:
+            values = (low + unit[:, column] * (high - low)).tolist()
+        for point, value in zip(points, values):
+            point[name] = value
+    return points
+
+def apply_parameters(config:ScenarioConfig,
+                     point:Dict[str, Any]) -> ScenarioConfig:
+    """
+    Return the configuration with the parameters of a design point applied.
+
+    Block parameters apply to every block. num_vessels and arrival_interval rebuild the
+    arrival schedule from the first arrival time, keeping the values not given.
+
+    @param config: the base configuration
+    @param point: parameter values by name
+    """
+    fields = {}
+    move_time_params = dict(config.move_time_params)
+    for name, value in point.items():
+        if name in SCALAR_FIELDS:
+            fields[name] = value
+        elif name.startswith(MOVE_TIME_PREFIX):
+            move_time_params[name[len(MOVE_TIME_PREFIX):]] = float(value)
+        elif name not in DERIVED_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter {name}, expected one of "
+                             f"{list(SCALAR_FIELDS + DERIVED_PARAMETERS)} or {MOVE_TIME_PREFIX}<name>")
+    fields["move_time_params"] = tuple(move_time_params.items())
+    block_fields = {name: int(point[name]) for name in BLOCK_PARAMETERS if name in point}
+    if block_fields:
+        fields["blocks"] = tuple(layout._replace(**block_fields) for layout in config.blocks)
+    if any(name in point for name in ARRIVAL_PARAMETERS):
+        arrivals = config.arrival_times
+        num_vessels = int(point.get("num_vessels", len(arrivals)))
+        interval = float(point.get("arrival_interval", arrivals[1] - arrivals[0] if len(arrivals) > 1 else 0.0))
+        first = float(arrivals[0]) if arrivals else 10.0
+        fields["arrival_times"] = tuple(first + index * interval for index in range(num_vessels))
+    return config._replace(**fields)
+
+def run_id(config:ScenarioConfig) -> str:
+    """
+    Return a stable id of a run, so that a resumed sweep recognises the runs it has done.
+    The id is the scenario key of the result cache: it covers the whole configuration the
+    point was applied to, the seed of the replication and the code, so a sweep resumed
+    with another base configuration, base seed or code runs again.
+
+    @param config: the configuration of the run, with its parameters and seed applied
+    """
+    return scenario_key(config)[:16]
+
+def expand_runs(base:ScenarioConfig,
+                points:List[Dict[str, Any]],
+                replications:int=1) -> Iterator[SweepRun]:
+    """
+    Yield the runs of a design. Replication r of every point uses the same seed, spawned
+    from the base seed, so that the points are compared with common random numbers.
+
+    @param base: configuration the parameters are applied to
+    @param points: the design points
+    @param replications: runs per point
+    """
+    seeds = RandomStreams(base.seed).spawn(replications)
+    for point in points:
+        config = apply_parameters(base, point)
+        for replication, seed in enumerate(seeds):
+            run_config = config._replace(seed=seed)
+            yield SweepRun(run_id(run_config), point, replication, run_config)
+
+def completed_runs(output_path:str) -> Set[str]:
+    """
+    Return the ids of the runs that finished successfully in a results file. A last line
+    cut by an interruption is ignored.
+    """
+    done:Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r") as output:
+        for line in output:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in record:
+                done.add(record["run_id"])
+    return done
+
+def execute_run(run:SweepRun,
+                cache:Optional[ResultCache]=None,
+                refresh:bool=False) -> Dict[str, Any]:
+    """
+    Run one point of the sweep, or read it from the cache, and return the record written to the results file.
+    """
+    record = {"run_id": run.run_id, "point": run.point, "replication": run.replication}
+    try:
+        record["metrics"] = cached_run(run.config, cache, refresh)["metrics"]
+    except Exception as error:
+        record["error"] = repr(error)
+    return record
+
+def run_sweep(base:ScenarioConfig,
+              points:List[Dict[str, Any]],
+              output_path:str,
+              replications:int=1,
+              workers:Optional[int]=None,
+              max_in_flight:Optional[int]=None,
+              cache:Optional[ResultCache]=None,
+              refresh:bool=False) -> int:
+    """
+    Run every point of a design in a process pool and append each finished run to a JSON
+    lines file. Runs already in the file are skipped, runs that failed are tried again.
+
+    Only max_in_flight runs are submitted at a time, so the memory held by pending
+    futures stays bounded whatever the size of the design.
+
+    @param base: configuration the parameters are applied to
+    @param points: the design points
+    @param output_path: the JSON lines results file
+    @param replications: runs per point
+    @param workers: worker processes, one per core if None
+    @param max_in_flight: runs submitted at a time, twice the number of workers if None
+    @param cache: result cache shared by the workers, every run executes if None
+    @param refresh: execute cached runs again and replace their stored results
+
+    returns the number of runs executed
+    """
+    done = completed_runs(output_path)
+    pending_runs = (run for run in expand_runs(base, points, replications) if run.run_id not in done)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    executed = 0
+    with open(output_path, "a+") as output, ProcessPoolExecutor(max_workers=workers) as executor:
+        if output.tell():
+            # Terminate a line cut by an interruption, so it cannot swallow the next record
+            output.seek(output.tell() - 1)
+            if output.read(1) != "\n":
+                output.write("\n")
+        in_flight:Set[Future] = set()
+        for run in itertools.chain(pending_runs, [None]):
+            if run is not None:
+                in_flight.add(executor.submit(execute_run, run, cache, refresh))
+            while in_flight and (run is None or len(in_flight) >= max_in_flight):
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    output.write(json.dumps(future.result()) + "\n")
+                    executed += 1
+                output.flush()
+    return executed
+
+def load_design(design:Dict[str, Any]) -> Tuple[ScenarioConfig, List[Dict[str, Any]]]:
+    """
+    Return the base configuration and the points of a design file.
+    """
+    base_fields = dict(design.get("base", {}))
+    base = apply_parameters(ScenarioConfig(seed=base_fields.pop("seed", 42)), base_fields)
+    if "grid" in design:
+        return base, grid_design(design["grid"])
+    if "lhs" in design:
+        space = {name: tuple(bounds) for name, bounds in design["lhs"].items()}
+        return base, latin_hypercube_design(space, design["samples"], design.get("seed"))
+    raise ValueError("The design needs a grid or an lhs section")
+
+def main(argv:Optional[Sequence[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of the port scenario.")
+    parser.add_argument("design", help="JSON design file")
+    parser.add_argument("output", help="JSON lines results file, appended to and resumed from")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per core by default")
+    parser.add_argument("--replications", type=int, default=None, help="runs per point, overrides the design")
+    parser.add_argument("--cache", default=None, help="SQLite file or directory of the result cache, no cache if not given")
+    parser.add_argument("--refresh-cache", action="store_true", help="rerun cached runs and replace their results")
+    args = parser.parse_args(argv)
+
+    with open(args.design, "r") as design_file:
+        design = json.load(design_file)
+    base, points = load_design(design)
+    replications = args.replications or design.get("replications", 1)
+    cache = ResultCache(args.cache) if args.cache else None
+    executed = run_sweep(base, points, args.output, replications, args.workers, cache=cache, refresh=args.refresh_cache)
+    print(f"{executed} runs executed, {len(points) * replications} in the design")
+    return executed
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Synthetic vessel traffic for load tests of the simulator.
+
+The whole arrival stream is drawn with NumPy in one pass: arrival times of a Poisson or
+seasonal Poisson process, the size class of every vessel, its number of hatches and the
+hatch profile of every hatch. Hatches share a few HatchProfile templates per size class,
+so fifty thousand calls need only a few dozen profiles. The traffic feeds the berth
+planner lazily through process_arrivals, through the existing add_vessel/add_to_schedule
+calls, or is written to a schedule file.
+"""
+import math
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from Scripts.BerthPlanner.arrival_source import ScheduledArrival, write_schedule
+from Scripts.BerthPlanner.berth_planner import BerthPlanner
+from Scripts.BerthPlanner.vessel import HatchProfile, Vessel
+from Scripts.Statistics.time_generator import SeedLike
+from Scripts.Utils.port_objects_definition import *
+
+class VesselClass(NamedTuple):
+    """
+    A size class of vessels and the work of their hatches.
+
+    share: weight of the class among the arrivals
+    hatches: least and most hatches of a vessel
+    moves_per_hatch: least and most container moves of a hatch template
+    load_share: share of the moves of a hatch that are loads
+    mix: container type, size and weight of each kind of container moved
+    spread: share of the moves of a row that the crane may leave out, the row is
+            min_value = (1 - spread) * moves to max_value = moves
+    num_cranes: number of any cranes of the crane pool per vessel, all the cranes by name if 0
+    """
+    name: str
+    share: float
+    length: float
+    width: float
+    hatches: Tuple[int, int]
+    moves_per_hatch: Tuple[int, int]
+    load_share: float = 0.5
+    mix: Tuple[Tuple[ContainerType, ContainerSize, float], ...] = (
+        (ContainerType.LADEN, ContainerSize.TWENTY_FT, 0.35),
+        (ContainerType.LADEN, ContainerSize.FORTY_FT, 0.5),
+        (ContainerType.EMPTY, ContainerSize.TWENTY_FT, 0.05),
+        (ContainerType.EMPTY, ContainerSize.FORTY_FT, 0.1),
+    )
+    spread: float = 0.1
+    pre_pcat: float = 1000.0
+    post_pcat: float = 1000.0
+    num_cranes: int = 0
+
+DEFAULT_VESSEL_CLASSES:Tuple[VesselClass, ...] = (
+    VesselClass("Feeder", 0.45, 150.0, 23.0, (2, 4), (20, 60), load_share=0.5),
+    VesselClass("Panamax", 0.35, 290.0, 32.0, (4, 8), (40, 120), load_share=0.45),
+    VesselClass("PostPanamax", 0.15, 366.0, 49.0, (8, 14), (80, 200), load_share=0.4),
+    VesselClass("ULCV", 0.05, 400.0, 61.0, (14, 22), (100, 260), load_share=0.4),
+)
+
+class Traffic(NamedTuple):
+    """
+    A generated arrival stream as arrays, one entry per vessel in arrival order. The
+    hatch profiles of vessel i are templates[hatch_templates[hatch_offsets[i]:hatch_offsets[i + 1]]].
+    """
+    classes: Tuple[VesselClass, ...]
+    templates: List[HatchProfile]
+    arrival_times: np.ndarray
+    vessel_classes: np.ndarray
+    hatch_offsets: np.ndarray
+    hatch_templates: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.arrival_times)
+
+    def arrivals(self,
+                 prefix:str="Vessel") -> Iterator[ScheduledArrival]:
+        """
+        Yield the arrivals lazily, for BerthPlanner.process_arrivals or write_schedule.
+        The vessels are served by num_cranes of their class, or by all the cranes of the planner.
+        """
+        names = [template.name for template in self.templates]
+        classes = self.classes
+        offsets = self.hatch_offsets.tolist()
+        hatch_templates = self.hatch_templates.tolist()
+        for index, (arrival_time, class_index) in enumerate(zip(self.arrival_times.tolist(), self.vessel_classes.tolist())):
+            vessel_class = classes[class_index]
+            yield ScheduledArrival(vessel=f"{prefix}{index + 1}",
+                                   arrival_time=arrival_time,
+                                   num_cranes=vessel_class.num_cranes,
+                                   hatch_profiles=tuple(names[template] for template in hatch_templates[offsets[index]:offsets[index + 1]]),
+                                   pre_pcat=vessel_class.pre_pcat,
+                                   post_pcat=vessel_class.post_pcat,
+                                   length=vessel_class.length,
+                                   width=vessel_class.width)
+
+    def add_hatch_profiles(self,
+                           berth_planner:BerthPlanner) -> None:
+        """
+        Add the templates to the planner, the arrivals refer to them by name.
+        """
+        for template in self.templates:
+            berth_planner.add_hatch_profile(template)
+
+    def add_to_schedule(self,
+                        berth_planner:BerthPlanner,
+                        prefix:str="Vessel") -> List[Vessel]:
+        """
+        Create every vessel now through add_vessel and add_to_schedule, as main.py does.
+        Streaming the arrivals through process_arrivals needs far less memory.
+
+        returns the vessels
+        """
+        vessels = []
+        hatch_templates = self.hatch_templates.tolist()
+        offsets = self.hatch_offsets.tolist()
+        for index, arrival in enumerate(self.arrivals(prefix)):
+            vessel = berth_planner.add_vessel(arrival.vessel, arrival.length, arrival.width)
+            for template in hatch_templates[offsets[index]:offsets[index + 1]]:
+                vessel.add_hatch_profile(self.templates[template])
+            berth_planner.add_to_schedule(vessel=vessel,
+                                          arrival_time=arrival.arrival_time,
+                                          berth_position=arrival.berth_position,
+                                          cranes=arrival.num_cranes or berth_planner.cranes,
+                                          prePcat=arrival.pre_pcat,
+                                          postPcat=arrival.post_pcat)
+            vessels.append(vessel)
+        return vessels
+
+    def write(self,
+              path:str,
+              prefix:str="Vessel") -> None:
+        """
+        Write the traffic as a .csv schedule file.
+        """
+        write_schedule(path, self.arrivals(prefix))
+
+def _arrival_times(rng:np.random.Generator,
+                   num_vessels:Optional[int],
+                   horizon:Optional[float],
+                   mean_interarrival:float,
+                   seasonal_amplitude:float,
+                   seasonal_period:float,
+                   start_time:float) -> np.ndarray:
+    """
+    Arrival times of a Poisson process, seasonal if seasonal_amplitude > 0: its rate is
+    (1 + amplitude * sin(2 pi t / period)) / mean_interarrival. The seasonal process is
+    drawn by thinning a Poisson process at the peak rate.
+    """
+    peak = 1 + seasonal_amplitude
+    expected = num_vessels if num_vessels is not None else horizon / mean_interarrival
+    times = np.empty(0)
+    last = start_time
+    while True:
+        # Draw the gaps in batches a little larger than needed, rarely more than one
+        batch = int(expected * peak * 1.1) + 16
+        candidates = last + np.cumsum(rng.exponential(mean_interarrival / peak, batch))
+        last = candidates[-1]
+        if seasonal_amplitude > 0:
+            rate = 1 + seasonal_amplitude * np.sin(2 * math.pi * (candidates - start_time) / seasonal_period)
+            candidates = candidates[rng.random(batch) * peak < rate]
+        times = np.concatenate((times, candidates))
+        if horizon is not None and last >= start_time + horizon:
+            times = times[times < start_time + horizon]
+            break
+        if num_vessels is not None and len(times) >= num_vessels:
+            break
+    return times[:num_vessels] if num_vessels is not None else times
+
+def _hatch_templates(rng:np.random.Generator,
+                     classes:Tuple[VesselClass, ...],
+                     templates_per_class:int) -> List[HatchProfile]:
+    templates = []
+    for vessel_class in classes:
+        weights = np.array([weight for _, _, weight in vessel_class.mix], dtype=float)
+        moves = rng.integers(vessel_class.moves_per_hatch[0], vessel_class.moves_per_hatch[1], templates_per_class,
+                             endpoint=True)
+        loads = rng.binomial(moves, vessel_class.load_share)
+        # Moves of every template split by operation and container kind, one row per nonzero split
+        splits = {ContainerHandling.DISCHARGE: rng.multinomial(moves - loads, weights / weights.sum()),
+                  ContainerHandling.LOAD: rng.multinomial(loads, weights / weights.sum())}
+        for index in range(templates_per_class):
+            template = HatchProfile(f"{vessel_class.name}_Hatch{index + 1}")
+            for operation, split in splits.items():
+                for (container_type, container_size, _), count in zip(vessel_class.mix, split[index].tolist()):
+                    if count > 0:
+                        template.add_row(operation, container_type, container_size,
+                                         int(math.floor(count * (1 - vessel_class.spread))), count)
+            templates.append(template)
+    return templates
+
+def generate_traffic(num_vessels:Optional[int]=None,
+                     horizon:Optional[float]=None,
+                     mean_interarrival:float=3600.0,
+                     classes:Tuple[VesselClass, ...]=DEFAULT_VESSEL_CLASSES,
+                     seasonal_amplitude:float=0.0,
+                     seasonal_period:float=7 * 24 * 3600.0,
+                     templates_per_class:int=8,
+                     start_time:float=0.0,
+                     seed:SeedLike=None) -> Traffic:
+    """
+    Generate an arrival stream.
+
+    @param num_vessels: number of vessels, or all the arrivals before the horizon if None
+    @param horizon: length of the arrival period after start_time, used if num_vessels is None
+    @param mean_interarrival: mean time between arrivals, in seconds
+    @param classes: the vessel size classes
+    @param seasonal_amplitude: relative amplitude in [0, 1) of the arrival rate, a Poisson process if 0
+    @param seasonal_period: period of the seasonal arrival rate, in seconds
+    @param templates_per_class: hatch profile templates shared by the vessels of a class
+    @param start_time: time of the start of the arrival process
+    @param seed: seed or SeedSequence of the traffic, e.g. RandomStreams.seed_for("traffic")
+    """
+    if (num_vessels is None) == (horizon is None):
+        raise ValueError("Give either num_vessels or horizon")
+    if not 0 <= seasonal_amplitude < 1:
+        raise ValueError("seasonal_amplitude must be in [0, 1)")
+    if mean_interarrival <= 0 or templates_per_class < 1:
+        raise ValueError("mean_interarrival and templates_per_class must be positive")
+    rng = np.random.default_rng(seed)
+    templates = _hatch_templates(rng, classes, templates_per_class)
+    arrival_times = _arrival_times(rng, num_vessels, horizon, mean_interarrival, seasonal_amplitude,
+                                   seasonal_period, start_time)
+    count = len(arrival_times)
+
+    shares = np.array([vessel_class.share for vessel_class in classes], dtype=float)
+    vessel_classes = rng.choice(len(classes), size=count, p=shares / shares.sum()).astype(np.int16)
+    least = np.array([vessel_class.hatches[0] for vessel_class in classes])
+    most = np.array([vessel_class.hatches[1] for vessel_class in classes])
+    num_hatches = rng.integers(least[vessel_classes], most[vessel_classes], endpoint=True)
+    hatch_offsets = np.concatenate(([0], np.cumsum(num_hatches)))
+    hatch_classes = np.repeat(vessel_classes, num_hatches)
+    hatch_templates = (hatch_classes * templates_per_class
+                       + rng.integers(0, templates_per_class, len(hatch_classes))).astype(np.int32)
+    return Traffic(tuple(classes), templates, arrival_times, vessel_classes, hatch_offsets, hatch_templates)
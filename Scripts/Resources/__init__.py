@@ -1 +1,2 @@
-from .resources import Berth, Crane
\ No newline at end of file
+from .resources import Berth, Crane, Quay, QuayRequest, QuayRelease
+from .crane_pool import CranePool, CraneGrant
\ No newline at end of file
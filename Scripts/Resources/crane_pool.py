@@ -0,0 +1,217 @@
+import math
+from collections import deque
+from itertools import count
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+import simpy
+from Scripts.Resources.resources import Crane
+from Scripts.Utils.basic_data_structures import RankedTreap
+
+class CraneGrant(simpy.Event):
+    """
+    Request of one crane from a CranePool: a given crane, or any crane within reach of a
+    position. The event is triggered with the crane once it is granted, crane_request is
+    then the crane's own request, to be given back with CranePool.release.
+    """
+    def __init__(self,
+                 pool:"CranePool",
+                 name:Optional[str]=None,
+                 position:Optional[float]=None,
+                 reach:float=math.inf) -> None:
+        """
+        @param name: the crane, any crane if None
+        @param position: position the crane must reach, anywhere if None
+        @param reach: largest distance from the crane to the position
+        """
+        super().__init__(pool.env)
+        self.pool:CranePool = pool
+        self.name:Optional[str] = name
+        self.position:Optional[float] = position
+        self.reach:float = reach
+        self.sequence:int = next(pool._sequence)
+        self.crane:Optional[Crane] = None
+        self.crane_request:Optional[simpy.resources.resource.Request] = None
+        pool._request(self)
+
+    def in_reach(self,
+                 crane:Crane) -> bool:
+        return self.position is None or abs(crane.position - self.position) <= self.reach
+
+    def cancel(self) -> None:
+        """ Withdraw the request if it is still waiting. """
+        if not self.triggered:
+            self.pool._cancel(self)
+
+class CranePool:
+    """
+    The quay cranes of a terminal, indexed by name and by the position of the idle ones.
+
+    Every crane is handed out by the pool and given back to it, so a crane that finishes
+    its share of a vessel's work goes straight to the earliest waiting request it can
+    serve, the same vessel or another one. A request for a given crane finds it by name,
+    a request for any crane takes the idle crane nearest to its position, found in a
+    treap of the idle cranes by position. Waiting requests are kept per crane, in one
+    queue for the requests without a position, and in a treap per reach for the others,
+    keyed by position and ranked by sequence. A freed crane serves the earliest of the
+    first one waiting for it and the first one waiting for any crane in its reach, which
+    is the request of smallest sequence in the window [position - reach, position + reach]
+    of every reach. All of it is O(log n) expected in the number of cranes and requests,
+    times the number of distinct reaches.
+    """
+    def __init__(self,
+                 env:simpy.Environment) -> None:
+        self.env:simpy.Environment = env
+        self.cranes:Dict[str, Crane] = {}
+        self._idle:RankedTreap = RankedTreap()  # the idle cranes by (position, name)
+        self._idle_keys:Dict[str, Tuple[float, str]] = {}
+        self._waiting_for:Dict[str, Deque[CraneGrant]] = {}
+        self._waiting_anywhere:Dict[CraneGrant, None] = {}  # requests without a position, in order, with O(1) removal
+        self._waiting_any:Dict[float, RankedTreap] = {}  # the others by reach, by (position, sequence)
+        self._sequence:Iterator[int] = count()
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.cranes
+
+    def __len__(self) -> int:
+        return len(self.cranes)
+
+    def add(self,
+            crane:Crane) -> None:
+        """
+        Add an idle crane to the pool, at crane.position.
+        """
+        if crane.name in self.cranes:
+            raise ValueError(f"The pool has a crane {crane.name} already")
+        self.cranes[crane.name] = crane
+        crane.pool = self
+        self._crane_freed(crane)
+
+    @property
+    def idle(self) -> List[Crane]:
+        """ The idle cranes, by position. """
+        return [crane for _, crane in self._idle]
+
+    def request(self,
+                name:str) -> CraneGrant:
+        """
+        Request the crane with the given name.
+        """
+        if name not in self.cranes:
+            raise ValueError(f"Unknown crane {name}")
+        return CraneGrant(self, name=name)
+
+    def request_any(self,
+                    k:int,
+                    position:Optional[float]=None,
+                    reach:float=math.inf) -> List[CraneGrant]:
+        """
+        Request k cranes, each any crane within reach of the position. The cranes are
+        granted one by one, as they become free.
+
+        @param k: number of cranes
+        @param position: position on the quay, such as the middle of the vessel, anywhere if None
+        @param reach: largest distance from a crane to the position
+        """
+        return [CraneGrant(self, position=position, reach=reach) for _ in range(k)]
+
+    def release(self,
+                crane:Crane,
+                crane_request:simpy.resources.resource.Request) -> None:
+        """
+        Give a granted crane back to the pool.
+        """
+        crane.release(crane_request)
+        self._crane_freed(crane)
+
+    def _request(self,
+                 grant:CraneGrant) -> None:
+        if grant.name is not None:
+            if grant.name in self._idle_keys and not self._waiting_for.get(grant.name):
+                self._grant(grant, self.cranes[grant.name])
+            else:
+                self._waiting_for.setdefault(grant.name, deque()).append(grant)
+            return
+        crane = self._nearest_idle(grant)
+        if crane is not None:
+            self._grant(grant, crane)
+        elif grant.position is None:
+            self._waiting_anywhere[grant] = None
+        else:
+            waiting = self._waiting_any.get(grant.reach)
+            if waiting is None:
+                waiting = self._waiting_any[grant.reach] = RankedTreap()
+            waiting.add((grant.position, grant.sequence), grant, grant.sequence)
+
+    def _nearest_idle(self,
+                      grant:CraneGrant) -> Optional[Crane]:
+        if not self._idle:
+            return None
+        if grant.position is None:
+            return self._idle.first()[1]
+        candidates = [entry for entry in self._idle.neighbours((grant.position,)) if entry is not None]
+        (position, _), crane = min(candidates, key=lambda entry: abs(entry[0][0] - grant.position))
+        return crane if abs(position - grant.position) <= grant.reach else None
+
+    def _first_any(self,
+                   crane:Crane) -> Optional[CraneGrant]:
+        """ The earliest request for any crane that the crane can serve. """
+        first = next(iter(self._waiting_anywhere), None)
+        for reach, waiting in self._waiting_any.items():
+            entry = waiting.min_rank((crane.position - reach,), (crane.position + reach, math.inf))
+            if entry is not None and (first is None or entry[1].sequence < first.sequence):
+                first = entry[1]
+        return first
+
+    def _withdraw_any(self,
+                      grant:CraneGrant) -> None:
+        if grant.position is None:
+            self._waiting_anywhere.pop(grant, None)
+            return
+        waiting = self._waiting_any.get(grant.reach)
+        if waiting is None:
+            return
+        try:
+            waiting.remove((grant.position, grant.sequence))
+        except KeyError:
+            return
+        if not waiting:
+            del self._waiting_any[grant.reach]
+
+    def _grant(self,
+               grant:CraneGrant,
+               crane:Crane) -> None:
+        self._idle.remove(self._idle_keys.pop(crane.name))
+        grant.crane = crane
+        grant.crane_request = crane.request()
+        if grant.position is not None:
+            crane.position = grant.position
+        grant.succeed(crane)
+
+    def _crane_freed(self,
+                     crane:Crane) -> None:
+        key = (crane.position, crane.name)
+        self._idle_keys[crane.name] = key
+        self._idle.add(key, crane)
+        named = self._waiting_for.get(crane.name)
+        first_named = named[0] if named else None
+        first_any = self._first_any(crane)
+        if first_named is None and first_any is None:
+            return
+        if first_any is None or (first_named is not None and first_named.sequence < first_any.sequence):
+            named.popleft()
+            if not named:
+                del self._waiting_for[crane.name]
+            self._grant(first_named, crane)
+        else:
+            self._withdraw_any(first_any)
+            self._grant(first_any, crane)
+
+    def _cancel(self,
+                grant:CraneGrant) -> None:
+        if grant.name is None:
+            self._withdraw_any(grant)
+            return
+        named = self._waiting_for.get(grant.name)
+        if named and grant in named:
+            named.remove(grant)
+            if not named:
+                del self._waiting_for[grant.name]
@@ -1,12 +1,19 @@
 from typing import List, Any, Optional, Dict, Tuple
+from operator import attrgetter
 import simpy
+from simpy.core import BoundClass
+from simpy.resources.base import BaseResource, Put, Get
 from Scripts.Utils.basic_objects import Resource
+from Scripts.Utils.basic_data_structures import FirstFitQueue, IntervalTreap
+from Scripts.Utils.monitors import TimeWeightedMonitor
 from Scripts.Utils.port_objects_definition import *
 from Scripts.YardPlanner.yard_planner import *
 from Scripts.Statistics.time_generator import RandomTimeGenerator
+from Scripts.Statistics.random_streams import DEFAULT_SEED, RandomStreams
 from Scripts.Statistics.statistics_collector import StatsCollector
-from Scripts.Utils.log import Logger
-import random
+from Scripts.Utils.log import Logger, console
+from Scripts.Utils.event_trace import EventKind, EventTrace, TextLogView
+import numpy as np
 
 class Berth(Resource):
     """
@@ -20,9 +27,148 @@ class Berth(Resource):
         self.name = name
         self.occupied_by:List[Any] = []
 
+    def request_for(self,
+                    vessel:Any) -> simpy.resources.resource.Request:
+        """ Request a place for the vessel, any of the capacity. """
+        return self.request()
+
     def __str__(self):
         return f"This berth object name is {self.name}"
     
+class QuayRequest(Put):
+    """
+    Request of a quay segment of the given length. The event is triggered once the
+    segment is reserved, its place on the quay is then start.
+    """
+    def __init__(self,
+                 quay:"Quay",
+                 length:float,
+                 position:Optional[float]=None) -> None:
+        """
+        @param length: length of the segment, the vessel length plus any clearance
+        @param position: preferred start of the segment, the first free place if None
+        """
+        if not 0 < length <= quay.length:
+            raise ValueError(f"A segment of {length} does not fit the quay {quay.name} of {quay.length}")
+        self.length:float = length
+        self.position:Optional[float] = position
+        self.start:Optional[float] = None
+        super().__init__(quay)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> Optional[bool]:
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not GeneratorExit:
+            self.resource.release(self)
+        return None
+
+class QuayRelease(Get):
+    """
+    Release of the segment of a quay request, or withdrawal of a waiting request.
+    """
+    def __init__(self,
+                 quay:"Quay",
+                 request:QuayRequest) -> None:
+        self.request:QuayRequest = request
+        super().__init__(quay)
+
+class Quay(BaseResource):
+    """
+    A continuous quay on which vessels berth next to each other. Every vessel reserves
+    a contiguous segment by its length, as near as possible to its preferred position.
+    The free segments are kept in an IntervalTreap, so finding a fit, reserving it and
+    releasing it are O(log n) in the number of free segments.
+
+    Requests that do not fit wait in the order they are made. When a segment is
+    released, the earliest waiting request no longer than the longest free segment
+    berths, found in O(log n) by a FirstFitQueue: a shorter vessel may berth ahead of a
+    longer one that still does not fit, unless overtaking is False.
+
+    The quay can replace a Berth: request_for, release, users, occupied_by,
+    utilization and average_queue_length work alike, with the capacity in meters.
+    """
+    def __init__(self,
+                 name:str,
+                 env:simpy.Environment,
+                 length:float,
+                 overtaking:bool=True) -> None:
+        """
+        @param name: name of the quay
+        @param length: length of the quay in meters
+        @param overtaking: let a waiting vessel that fits berth before earlier ones that do not
+        """
+        super().__init__(env, length)
+        self.put_queue:FirstFitQueue = FirstFitQueue(attrgetter("length"))
+        self.name:str = name
+        self.length:float = length
+        self.overtaking:bool = overtaking
+        self.free:IntervalTreap = IntervalTreap()
+        self.free.add(0.0, length)
+        self.users:Dict[QuayRequest, None] = {}  # granted requests, in order, with O(1) removal
+        self.occupied_by:List[Any] = []
+        self.busy_monitor:TimeWeightedMonitor = TimeWeightedMonitor(env)  # meters of quay occupied
+        self.queue_monitor:TimeWeightedMonitor = TimeWeightedMonitor(env)
+
+    request = BoundClass(QuayRequest)
+    release = BoundClass(QuayRelease)
+
+    def request_for(self,
+                    vessel:Any) -> QuayRequest:
+        """
+        Request the segment of a vessel, by its length and its berth position in meters.
+        """
+        position = getattr(vessel, "berth_position", None)
+        return self.request(vessel.length, float(position) if position is not None else None)
+
+    def _do_put(self,
+                event:QuayRequest) -> bool:
+        start = self.free.take(event.length, event.position)
+        if start is None:
+            return self.overtaking
+        event.start = start
+        self.users[event] = None
+        self.busy_monitor.change(event.length)
+        event.succeed()
+        return True
+
+    def _do_get(self,
+                event:QuayRelease) -> bool:
+        request = event.request
+        if request in self.users:
+            del self.users[request]
+            self.free.add(request.start, request.start + request.length)
+            self.busy_monitor.change(-request.length)
+        else:
+            request.cancel()
+        event.succeed()
+        return True
+
+    def _trigger_put(self, get_event:Optional[Get]) -> None:
+        # Any request no longer than the longest free segment fits, nearest to its position
+        while self.put_queue:
+            event = self.put_queue.first_fit(self.free.max_length) if self.overtaking else self.put_queue.first()
+            if event is None or event.length > self.free.max_length:
+                break
+            self.put_queue.remove(event)
+            self._do_put(event)
+        self.queue_monitor.set(len(self.put_queue))
+
+    def _trigger_get(self, put_event:Optional[Put]) -> None:
+        super()._trigger_get(put_event)
+        self.queue_monitor.set(len(self.put_queue))
+
+    def utilization(self,
+                    time:Optional[float]=None) -> float:
+        """ Time-averaged share of the quay length occupied, up to time or env.now. """
+        return self.busy_monitor.mean(time) / self.length
+
+    def average_queue_length(self,
+                             time:Optional[float]=None) -> float:
+        """ Time-averaged number of waiting vessels, up to time or env.now. """
+        return self.queue_monitor.mean(time)
+
+    def __str__(self):
+        return f"This quay object name is {self.name}"
+
 class Crane(Resource):
     """
     This class represents a crane object. It's simpy resource
@@ -32,17 +178,38 @@ class Crane(Resource):
                  env:simpy.Environment,
                  yard_planner:YardPlanner,
                  logger:Logger,
-                 capacity:int=1) -> None:
+                 capacity:int=1,
+                 streams:Optional[RandomStreams]=None,
+                 coarse:bool=False,
+                 trace:Optional[EventTrace]=None,
+                 streaming_stats:bool=False,
+                 position:float=0.0) -> None:
+        """
+        @param streams: source of the crane's random streams, streams of DEFAULT_SEED if None
+        @param trace: trace of the crane events, a trace logging to logger if None
+        @param coarse: handle each hatch row as one aggregated timeout instead of one timeout
+                       per move, whenever no other process needs to see the moves one by one
+        @param streaming_stats: keep only running statistics of the move times, not every move time
+        @param position: position of the crane along the quay
+        """
         super().__init__(env, capacity)
+        streams = streams if streams is not None else RandomStreams(DEFAULT_SEED)
         self.env = env
         self.name = name
         self.vessel:Any = None
+        self.position:float = position
+        self.pool:Any = None  # the CranePool that hands the crane out, if any
         self.truck_gang:Any = None
         self.yard_planner = yard_planner
-        self.stats_collector:StatsCollector = StatsCollector()
+        self.coarse:bool = coarse
+        self.stats_collector:StatsCollector = StatsCollector(streaming=streaming_stats,
+                                                                 seed=streams.seed_for(f"{name}.stats"))
         self.logger:Logger = logger
-        self._loading_time:RandomTimeGenerator = RandomTimeGenerator("norm", loc=200, scale=25)
-        self._unloading_time:RandomTimeGenerator = RandomTimeGenerator("norm", loc=200, scale=25)
+        self.trace:EventTrace = trace if trace is not None else EventTrace(text_view=TextLogView(logger=logger))
+        self.trace_code:int = self.trace.name_code(name)
+        self.rng:np.random.Generator = streams.generator(f"{name}.containers")
+        self._loading_time:RandomTimeGenerator = streams.time_generator(f"{name}.loading", "norm", loc=200, scale=25)
+        self._unloading_time:RandomTimeGenerator = streams.time_generator(f"{name}.unloading", "norm", loc=200, scale=25)
 
     @property
     def loading_time(self) -> RandomTimeGenerator:
@@ -69,56 +236,142 @@ class Crane(Resource):
     def process_hatch_profiles(self, 
                                vessel:Any) -> None:
         self.vessel = vessel
-        if len(vessel.hatch_profiles)>0:
-            for _ in vessel.hatch_profiles:
-                # Assuming hatch is a tuple (min_containers, max_containers)
-                hatch = vessel.hatch_profiles.pop()
-                for row in hatch.rows:
-                    min_containers, max_containers = row["min_value"], row["max_value"]
-                    num_containers = random.randint(min_containers, max_containers)
-
-                    if row["operation_type"] == ContainerHandling.DISCHARGE:
-                        container_type = row["container_type"]
-                        container_size = row["container_size"]
-                        for _ in range(num_containers):
-                            container_created = self.yard_planner.container_factory.create_container(
-                                container_type,
-                                container_size
+        vessel_code = self.trace.name_code(vessel.name)
+        # The cranes of the vessel share its hatches, each takes the next one of its side when it is free
+        hatch_queue = vessel.hatch_queue
+        hatch = hatch_queue.take(self)
+        while hatch is not None:
+            for row in hatch.profile.rows:
+                min_containers, max_containers = row["min_value"], row["max_value"]
+                num_containers = int(self.rng.integers(min_containers, max_containers, endpoint=True))
+
+                if row["operation_type"] == ContainerHandling.DISCHARGE:
+                    container_type = row["container_type"]
+                    container_size = row["container_size"]
+                    batch = self.yard_planner.container_factory.create_batch(
+                        container_type,
+                        container_size,
+                        num_containers,
+                        from_interface=CTInterface.VESSEL_INTERFACE,
+                        to_interface=CTInterface.YARD_INTERFACE
+                    )
+                    if self.can_coarsen():
+                        yield from self._discharge_row_coarse(vessel, batch)
+                        continue
+                    for container_created in batch:
+                        delay_time = self.unloading_time.next()
+                        self.stats_collector.add_item("Unloading Time", delay_time)
+                        yield self.env.timeout(delay_time)  
+                        console("%s moved a container from %s at %s", self.name, vessel.name, self.env.now)
+                        block, bay, cell = self.yard_planner.container_placement_rule.find_placement_by_bay(
+                            self.yard_planner.block_list, 
+                            container_created
                             )
-                            container_created.from_interface = CTInterface.VESSEL_INTERFACE
-                            container_created.to_interface = CTInterface.YARD_INTERFACE
-                            delay_time = self.unloading_time.generate()[0]
-                            self.stats_collector.add_item("Unloading Time", delay_time)
-                            yield self.env.timeout(delay_time)  
-                            self.logger.log(f"{self.name} spent {delay_time/60} minutes to move a {container_created}")
-                            self.logger.log(f"{self.name} moved a container from {vessel.name} at {self.env.now}")
-                            print(f"{self.name} moved a container from {vessel.name} at {self.env.now}")
-                            block, bay, cell = self.yard_planner.container_placement_rule.find_placement_by_bay(
-                                self.yard_planner.block_list, 
-                                container_created
-                                )
-                            self.yard_planner.yard_place_container(
-                                container_created, 
-                                block, 
-                                bay, 
-                                cell
-                                )
-                    elif row["operation_type"] == ContainerHandling.LOAD:
-                        for _ in range(num_containers):
-                            delay_time = self.loading_time.generate()[0]
-                            self.stats_collector.add_item("Loading Time", delay_time)
-                            yield self.env.timeout(delay_time)
-                            self.logger.log(f"{self.name} spent {delay_time/60} minutes to move a {container_created}")
-                            self.logger.log(f"{self.name} moved a container from {vessel.name} at {self.env.now}")
-                            print(f"{self.name} moved a container from {vessel.name} at {self.env.now}")
-                #self.yard_planner.visualize_multiple_blocks_updating()
-                vessel.finished_hatches += 1
-                vessel.finished_hatch_profiles.append(hatch)
-                self.logger.log(f'{self.name} finished a hatch and moving on to next, if any')
-        print(f"No more hatches left, {self.name} has completed all tasks for {vessel.name} at {self.env.now}")
-        self.logger.log(f"No more hatches left, {self.name} has completed all tasks for {vessel.name} at {self.env.now}")
+                        self.yard_planner.yard_place_container(
+                            container_created, 
+                            block, 
+                            bay, 
+                            cell
+                            )
+                        self.trace.record(EventKind.CONTAINER_DISCHARGED, self.env.now, vessel_code, self.trace_code,
+                                          container=container_created, duration=delay_time)
+                elif row["operation_type"] == ContainerHandling.LOAD:
+                    if self.can_coarsen():
+                        yield from self._load_row_coarse(vessel, num_containers)
+                        continue
+                    for _ in range(num_containers):
+                        delay_time = self.loading_time.next()
+                        self.stats_collector.add_item("Loading Time", delay_time)
+                        yield self.env.timeout(delay_time)
+                        self.trace.record(EventKind.CONTAINER_LOADED, self.env.now, vessel_code, self.trace_code,
+                                          duration=delay_time)
+                        console("%s moved a container from %s at %s", self.name, vessel.name, self.env.now)
+            #self.yard_planner.visualize_multiple_blocks_updating()
+            vessel.finished_hatches += 1
+            vessel.finished_hatch_profiles.append(hatch.profile)
+            hatch_queue.done(hatch)
+            self.trace.record(EventKind.HATCH_FINISHED, self.env.now, vessel_code, self.trace_code)
+            hatch = hatch_queue.take(self)
+        console("No more hatches left, %s has completed all tasks for %s at %s", self.name, vessel.name, self.env.now)
+        self.trace.record(EventKind.CRANE_FINISHED, self.env.now, vessel_code, self.trace_code)
         vessel.release_cranes(self)
 
+    def can_coarsen(self) -> bool:
+        """
+        Whether the next hatch row can be handled as one aggregated timeout. It falls back to
+        one event per move when trucks serve the crane or the yard has observers or waiting
+        retrievals, since those need to see every move at its own time.
+        """
+        return self.coarse and self.truck_gang is None and not self.yard_planner.needs_move_events()
+
+    def _move_end_times(self,
+                        move_times:np.ndarray) -> np.ndarray:
+        """
+        Return the end time of every move of a row. The times are accumulated one by one,
+        like consecutive timeouts advance env.now, so they match the per-move mode exactly.
+        """
+        return np.cumsum(np.concatenate(([self.env.now], move_times)))[1:]
+
+    def _delay_until(self,
+                     time:float) -> float:
+        """
+        Return the delay of a timeout that fires exactly at time, undoing the rounding of now + delay.
+        """
+        now = self.env.now
+        delay = time - now
+        while now + delay < time:
+            delay = np.nextafter(delay, np.inf)
+        while now + delay > time:
+            delay = np.nextafter(delay, -np.inf)
+        return float(delay)
+
+    def _discharge_row_coarse(self,
+                              vessel:Any,
+                              batch:List[Any]) -> None:
+        """
+        Discharge a row with one timeout, then log the moves and place the containers in
+        order, each with the time of its own move.
+        """
+        if not batch:
+            return
+        move_times = self.unloading_time.take(len(batch))
+        end_times = self._move_end_times(move_times)
+        self.stats_collector.add_items("Unloading Time", move_times.tolist())
+        yield self.env.timeout(self._delay_until(end_times[-1]))
+        vessel_code = self.trace.name_code(vessel.name)
+        for container_created, delay_time, end_time in zip(batch, move_times.tolist(), end_times.tolist()):
+            console("%s moved a container from %s at %s", self.name, vessel.name, end_time)
+            block, bay, cell = self.yard_planner.container_placement_rule.find_placement_by_bay(
+                self.yard_planner.block_list,
+                container_created
+                )
+            self.yard_planner.yard_place_container(
+                container_created,
+                block,
+                bay,
+                cell,
+                end_time
+                )
+            self.trace.record(EventKind.CONTAINER_DISCHARGED, end_time, vessel_code, self.trace_code,
+                              container=container_created, duration=delay_time)
+
+    def _load_row_coarse(self,
+                         vessel:Any,
+                         num_containers:int) -> None:
+        """
+        Load a row with one timeout, then log the moves with the time of each one.
+        """
+        if not num_containers:
+            return
+        move_times = self.loading_time.take(num_containers)
+        end_times = self._move_end_times(move_times)
+        self.stats_collector.add_items("Loading Time", move_times.tolist())
+        yield self.env.timeout(self._delay_until(end_times[-1]))
+        vessel_code = self.trace.name_code(vessel.name)
+        for delay_time, end_time in zip(move_times.tolist(), end_times.tolist()):
+            self.trace.record(EventKind.CONTAINER_LOADED, end_time, vessel_code, self.trace_code, duration=delay_time)
+            console("%s moved a container from %s at %s", self.name, vessel.name, end_time)
+
     def move_containers(self,
                         yard_planner:YardPlanner,
                         vessel:Any) -> None:
@@ -1,2 +1,5 @@
 from .time_generator import RandomTimeGenerator
+from .empirical_time_generator import EmpiricalTimeGenerator
+from .random_streams import RandomStreams
+from .streaming_statistics import StreamingStatistics, TDigest, Reservoir
 from .statistics_collector import StatsCollector
\ No newline at end of file
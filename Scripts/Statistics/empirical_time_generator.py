@@ -0,0 +1,94 @@
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from Scripts.Statistics.time_generator import RandomTimeGenerator, SeedLike
+
+class EmpiricalTimeGenerator(RandomTimeGenerator):
+    """
+    Random time generator that resamples observed times through a precomputed alias table.
+
+    Each draw costs one uniform integer and one uniform float whatever the number of
+    distinct observations, so sampling stays O(1) even for tables built from millions of
+    logged moves. It can replace any RandomTimeGenerator, e.g. Crane.loading_time.
+    """
+    def __init__(self,
+                 samples: Sequence[float],
+                 bins: Optional[int] = None,
+                 block_size: int = 1024,
+                 seed: SeedLike = None) -> None:
+        """
+        Build the alias table of the empirical distribution.
+
+        Args:
+            samples (Sequence[float]): The observed times.
+            bins (int, optional): Group the samples into this many equal width bins and draw
+                uniformly inside the chosen bin. Without bins every distinct observed value
+                is an outcome of its own.
+            block_size (int): Number of samples pre-drawn each time the internal pool runs empty.
+            seed (int, SeedSequence or Generator, optional): Seed of the generator's own stream.
+        """
+        samples = np.asarray(samples, dtype=float)
+        if samples.size == 0:
+            raise ValueError("An empirical distribution needs at least one sample")
+        # The base class sets up the stream and the pool, _draw replaces its sampler
+        super().__init__("uniform", block_size=block_size, seed=seed)
+        self.distribution = "empirical"
+        self.params = {"bins": bins}
+        self.distribution_function = None
+
+        if bins is None:
+            self.values, counts = np.unique(samples, return_counts=True)
+            self.widths:Optional[np.ndarray] = None
+        else:
+            counts, edges = np.histogram(samples, bins=bins)
+            keep = counts > 0
+            self.values = edges[:-1][keep]
+            self.widths = np.diff(edges)[keep]
+            counts = counts[keep]
+        self.probabilities, self.aliases = self.build_alias_table(counts / counts.sum())
+        self.num_samples:int = int(samples.size)
+        self.mean:float = float(samples.mean())
+
+    @staticmethod
+    def build_alias_table(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build the Vose alias table of a discrete distribution.
+
+        Args:
+            weights (np.ndarray): Probabilities of the outcomes, summing to one.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Acceptance probability and alias outcome of every column.
+        """
+        n = len(weights)
+        scaled = np.asarray(weights, dtype=float) * n
+        probabilities = np.ones(n)
+        aliases = np.arange(n)
+        small = np.flatnonzero(scaled < 1.0).tolist()
+        large = np.flatnonzero(scaled >= 1.0).tolist()
+        scaled = scaled.tolist()
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            probabilities[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # Columns left in either list are full up to rounding error and keep probability one
+        return probabilities, aliases
+
+    def _draw(self,
+              rng: np.random.Generator,
+              size: int) -> np.ndarray:
+        """ Draw size samples with the alias method. """
+        columns = rng.integers(0, len(self.values), size)
+        accept = rng.random(size) < self.probabilities[columns]
+        outcomes = np.where(accept, columns, self.aliases[columns])
+        if self.widths is None:
+            return self.values[outcomes]
+        return self.values[outcomes] + rng.random(size) * self.widths[outcomes]
+
+    def __str__(self):
+        return f"Empirical time generator over {self.num_samples} samples with mean {self.mean}"
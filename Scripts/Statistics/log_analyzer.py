@@ -0,0 +1,224 @@
+"""
+Streaming analysis of text logs written by Logger.
+
+Every file is read memory-mapped, one window of chunk_size bytes at a time, and scanned
+by a single compiled pattern, so a log of any size is analyzed in bounded memory. Files
+are analyzed in parallel, one worker process per file. Each file is one simulation run.
+
+Usage:
+    python -m Scripts.Statistics.log_analyzer log_files/*.log [--workers N] [--output summary.npz]
+"""
+import argparse
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+NUMBER = rb"([-+0-9.eE]+)"
+NAME = rb"(\S+)"
+# Every message follows the level of the line, so the scan jumps from one "INFO: " to the
+# next and tries the alternatives once per line. The outer group of each alternative names
+# the event; its inner groups are the names and the time.
+EVENT_PATTERN = re.compile(
+    rb"INFO: (?:"
+    rb"(?P<move>" + NAME + rb" moved a container from " + NAME + rb" at " + NUMBER + rb")"
+    rb"|(?P<arrived>The " + NAME + rb" is arrived at " + NUMBER + rb")"
+    rb"|(?P<pre_start>The " + NAME + rb" started the pre-inspection at " + NUMBER + rb")"
+    rb"|(?P<pre_end>The " + NAME + rb" finished the pre-inspection at " + NUMBER + rb")"
+    rb"|(?P<operation>The " + NAME + rb" is started the operation at " + NUMBER + rb")"
+    rb"|(?P<released>The " + NAME + rb" is released from the " + NAME + rb" at " + NUMBER + rb")"
+    rb"|(?P<post_start>The " + NAME + rb" starts the post_pcat inspection at " + NUMBER + rb")"
+    rb"|(?P<post_end>The " + NAME + rb" finished the post_pcat inspection at " + NUMBER + rb")"
+    rb"|(?P<departed>" + NAME + rb" has completed (?:all tasks|and left berth) for " + NAME + rb" at " + NUMBER + rb")"
+    rb")")
+
+# Columns of the vessel times, in the order of VESSEL_DTYPE after the vessel code
+VESSEL_EVENTS:Tuple[str, ...] = ("arrived", "pre_start", "pre_end", "operation", "post_start", "post_end", "departed")
+VESSEL_DTYPE = np.dtype([("vessel", np.int32)] + [(name, np.float64) for name in VESSEL_EVENTS])
+CRANE_DTYPE = np.dtype([("crane", np.int32), ("vessel", np.int32), ("moves", np.int64), ("first_move", np.float64),
+                        ("last_move", np.float64), ("released", np.float64), ("moves_per_hour", np.float64)])
+BERTH_DTYPE = np.dtype([("berth", np.int32), ("vessel", np.int32), ("start", np.float64), ("end", np.float64)])
+
+class LogSummary(NamedTuple):
+    """
+    Compact results of one log file. Vessels, cranes and berths are codes into names.
+
+    vessels: one row per vessel with the time of each of VESSEL_EVENTS, nan if not logged
+    cranes: one row per crane and vessel served, with the number of moves, the first and
+            last move, the release and the moves per hour from the start of the operation
+            of the vessel to the release of the crane
+    berths: one occupancy interval per vessel, from the start of its pre-inspection to its departure
+    """
+    path: str
+    names: List[str]
+    vessels: np.ndarray
+    cranes: np.ndarray
+    berths: np.ndarray
+
+    def vessel_durations(self) -> Dict[str, np.ndarray]:
+        """
+        Return the pre-inspection, post-inspection and turnaround times of the vessels.
+        """
+        vessels = self.vessels
+        return {"pre_inspection": vessels["pre_end"] - vessels["pre_start"],
+                "post_inspection": vessels["post_end"] - vessels["post_start"],
+                "turnaround": vessels["departed"] - vessels["arrived"]}
+
+    def crane_productivity(self) -> Dict[str, Tuple[int, float]]:
+        """
+        Return the total moves and the overall moves per hour of each crane.
+        """
+        productivity = {}
+        for code in np.unique(self.cranes["crane"]):
+            rows = self.cranes[self.cranes["crane"] == code]
+            hours = np.nansum(rows["moves"] / rows["moves_per_hour"])
+            moves = int(rows["moves"].sum())
+            productivity[self.names[code]] = (moves, moves / hours if hours > 0 else float("nan"))
+        return productivity
+
+def iter_windows(path:str,
+                 chunk_size:int=64 * 1024 ** 2) -> Iterator[Tuple[mmap.mmap, int, int]]:
+    """
+    Map a file one window at a time. Every window covers whole lines: the lines that start
+    in [start, end) of the window, about chunk_size bytes.
+
+    @param path: the file
+    @param chunk_size: bytes of lines per window, a longer line gets a window of its own
+
+    returns an iterator of (window, start, end), the window is closed on the next step
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as log_file:
+        position = 0
+        while position < size:
+            offset = position - position % mmap.ALLOCATIONGRANULARITY
+            start = position - offset
+            length = min(size - offset, start + chunk_size)
+            while True:
+                window = mmap.mmap(log_file.fileno(), length, access=mmap.ACCESS_READ, offset=offset)
+                end = length if offset + length == size else window.rfind(b"\n", start) + 1
+                if end > start:
+                    break
+                window.close()
+                length = min(size - offset, 2 * length)
+            try:
+                yield window, start, end
+            finally:
+                window.close()
+            position = offset + end
+
+def analyze_log(path:str,
+                chunk_size:int=64 * 1024 ** 2) -> LogSummary:
+    """
+    Analyze one log file.
+
+    The scan keeps names and times as the bytes of the log; they are decoded and coded
+    once per vessel or crane when the arrays are built.
+
+    @param path: the log file
+    @param chunk_size: bytes mapped at a time
+    """
+    vessels:Dict[bytes, Dict[str, bytes]] = {}
+    cranes:Dict[Tuple[bytes, bytes], list] = {}  # moves, first move, last move, release
+    departures:List[Tuple[bytes, bytes]] = []  # berth and vessel of every departure
+
+    for window, start, end in iter_windows(path, chunk_size):
+        for match in EVENT_PATTERN.finditer(window, start, end):
+            event = match.lastgroup
+            if event == "move":
+                crane, vessel, time = match.group(2, 3, 4)
+                moves = cranes.get((crane, vessel))
+                if moves is None:
+                    cranes[(crane, vessel)] = [1, time, time, None]
+                else:
+                    moves[0] += 1
+                    moves[2] = time
+                continue
+            first = match.lastindex + 1
+            if event == "released":
+                crane, vessel, time = match.group(first, first + 1, first + 2)
+                cranes.setdefault((crane, vessel), [0, None, None, None])[3] = time
+            elif event == "departed":
+                berth, vessel, time = match.group(first, first + 1, first + 2)
+                vessels.setdefault(vessel, {})[event] = time
+                departures.append((berth, vessel))
+            else:
+                vessel, time = match.group(first, first + 1)
+                vessels.setdefault(vessel, {})[event] = time
+
+    codes:Dict[bytes, int] = {}
+    def code(name:bytes) -> int:
+        return codes.setdefault(name, len(codes))
+    def seconds(time:Optional[bytes]) -> float:
+        return float(time) if time is not None else float("nan")
+
+    vessel_rows = np.array([(code(vessel),) + tuple(seconds(times.get(event)) for event in VESSEL_EVENTS)
+                            for vessel, times in vessels.items()], dtype=VESSEL_DTYPE)
+    crane_rows = []
+    for (crane, vessel), (moves, first_move, last_move, released) in cranes.items():
+        hours = (seconds(released) - seconds(vessels.get(vessel, {}).get("operation"))) / 3600
+        crane_rows.append((code(crane), code(vessel), moves, seconds(first_move), seconds(last_move),
+                           seconds(released), moves / hours if hours > 0 else float("nan")))
+    crane_rows = np.array(crane_rows, dtype=CRANE_DTYPE)
+    berth_rows = np.array([(code(berth), code(vessel), seconds(vessels[vessel].get("pre_start")),
+                            seconds(vessels[vessel]["departed"])) for berth, vessel in departures], dtype=BERTH_DTYPE)
+    names = [name.decode(errors="replace") for name in codes]
+    return LogSummary(path, names, vessel_rows, crane_rows, berth_rows)
+
+def analyze_logs(paths:Sequence[str],
+                 workers:Optional[int]=None,
+                 chunk_size:int=64 * 1024 ** 2) -> List[LogSummary]:
+    """
+    Analyze log files in parallel, one worker process per file.
+
+    @param paths: the log files
+    @param workers: worker processes, one per core if None. With 1 the files are analyzed in this process.
+    @param chunk_size: bytes mapped at a time by each worker
+
+    returns the summaries, in the order of paths
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [analyze_log(path, chunk_size) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(analyze_log, paths, [chunk_size] * len(paths)))
+
+def save_summaries(summaries:Sequence[LogSummary],
+                   output_path:str) -> None:
+    """
+    Save the summaries as one .npz archive: the arrays of file i are f<i>_vessels,
+    f<i>_cranes, f<i>_berths and f<i>_names, and paths lists the files.
+    """
+    arrays = {"paths": np.array([summary.path for summary in summaries])}
+    for index, summary in enumerate(summaries):
+        arrays[f"f{index}_names"] = np.array(summary.names)
+        arrays[f"f{index}_vessels"] = summary.vessels
+        arrays[f"f{index}_cranes"] = summary.cranes
+        arrays[f"f{index}_berths"] = summary.berths
+    np.savez_compressed(output_path, **arrays)
+
+def main(argv:Optional[Sequence[str]]=None) -> List[LogSummary]:
+    parser = argparse.ArgumentParser(description="Summarize crane, vessel and berth activity of log files.")
+    parser.add_argument("logs", nargs="+", help="log files to read")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per core by default")
+    parser.add_argument("--chunk-mb", type=int, default=64, help="megabytes mapped at a time")
+    parser.add_argument("--output", default=None, help=".npz file to save the arrays of every log")
+    args = parser.parse_args(argv)
+
+    summaries = analyze_logs(args.logs, args.workers, args.chunk_mb * 1024 ** 2)
+    for summary in summaries:
+        durations = summary.vessel_durations()
+        print(f"{summary.path}: {len(summary.vessels)} vessels, {int(summary.cranes['moves'].sum())} moves")
+        for crane, (moves, per_hour) in sorted(summary.crane_productivity().items()):
+            print(f"    {crane}: {moves} moves, {per_hour:.2f} moves per hour")
+        for name in ("pre_inspection", "post_inspection", "turnaround"):
+            if np.isfinite(durations[name]).any():
+                print(f"    {name}: mean {np.nanmean(durations[name]):.2f}, max {np.nanmax(durations[name]):.2f}")
+    if args.output:
+        save_summaries(summaries, args.output)
+    return summaries
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Fit crane move time distributions from simulation or terminal log files.
+
+Usage:
+    python -m Scripts.Statistics.log_fitting log_files/*.log [--bins 200]
+"""
+import argparse
+import re
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import scipy.stats as stats
+from Scripts.Statistics.time_generator import RandomTimeGenerator, SeedLike
+from Scripts.Statistics.empirical_time_generator import EmpiricalTimeGenerator
+from Scripts.Statistics.random_streams import RandomStreams
+
+CRANE_MOVE_PATTERN = re.compile(r"(\S+) moved a container from (\S+) at ([-+0-9.eE]+)")
+CANDIDATE_DISTRIBUTIONS:Tuple[str, ...] = ("norm", "expon", "gamma", "lognorm")
+
+class FitResult:
+    """
+    Parameters and goodness of fit of one candidate distribution.
+    """
+    def __init__(self,
+                 distribution:str,
+                 params:Dict[str, float],
+                 ks_statistic:float,
+                 log_likelihood:float) -> None:
+        self.distribution:str = distribution
+        self.params:Dict[str, float] = params
+        self.ks_statistic:float = ks_statistic
+        self.log_likelihood:float = log_likelihood
+
+    def to_generator(self,
+                     seed:SeedLike=None,
+                     block_size:int=1024) -> RandomTimeGenerator:
+        """
+        Return a RandomTimeGenerator sampling the fitted distribution.
+
+        @param seed: seed or SeedSequence of the generator's stream
+        @param block_size: number of samples pre-drawn at a time
+        """
+        return RandomTimeGenerator(self.distribution, block_size=block_size, seed=seed, **self.params)
+
+    def __str__(self):
+        params = ", ".join(f"{name}={value:.4g}" for name, value in self.params.items())
+        return f"{self.distribution}({params}) KS={self.ks_statistic:.4f} logL={self.log_likelihood:.1f}"
+
+def iter_crane_moves(log_paths:Iterable[str]) -> Iterator[Tuple[int, str, str, float]]:
+    """
+    Stream the crane moves recorded in the log files, one line at a time.
+
+    @param log_paths: paths of the log files
+
+    returns an iterator of (file index, crane name, vessel name, simulation time)
+    """
+    for file_index, path in enumerate(log_paths):
+        with open(path, "r", errors="replace") as log_file:
+            for line in log_file:
+                match = CRANE_MOVE_PATTERN.search(line)
+                if match:
+                    yield file_index, match.group(1), match.group(2), float(match.group(3))
+
+def extract_inter_move_times(log_paths:Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Extract the time between consecutive moves of each crane on the same vessel.
+
+    The first move of a crane on a vessel has no predecessor and is skipped, so
+    idle time between vessels never enters the samples.
+
+    @param log_paths: paths of the log files
+
+    returns a dictionary of inter-move times keyed by crane name
+    """
+    last_move:Dict[Tuple[int, str, str], float] = {}
+    samples:Dict[str, array] = {}
+    for file_index, crane, vessel, time in iter_crane_moves(log_paths):
+        key = (file_index, crane, vessel)
+        previous = last_move.get(key)
+        if previous is not None:
+            samples.setdefault(crane, array("d")).append(time - previous)
+        last_move[key] = time
+    return {crane: np.frombuffer(values, dtype=float) for crane, values in samples.items()}
+
+def fit_distributions(samples:Sequence[float],
+                      candidates:Sequence[str]=CANDIDATE_DISTRIBUTIONS) -> List[FitResult]:
+    """
+    Fit candidate scipy distributions by maximum likelihood.
+
+    @param samples: observed times
+    @param candidates: scipy names of the distributions to try
+
+    returns the fits that succeeded, best Kolmogorov-Smirnov statistic first
+    """
+    samples = np.asarray(samples, dtype=float)
+    results:List[FitResult] = []
+    for name in candidates:
+        distribution = getattr(stats, name)
+        try:
+            fitted = distribution.fit(samples)
+        except (ValueError, RuntimeError, FloatingPointError):
+            continue
+        names = [shape.strip() for shape in distribution.shapes.split(",")] if distribution.shapes else []
+        params = dict(zip(names + ["loc", "scale"], (float(value) for value in fitted)))
+        if not params["scale"] > 0:
+            continue
+        ks_statistic = float(stats.kstest(samples, name, args=fitted).statistic)
+        log_likelihood = float(np.sum(distribution.logpdf(samples, *fitted)))
+        results.append(FitResult(name, params, ks_statistic, log_likelihood))
+    results.sort(key=lambda result: result.ks_statistic)
+    return results
+
+def build_crane_time_generators(log_paths:Iterable[str],
+                                bins:Optional[int]=None,
+                                seed:Union[None, int, np.random.SeedSequence, RandomStreams]=None) -> Dict[str, EmpiricalTimeGenerator]:
+    """
+    Build an empirical move time generator for every crane found in the logs.
+
+    The logs do not tell loads from discharges apart, so the generator fits both
+    Crane.loading_time and Crane.unloading_time.
+
+    @param log_paths: paths of the log files
+    @param bins: number of histogram bins, every distinct time is kept if None
+    @param seed: master seed or the RandomStreams of the scenario; each crane gets the stream
+                 named "<crane>.moves", whatever other cranes the logs contain
+    """
+    streams = seed if isinstance(seed, RandomStreams) else RandomStreams(seed)
+    return {crane: EmpiricalTimeGenerator(times, bins=bins, seed=streams.seed_for(f"{crane}.moves"))
+            for crane, times in sorted(extract_inter_move_times(log_paths).items())}
+
+def main(argv:Optional[Sequence[str]]=None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Fit crane move time distributions from log files.")
+    parser.add_argument("logs", nargs="+", help="log files to read")
+    parser.add_argument("--bins", type=int, default=None, help="histogram bins of the empirical distribution")
+    parser.add_argument("--candidates", nargs="+", default=list(CANDIDATE_DISTRIBUTIONS),
+                        help="scipy distributions to fit")
+    args = parser.parse_args(argv)
+
+    report:Dict[str, Any] = {}
+    for crane, times in sorted(extract_inter_move_times(args.logs).items()):
+        fits = fit_distributions(times, args.candidates)
+        empirical = EmpiricalTimeGenerator(times, bins=args.bins)
+        report[crane] = {"samples": len(times), "fits": fits, "empirical": empirical}
+        print(f"{crane}: {len(times)} inter-move times, mean {times.mean():.2f}, std {times.std():.2f}")
+        for fit in fits:
+            print(f"    {fit}")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import hashlib
+from typing import Any, Dict, List, Union
+import numpy as np
+from Scripts.Statistics.time_generator import RandomTimeGenerator
+
+# Master seed of the entities built without streams, so that they stay reproducible
+DEFAULT_SEED:int = 42
+
+class RandomStreams:
+    """
+    Hands out independent random streams derived from one master seed.
+
+    Every simulated entity asks for its stream by name. The child SeedSequence of a
+    name is built like SeedSequence.spawn builds its children, but with a spawn key
+    derived from the name instead of a running counter. A crane therefore gets the
+    same stream whatever else the scenario contains, which keeps common random number
+    comparisons between scenario variants synchronised.
+    """
+    def __init__(self,
+                 seed:Union[None, int, np.random.SeedSequence]=None) -> None:
+        """
+        Constructor for the random streams
+
+        @param seed: master seed, an integer or a SeedSequence (e.g. one spawned for a replication)
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence:np.random.SeedSequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self._children:Dict[str, np.random.SeedSequence] = {}
+
+    @staticmethod
+    def _name_key(name:str) -> int:
+        # Python's hash() is salted per process, a digest keeps keys stable between runs.
+        return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+    def seed_for(self,
+                 name:str) -> np.random.SeedSequence:
+        """
+        Return the child SeedSequence of the named stream.
+
+        @param name: name of the stream, e.g. "Crane1.loading"
+        """
+        child = self._children.get(name)
+        if child is None:
+            child = np.random.SeedSequence(self.seed_sequence.entropy,
+                                           spawn_key=self.seed_sequence.spawn_key + (self._name_key(name),),
+                                           pool_size=self.seed_sequence.pool_size)
+            self._children[name] = child
+        return child
+
+    def generator(self,
+                  name:str) -> np.random.Generator:
+        """
+        Return a new numpy Generator on the named stream.
+
+        @param name: name of the stream
+        """
+        return np.random.default_rng(self.seed_for(name))
+
+    def time_generator(self,
+                       name:str,
+                       distribution:str='norm',
+                       **params:Any) -> RandomTimeGenerator:
+        """
+        Return a RandomTimeGenerator drawing from the named stream.
+
+        @param name: name of the stream
+        @param distribution: scipy name of the distribution
+        @param params: distribution parameters and RandomTimeGenerator options
+        """
+        return RandomTimeGenerator(distribution, seed=self.seed_for(name), **params)
+
+    def spawn(self,
+              n:int) -> List[np.random.SeedSequence]:
+        """
+        Spawn n independent master seeds, one for each replication.
+
+        @param n: number of seeds to spawn
+        """
+        return self.seed_sequence.spawn(n)
@@ -1,39 +1,140 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import Iterable, List, Dict, Any, Optional, Union
+import numpy as np
+from Scripts.Statistics.random_streams import RandomStreams
+from Scripts.Statistics.streaming_statistics import StreamingStatistics
 
 class StatsCollector:
-    def __init__(self):
+    def __init__(self,
+                 streaming:bool=False,
+                 compression:float=100.0,
+                 reservoir_size:int=0,
+                 seed:Union[None, int, np.random.SeedSequence]=None):
+        """
+        Constructor of the statistics collector. Every key keeps running statistics, so the
+        queries answer in O(1). Without streaming the values are kept as well.
+
+        @param streaming: keep only the running statistics, a fixed memory per key
+        @param compression: compression of the t-digest of the quantiles
+        @param reservoir_size: size of the random sample kept per key for histograms, none if 0
+        @param seed: master seed of the reservoir sampling, every key samples its own stream
+        """
+        self.streaming:bool = streaming
+        self.compression:float = compression
+        self.reservoir_size:int = reservoir_size
+        self.seed:Union[None, int, np.random.SeedSequence] = seed
+        self._streams:RandomStreams = RandomStreams(seed)
         self.data:Dict[str,List[Union[int, float]]] = {}
+        self.statistics:Dict[str, StreamingStatistics] = {}
+
+    def _statistics(self,
+                    key) -> StreamingStatistics:
+        statistics = self.statistics.get(key)
+        if statistics is None:
+            statistics = self.statistics[key] = StreamingStatistics(self.compression, self.reservoir_size,
+                                                                               self._streams.seed_for(str(key)))
+        return statistics
 
-    def add_item(self, 
-                 key, 
+    def add_item(self,
+                 key,
                  value):
-        """ Add a value to a list under the given key in the dictionary. """
-        if key not in self.data:
-            self.data[key] = []
-        self.data[key].append(value)
+        """ Add a value under the given key. """
+        self._statistics(key).add(value)
+        if not self.streaming:
+            if key not in self.data:
+                self.data[key] = []
+            self.data[key].append(value)
+
+    def add_items(self,
+                  key,
+                  values):
+        """ Add several values under the given key. """
+        self._statistics(key).add_many(values)
+        if not self.streaming:
+            self.data.setdefault(key, []).extend(values)
 
-    def retrieve_items(self, 
+    def retrieve_items(self,
                        key):
-        """ Retrieve all values for a given key. """
+        """ Retrieve all values for a given key, or its reservoir sample when streaming. """
+        if self.streaming:
+            statistics = self.statistics.get(key)
+            return statistics.sample() if statistics is not None else []
         return self.data.get(key, [])
 
-    def total(self, 
+    def count(self,
+              key):
+        """ Number of values for a given key. """
+        statistics = self.statistics.get(key)
+        return statistics.count if statistics is not None else 0
+
+    def total(self,
               key):
         """ Calculate the total of the values for a given key. """
-        return sum(self.data.get(key, []))
+        statistics = self.statistics.get(key)
+        return statistics.total if statistics is not None else 0
 
-    def min(self, 
+    def min(self,
             key):
         """ Find the minimum value for a given key. """
-        return min(self.data.get(key, []), default=None)
+        statistics = self.statistics.get(key)
+        return statistics.min if statistics is not None else None
 
-    def max(self, 
+    def max(self,
             key):
         """ Find the maximum value for a given key. """
-        return max(self.data.get(key, []), default=None)
+        statistics = self.statistics.get(key)
+        return statistics.max if statistics is not None else None
 
-    def average(self, 
+    def average(self,
                 key):
         """ Calculate the average of the values for a given key. """
-        values = self.data.get(key, [])
-        return sum(values) / len(values) if values else None
+        statistics = self.statistics.get(key)
+        return statistics.mean if statistics is not None and statistics.count else None
+
+    def std(self,
+            key):
+        """ Sample standard deviation of the values for a given key, None with fewer than two values. """
+        statistics = self.statistics.get(key)
+        return statistics.std() if statistics is not None else None
+
+    def quantile(self,
+                 key,
+                 q:float):
+        """ Estimate quantile q in [0, 1] of the values for a given key. """
+        statistics = self.statistics.get(key)
+        return statistics.quantile(q) if statistics is not None else None
+
+    def merge(self,
+              other:"StatsCollector") -> "StatsCollector":
+        """
+        Add the values of another collector, for instance of another crane or replication.
+        The values themselves are kept only if both collectors keep them.
+        """
+        for key, statistics in other.statistics.items():
+            self._statistics(key).merge(statistics)
+        if self.streaming or other.streaming:
+            self.streaming = True
+            self.data = {}
+        else:
+            for key, values in other.data.items():
+                self.data.setdefault(key, []).extend(values)
+        return self
+
+    @classmethod
+    def merged(cls,
+               collectors:Iterable["StatsCollector"],
+               **kwargs) -> "StatsCollector":
+        """ Return a new streaming collector with the statistics of all the collectors. """
+        result = cls(streaming=True, **kwargs)
+        for collector in collectors:
+            result.merge(collector)
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """ Return the count, total, average, standard deviation, min, max and median of every key. """
+        return {key: {"count": statistics.count,
+                      "total": statistics.total,
+                      "average": self.average(key),
+                      "std": statistics.std(),
+                      "min": statistics.min,
+                      "max": statistics.max,
+                      "median": statistics.quantile(0.5)} for key, statistics in self.statistics.items()}
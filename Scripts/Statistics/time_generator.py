@@ -1,35 +1,147 @@
 import scipy.stats as stats
-from typing import Any, Dict, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 from scipy.stats import rv_continuous
 import numpy as np
 
+SeedLike = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+# Native numpy Generator samplers for the common distributions, written against the
+# scipy parameterisation (loc, scale and shape arguments) so that both give the same law.
+NATIVE_SAMPLERS:Dict[str, Callable[..., np.ndarray]] = {
+    "norm": lambda rng, size, loc=0.0, scale=1.0: rng.normal(loc, scale, size),
+    "expon": lambda rng, size, loc=0.0, scale=1.0: loc + rng.exponential(scale, size),
+    "gamma": lambda rng, size, a, loc=0.0, scale=1.0: loc + rng.gamma(a, scale, size),
+    "lognorm": lambda rng, size, s, loc=0.0, scale=1.0: loc + scale * rng.lognormal(0.0, s, size),
+    "uniform": lambda rng, size, loc=0.0, scale=1.0: rng.uniform(loc, loc + scale, size),
+}
+
 class RandomTimeGenerator:
-    def __init__(self, 
-                 distribution: str = 'norm', 
+    def __init__(self,
+                 distribution: str = 'norm',
+                 block_size: int = 1024,
+                 seed: SeedLike = None,
                  **params: Any) -> None:
         """
         Initialize the random time generator with a specific distribution and parameters.
 
+        Samples consumed through next() are drawn block_size at a time with one vectorized
+        call and served from an internal pool, so the per-sample cost is a list lookup.
+        Draws come from the generator's own numpy Generator; norm, expon, gamma, lognorm
+        and uniform use the native Generator methods, other distributions fall back to scipy.
+
         Args:
             distribution (str): The type of distribution to use ('normal', 'uniform', 'exponential', etc.).
+            block_size (int): Number of samples pre-drawn each time the internal pool runs empty.
+            seed (int, SeedSequence or Generator, optional): Seed of the generator's own stream.
+                The same seed and block size always reproduce the same sequence of samples.
+                A Generator is drawn from directly, reset replays it from its state here.
             **params: Parameters required for the specified distribution (e.g., mean and std for normal distribution).
         """
+        if not isinstance(block_size, int) or block_size < 1:
+            raise ValueError("block_size must be a positive integer")
         self.distribution:str = distribution
         self.params:Any = params
         self.distribution_function:rv_continuous = getattr(stats, distribution)
+        self._native_sampler:Optional[Callable[..., np.ndarray]] = NATIVE_SAMPLERS.get(distribution)
+        self.block_size:int = block_size
+        self.seed:SeedLike = seed
+        self._seed_state:Optional[Dict[str, Any]] = self._state_of(seed)
+        self.rng:np.random.Generator = np.random.default_rng(seed)
+        self._pool:List[float] = []
+        self._position:int = 0
+
+    @staticmethod
+    def _state_of(seed: SeedLike) -> Optional[Dict[str, Any]]:
+        """ The bit generator state of a Generator seed, None for other seeds. """
+        return seed.bit_generator.state if isinstance(seed, np.random.Generator) else None
+
+    def reset(self,
+              seed: SeedLike = None) -> None:
+        """
+        Reseed the generator and discard the samples left in the pool.
+
+        Args:
+            seed (int, SeedSequence or Generator, optional): The new seed, the constructor seed is reused if not given.
+                A Generator seed restarts from the state it had when it was given, in a copy of it.
+        """
+        if seed is not None:
+            self.seed = seed
+            self._seed_state = self._state_of(seed)
+        if self._seed_state is not None:
+            bit_generator = type(self.seed.bit_generator)()
+            bit_generator.state = self._seed_state
+            self.rng = np.random.Generator(bit_generator)
+        else:
+            self.rng = np.random.default_rng(self.seed)
+        self._pool = []
+        self._position = 0
+
+    def _draw(self,
+              rng: np.random.Generator,
+              size: int) -> np.ndarray:
+        """ Draw size samples from rng, natively when possible and through scipy otherwise. """
+        if self._native_sampler is not None:
+            return self._native_sampler(rng, size, **self.params)
+        return self.distribution_function.rvs(size=size, random_state=rng, **self.params)
+
+    def _refill(self) -> None:
+        """ Draw a new block of samples with a single vectorized call. """
+        self._pool = np.atleast_1d(self._draw(self.rng, self.block_size)).tolist()
+        self._position = 0
+
+    def next(self) -> float:
+        """
+        Return the next sample from the pre-drawn pool, refilling it when empty.
+
+        Returns:
+            float: A single generated random time.
+        """
+        if self._position >= len(self._pool):
+            self._refill()
+        value = self._pool[self._position]
+        self._position += 1
+        return value
+
+    __next__ = next
+
+    def take(self,
+             n: int) -> np.ndarray:
+        """
+        Return the next n samples of the pool as an array, refilling it as needed.
+
+        The samples are the ones n calls of next() would have returned, in the same order.
+
+        Args:
+            n (int): The number of samples to take.
+
+        Returns:
+            np.ndarray: The samples.
+        """
+        parts = []
+        while n > 0:
+            if self._position >= len(self._pool):
+                self._refill()
+            end = min(self._position + n, len(self._pool))
+            parts.append(np.asarray(self._pool[self._position:end], dtype=float))
+            n -= end - self._position
+            self._position = end
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    def __iter__(self) -> "RandomTimeGenerator":
+        return self
 
-    def generate(self, 
+    def generate(self,
                  size: int = 1,
-                 seed=None) -> Union[float, list]:
+                 seed: SeedLike = None) -> np.ndarray:
         """
         Generate random times based on the specified distribution and parameters.
 
         Args:
             size (int): The number of random times to generate.
+            seed (optional): Draw from a fresh stream with this seed instead of the generator's own stream.
 
         Returns:
-            Union[float, list]: A single generated random time if size is 1, otherwise a list of generated random times.
+            np.ndarray: An array holding the generated random times.
         """
-        if seed is None:
-            np.random.seed(42)
-        return self.distribution_function.rvs(size=size, **self.params)
\ No newline at end of file
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        return np.atleast_1d(self._draw(rng, size))
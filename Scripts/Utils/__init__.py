@@ -1,5 +1,7 @@
 from .basic_data_structures import OneIndexedList, Stack
-from .basic_objects import Resource, PreemptiveResource, PriorityResource, Container, Stores, FilterStore, EventHandler
-from .containers import Container, ContainerLocationRegistry, ContainerList, ContainerFactory
+from .basic_objects import Resource, PreemptiveResource, PriorityResource, Container, Stores, FilterStore, IndexedStore, EventHandler
+from .containers import Container, CompactContainer, ContainerTable, ContainerRow, ContainerLocationRegistry, ContainerList, ContainerFactory
 from .port_objects_definition import ContainerSize, ContainerType, ContainerHandling, CTInterface
-from .log import Logger
\ No newline at end of file
+from .event_trace import EventKind, EventTrace, TextLogView, load_trace
+from .monitors import TimeWeightedMonitor
+from .log import Logger, console, set_quiet
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+import random
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 
 class OneIndexedList:
     def __init__(self, 
@@ -48,3 +49,466 @@ class Stack:
 
     def disallow_temp_overstack(self):
         self.temp_overstack_allowed = False
+
+class _Interval:
+    __slots__ = ("start", "end", "priority", "left", "right", "max_length")
+
+    def __init__(self,
+                 start:float,
+                 end:float,
+                 priority:float) -> None:
+        self.start:float = start
+        self.end:float = end
+        self.priority:float = priority
+        self.left:Optional["_Interval"] = None
+        self.right:Optional["_Interval"] = None
+        self.max_length:float = end - start  # longest interval of the subtree
+
+def _update(node:_Interval) -> None:
+    length = node.end - node.start
+    if node.left is not None and node.left.max_length > length:
+        length = node.left.max_length
+    if node.right is not None and node.right.max_length > length:
+        length = node.right.max_length
+    node.max_length = length
+
+def _split(node:Optional[_Interval],
+           key:float) -> Tuple[Optional[_Interval], Optional[_Interval]]:
+    # The intervals that start before key, and the others
+    if node is None:
+        return None, None
+    if node.start < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _update(node)
+    return left, node
+
+def _merge(left:Optional[_Interval],
+           right:Optional[_Interval]) -> Optional[_Interval]:
+    # Every interval of left starts before the intervals of right
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+def _first(node:Optional[_Interval]) -> Optional[_Interval]:
+    while node is not None and node.left is not None:
+        node = node.left
+    return node
+
+def _last(node:Optional[_Interval]) -> Optional[_Interval]:
+    while node is not None and node.right is not None:
+        node = node.right
+    return node
+
+def _pop_first(node:_Interval) -> Tuple[Optional[_Interval], _Interval]:
+    if node.left is None:
+        return node.right, node
+    node.left, first = _pop_first(node.left)
+    _update(node)
+    return node, first
+
+def _pop_last(node:_Interval) -> Tuple[Optional[_Interval], _Interval]:
+    if node.right is None:
+        return node.left, node
+    node.right, last = _pop_last(node.right)
+    _update(node)
+    return node, last
+
+class IntervalTreap:
+    """
+    Disjoint intervals [start, end) in a treap keyed by start, where every node also
+    keeps the longest interval of its subtree. Finding the interval of a given length
+    nearest to a position, taking a piece out of an interval and adding an interval
+    back, merged with its neighbours, are O(log n) expected.
+    """
+    def __init__(self,
+                 seed:int=0) -> None:
+        """
+        @param seed: seed of the random priorities, which fix the shape of the tree
+        """
+        self._root:Optional[_Interval] = None
+        self._random:random.Random = random.Random(seed)
+        self._count:int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        """ Iterate over the intervals in order. """
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end
+            node = node.right
+
+    @property
+    def max_length(self) -> float:
+        """ Length of the longest interval, 0 if there is none. """
+        return self._root.max_length if self._root is not None else 0.0
+
+    def add(self,
+            start:float,
+            end:float) -> None:
+        """
+        Add the interval [start, end), merged with the intervals that end at start or
+        begin at end. It must not overlap the intervals already in the treap.
+        """
+        if end <= start:
+            raise ValueError("An interval must end after it starts")
+        before, after = _split(self._root, start)
+        last = _last(before)
+        first = _first(after)
+        if (last is not None and last.end > start) or (first is not None and first.start < end):
+            self._root = _merge(before, after)
+            raise ValueError(f"[{start}, {end}) overlaps an interval of the treap")
+        if last is not None and last.end == start:
+            before, _ = _pop_last(before)
+            start = last.start
+            self._count -= 1
+        if first is not None and first.start == end:
+            after, _ = _pop_first(after)
+            end = first.end
+            self._count -= 1
+        self._root = _merge(_merge(before, _Interval(start, end, self._random.random())), after)
+        self._count += 1
+
+    def find(self,
+             length:float,
+             position:Optional[float]=None) -> Optional[float]:
+        """
+        Return the start of the place of the given length, inside one interval, nearest
+        to position, or the first place if position is None. None if no interval is
+        long enough.
+        """
+        fit = self._find(length, position)
+        return fit[0] if fit is not None else None
+
+    def _find(self,
+              length:float,
+              position:Optional[float]) -> Optional[Tuple[float, _Interval]]:
+        if self.max_length < length:
+            return None
+        if position is None:
+            before, after = None, self._root
+        else:
+            before, after = _split(self._root, position)
+        candidates = []
+        node = before
+        if node is not None and node.max_length >= length:
+            # The last interval that starts before position and is long enough
+            while True:
+                if node.right is not None and node.right.max_length >= length:
+                    node = node.right
+                elif node.end - node.start >= length:
+                    break
+                else:
+                    node = node.left
+            place = min(position, node.end - length)
+            candidates.append((position - place, place, node))
+        node = after
+        if node is not None and node.max_length >= length:
+            # The first interval that starts at or after position and is long enough
+            while True:
+                if node.left is not None and node.left.max_length >= length:
+                    node = node.left
+                elif node.end - node.start >= length:
+                    break
+                else:
+                    node = node.right
+            candidates.append((node.start - position if position is not None else 0.0, node.start, node))
+        if position is not None:
+            self._root = _merge(before, after)
+        _, place, node = min(candidates, key=lambda candidate: candidate[0])
+        return place, node
+
+    def take(self,
+             length:float,
+             position:Optional[float]=None) -> Optional[float]:
+        """
+        Take the place of find out of its interval.
+
+        returns the start of the place, None if no interval is long enough
+        """
+        fit = self._find(length, position)
+        if fit is None:
+            return None
+        place, node = fit
+        start, end = node.start, node.end
+        before, after = _split(self._root, start)
+        after, _ = _pop_first(after)
+        if end > place + length:
+            after = _merge(_Interval(place + length, end, self._random.random()), after)
+            self._count += 1
+        if place > start:
+            before = _merge(before, _Interval(start, place, self._random.random()))
+            self._count += 1
+        self._root = _merge(before, after)
+        self._count -= 1
+        return place
+
+class _Ranked:
+    __slots__ = ("key", "item", "rank", "priority", "left", "right", "min_rank")
+
+    def __init__(self,
+                 key:Any,
+                 item:Any,
+                 rank:float,
+                 priority:float) -> None:
+        self.key:Any = key
+        self.item:Any = item
+        self.rank:float = rank
+        self.priority:float = priority
+        self.left:Optional["_Ranked"] = None
+        self.right:Optional["_Ranked"] = None
+        self.min_rank:float = rank  # smallest rank of the subtree
+
+def _update_rank(node:_Ranked) -> None:
+    rank = node.rank
+    if node.left is not None and node.left.min_rank < rank:
+        rank = node.left.min_rank
+    if node.right is not None and node.right.min_rank < rank:
+        rank = node.right.min_rank
+    node.min_rank = rank
+
+def _split_ranked(node:Optional[_Ranked],
+                  key:Any) -> Tuple[Optional[_Ranked], Optional[_Ranked]]:
+    # The items whose key is below key, and the others
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split_ranked(node.right, key)
+        node.right = left
+        _update_rank(node)
+        return node, right
+    left, right = _split_ranked(node.left, key)
+    node.left = right
+    _update_rank(node)
+    return left, node
+
+def _merge_ranked(left:Optional[_Ranked],
+                  right:Optional[_Ranked]) -> Optional[_Ranked]:
+    # Every key of left is below the keys of right
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge_ranked(left.right, right)
+        _update_rank(left)
+        return left
+    right.left = _merge_ranked(left, right.left)
+    _update_rank(right)
+    return right
+
+class RankedTreap:
+    """
+    Items in a treap by a unique, sortable key, where every node also keeps the smallest
+    rank of its subtree. Adding and removing an item, finding the neighbours of a key and
+    the item of smallest rank in a range of keys are O(log n) expected.
+    """
+    def __init__(self,
+                 seed:int=0) -> None:
+        """
+        @param seed: seed of the random priorities, which fix the shape of the tree
+        """
+        self._root:Optional[_Ranked] = None
+        self._random:random.Random = random.Random(seed)
+        self._count:int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        """ Iterate over the (key, item) pairs in key order. """
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key, node.item
+            node = node.right
+
+    def add(self,
+            key:Any,
+            item:Any,
+            rank:float=0.0) -> None:
+        """
+        Add an item under a key that is not in the treap yet.
+        """
+        before, after = _split_ranked(self._root, key)
+        if after is not None:
+            first = after
+            while first.left is not None:
+                first = first.left
+            if first.key == key:
+                self._root = _merge_ranked(before, after)
+                raise ValueError(f"The treap has a key {key} already")
+        self._root = _merge_ranked(_merge_ranked(before, _Ranked(key, item, rank, self._random.random())), after)
+        self._count += 1
+
+    def remove(self,
+               key:Any) -> Any:
+        """
+        Remove the item of the key.
+
+        returns the item
+        """
+        before, after = _split_ranked(self._root, key)
+        parents, node = [], after
+        while node is not None and node.left is not None:
+            parents.append(node)
+            node = node.left
+        if node is None or node.key != key:
+            self._root = _merge_ranked(before, after)
+            raise KeyError(key)
+        if parents:
+            parents[-1].left = node.right
+            for parent in reversed(parents):
+                _update_rank(parent)
+        else:
+            after = node.right
+        self._root = _merge_ranked(before, after)
+        self._count -= 1
+        return node.item
+
+    def first(self) -> Optional[Tuple[Any, Any]]:
+        """ The (key, item) of the smallest key, None if the treap is empty. """
+        node = self._root
+        while node is not None and node.left is not None:
+            node = node.left
+        return (node.key, node.item) if node is not None else None
+
+    def neighbours(self,
+                   key:Any) -> Tuple[Optional[Tuple[Any, Any]], Optional[Tuple[Any, Any]]]:
+        """
+        The (key, item) of the largest key below key and of the smallest key not below
+        it, each None if there is none.
+        """
+        below = above = None
+        node = self._root
+        while node is not None:
+            if node.key < key:
+                below, node = node, node.right
+            else:
+                above, node = node, node.left
+        return ((below.key, below.item) if below is not None else None,
+                (above.key, above.item) if above is not None else None)
+
+    def min_rank(self,
+                 low:Any,
+                 high:Any) -> Optional[Tuple[Any, Any]]:
+        """
+        The (key, item) of smallest rank among the keys in [low, high), None if there is none.
+        """
+        before, rest = _split_ranked(self._root, low)
+        middle, after = _split_ranked(rest, high)
+        found = None
+        node = middle
+        if node is not None:
+            while True:
+                if node.left is not None and node.left.min_rank == node.min_rank:
+                    node = node.left
+                elif node.rank == node.min_rank:
+                    break
+                else:
+                    node = node.right
+            found = node.key, node.item
+        self._root = _merge_ranked(_merge_ranked(before, middle), after)
+        return found
+
+class FirstFitQueue:
+    """
+    FIFO queue of items with a size, that finds the first item no larger than a limit
+    in O(log n). Items sit in slots in the order they are added, under a tree of the
+    smallest size of every range of slots; a removed item leaves an empty slot, and
+    the slots are compacted when they run out.
+    """
+    def __init__(self,
+                 size:Callable[[Any], float]) -> None:
+        """
+        @param size: function returning the size of an item
+        """
+        self.size:Callable[[Any], float] = size
+        self._capacity:int = 16
+        self._tree:List[float] = [float("inf")] * (2 * self._capacity)
+        self._items:List[Any] = []
+        self._slots:Dict[int, int] = {}  # slot of every item, by id
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (item for item in self._items if item is not None)
+
+    def _set(self,
+             slot:int,
+             size:float) -> None:
+        index = slot + self._capacity
+        tree = self._tree
+        tree[index] = size
+        index //= 2
+        while index:
+            smallest = min(tree[2 * index], tree[2 * index + 1])
+            if tree[index] == smallest:
+                break
+            tree[index] = smallest
+            index //= 2
+
+    def append(self,
+               item:Any) -> None:
+        if len(self._items) == self._capacity:
+            self._compact()
+        self._slots[id(item)] = len(self._items)
+        self._items.append(item)
+        self._set(len(self._items) - 1, self.size(item))
+
+    def _compact(self) -> None:
+        items = [item for item in self._items if item is not None]
+        while len(items) * 2 > self._capacity:
+            self._capacity *= 2
+        tree = [float("inf")] * (2 * self._capacity)
+        tree[self._capacity:self._capacity + len(items)] = [self.size(item) for item in items]
+        for index in range(self._capacity - 1, 0, -1):
+            tree[index] = min(tree[2 * index], tree[2 * index + 1])
+        self._tree = tree
+        self._items = items
+        self._slots = {id(item): slot for slot, item in enumerate(items)}
+
+    def remove(self,
+               item:Any) -> None:
+        slot = self._slots.pop(id(item), None)
+        if slot is None:
+            raise ValueError("The item is not in the queue")
+        self._items[slot] = None
+        self._set(slot, float("inf"))
+
+    def first(self) -> Optional[Any]:
+        """ The earliest item, None if the queue is empty. """
+        return self.first_fit(float("inf"))
+
+    def first_fit(self,
+                  limit:float) -> Optional[Any]:
+        """ The earliest item whose size is at most limit, None if there is none. """
+        tree = self._tree
+        if not self._slots or tree[1] > limit:
+            return None
+        index = 1
+        while index < self._capacity:
+            index = 2 * index if tree[2 * index] <= limit else 2 * index + 1
+        return self._items[index - self._capacity]
\ No newline at end of file
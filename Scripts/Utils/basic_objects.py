@@ -1,31 +1,71 @@
-from typing import Union
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Union
+from collections import deque
+from operator import attrgetter
 import simpy
-from simpy.core import Environment
+from simpy.core import Environment, BoundClass
+from simpy.resources.base import BaseResource, Put, Get
+from Scripts.Utils.log import console
+from Scripts.Utils.monitors import TimeWeightedMonitor
 
-class Resource(simpy.Resource):
+class MonitoredResource:
+    """
+    Time-weighted monitors of the users and the queue of a resource. They are updated
+    after every request and release, when simpy processes the queues, and only if the
+    number of users or of waiting requests changed.
+    """
+    def _init_monitors(self) -> None:
+        self.busy_monitor:TimeWeightedMonitor = TimeWeightedMonitor(self._env)
+        self.queue_monitor:TimeWeightedMonitor = TimeWeightedMonitor(self._env)
+
+    def _trigger_put(self, get_event:Optional[Get]) -> None:
+        super()._trigger_put(get_event)
+        self._record_state()
+
+    def _trigger_get(self, put_event:Optional[Put]) -> None:
+        super()._trigger_get(put_event)
+        self._record_state()
+
+    def _record_state(self) -> None:
+        self.busy_monitor.set(len(self.users))
+        self.queue_monitor.set(len(self.put_queue))
+
+    def utilization(self,
+                    time:Optional[float]=None) -> float:
+        """ Time-averaged share of the capacity in use, up to time or env.now. """
+        return self.busy_monitor.mean(time) / self._capacity
+
+    def average_queue_length(self,
+                             time:Optional[float]=None) -> float:
+        """ Time-averaged number of waiting requests, up to time or env.now. """
+        return self.queue_monitor.mean(time)
+
+class Resource(MonitoredResource, simpy.Resource):
     """
     Base Class of Simpy Resource
     """
     def __init__(self, env:simpy.Environment, capacity:int):
         super().__init__(env = env, capacity = capacity) 
+        self._init_monitors()
 
     def execute_task(self, task_name):
-        print(f"Executing task: {task_name} at time {self.env.now:.2f}")
+        console("Executing task: %s at time %.2f", task_name, self.env.now)
         # Add task execution logic here
 
-class PriorityResource(simpy.PriorityResource):
+class PriorityResource(MonitoredResource, simpy.PriorityResource):
     """
     Base class for priority rersource
     """
     def __init__(self, env:simpy.Environment, capacity:int):
         super().__init__(env=env, capacity=capacity)
+        self._init_monitors()
 
-class PreemptiveResource(simpy.PreemptiveResource):
+class PreemptiveResource(MonitoredResource, simpy.PreemptiveResource):
     """
     Base class for priority rersource
     """
     def __init__(self, env:simpy.Environment, capacity:int):
         super().__init__(env=env, capacity=capacity)
+        self._init_monitors()
 
 class Container(simpy.Container):
     """
@@ -48,6 +88,134 @@ class FilterStore(simpy.FilterStore):
     def __init__(self, env: Environment, capacity: float | int = ...):
         super().__init__(env, capacity)
 
+class IndexedPut(Put):
+    """
+    Request to put an item into an IndexedStore
+    """
+    def __init__(self, resource:"IndexedStore", item:Any):
+        self.item = item
+        super().__init__(resource)
+
+class IndexedGet(Get):
+    """
+    Request to get the item with the given key out of an IndexedStore. It waits
+    until an item with that key is put into the store.
+    """
+    def __init__(self, resource:"IndexedStore", key:Hashable):
+        # Waiting gets are indexed by key instead of the shared get queue of BaseResource
+        simpy.Event.__init__(self, resource._env)
+        self.resource = resource
+        self.proc = self.env.active_process
+        self.key = key
+        resource._request_item(self)
+
+    def cancel(self) -> None:
+        if not self.triggered:
+            self.resource._cancel_request(self)
+
+class IndexedStore(BaseResource):
+    """
+    Store whose items are kept in a dictionary by key, so that getting or removing an
+    item is O(1) instead of the linear filter scan of a FilterStore.
+    """
+    def __init__(self,
+                 env:simpy.Environment,
+                 capacity:Union[float, int]=float('inf'),
+                 key:Callable[[Any], Hashable]=attrgetter("container_id")):
+        """
+        @param capacity: maximum number of items in the store
+        @param key: function returning the key of an item
+        """
+        super().__init__(env, capacity)
+        self.key:Callable[[Any], Hashable] = key
+        self.items:Dict[Hashable, Any] = {}
+        self._waiting:Dict[Hashable, Deque[IndexedGet]] = {}
+        self._putting:bool = False
+
+    put = BoundClass(IndexedPut)
+    get = BoundClass(IndexedGet)
+
+    def _do_put(self, event:IndexedPut) -> Optional[bool]:
+        if len(self.items) < self._capacity:
+            key = self.key(event.item)
+            self.items[key] = event.item
+            event.succeed()
+            waiting = self._waiting.get(key)
+            if waiting:
+                get_event = waiting.popleft()
+                if not waiting:
+                    del self._waiting[key]
+                # The put queue is being processed already, serving frees the space again
+                self._putting = True
+                try:
+                    self._serve(get_event)
+                finally:
+                    self._putting = False
+                return True
+        return None
+
+    def _request_item(self, event:IndexedGet) -> None:
+        if event.key in self.items and event.key not in self._waiting:
+            self._serve(event)
+        else:
+            self._waiting.setdefault(event.key, deque()).append(event)
+
+    def _cancel_request(self, event:IndexedGet) -> None:
+        waiting = self._waiting.get(event.key)
+        if waiting and event in waiting:
+            waiting.remove(event)
+            if not waiting:
+                del self._waiting[event.key]
+
+    def _serve(self, event:IndexedGet) -> None:
+        event.succeed(self._take(event.key))
+        self._space_freed()
+
+    def _take(self, key:Hashable) -> Any:
+        """
+        Take the item with the key out of the store. Subclasses can extend what taking means.
+        """
+        return self.items.pop(key)
+
+    def _space_freed(self) -> None:
+        if self.put_queue and not self._putting:
+            self._trigger_put(None)
+
+    def add(self, item:Any) -> Optional[IndexedPut]:
+        """
+        Add the item right away, without a put event, when there is room and no put is queued.
+        A get waiting for the item is served as with put.
+
+        @param item: the item to add
+
+        returns None if the item was added, otherwise the queued put event
+        """
+        if self.put_queue or len(self.items) >= self._capacity:
+            return self.put(item)
+        key = self.key(item)
+        self.items[key] = item
+        waiting = self._waiting.get(key)
+        if waiting:
+            get_event = waiting.popleft()
+            if not waiting:
+                del self._waiting[key]
+            self._serve(get_event)
+        return None
+
+    def remove(self, key:Hashable) -> Any:
+        """
+        Remove the item with the key right away.
+
+        @param key: the key of the item
+
+        returns the item, or None if it is not in the store
+        """
+        if key not in self.items:
+            return None
+        item = self._take(key)
+        self._space_freed()
+        return item
+
 class EventHandler:
     def __init__(self, env:simpy.Environment):
         self.env = env
@@ -1,5 +1,15 @@
-from typing import Optional, List, Dict, Tuple
+from typing import Any, Optional, List, Dict, Tuple, Union, Sequence
+import numpy as np
 from Scripts.Utils.port_objects_definition import *
+from Scripts.Statistics.time_generator import RandomTimeGenerator
+
+# A dwell time for every container of a batch: one value, one value per container or a generator to sample
+DwellTimes = Union[float, Sequence[float], np.ndarray, RandomTimeGenerator]
+
+# Enum members by their integer code, the inverse of the *_CODES tables
+SIZES_BY_CODE = {code: size for size, code in SIZE_CODES.items()}
+TYPES_BY_CODE = {code: container_type for container_type, code in TYPE_CODES.items()}
+INTERFACES_BY_CODE = {interface.value: interface for interface in CTInterface}
 
 class Container:
     """
@@ -36,6 +46,32 @@ class Container:
         """
         Container.counter += 1
         return f'{self._size}-{Container.counter}'
+
+    @classmethod
+    def create_batch(cls,
+                     container_type:ContainerType,
+                     size:ContainerSize,
+                     dwell_times:Sequence[float],
+                     from_interface:Optional[CTInterface]=None,
+                     to_interface:Optional[CTInterface]=None) -> List["Container"]:
+        """
+        Create one container per dwell time without running the constructor or the setters.
+
+        The ids are reserved in one step, so they are the same as with consecutive constructor calls.
+
+        @param dwell_times: dwell time of each container
+        @param from_interface, to_interface: interfaces shared by the whole batch
+        """
+        first_id = Container.counter + 1
+        Container.counter += len(dwell_times)
+        containers = []
+        for number, dwell_time in enumerate(dwell_times, first_id):
+            container = cls.__new__(cls)
+            container.__dict__.update(_container_type=container_type, _size=size, _dwell_time=dwell_time,
+                                      container_id=f'{size}-{number}', _block=None, _bay=None, _cell=None,
+                                      _tier=None, _from_interface=from_interface, _to_interface=to_interface)
+            containers.append(container)
+        return containers
     
     @property
     def block(self) -> str:
@@ -106,6 +142,317 @@ class Container:
     def __str__(self):
         return f"Container ID: {self.container_id}, Type: {self._container_type}, Size: {self._size}"
     
+class CompactContainer:
+    """
+    Container without a per-instance __dict__ and with an integer id.
+
+    The attributes live in __slots__ and the setters do not validate. Enum members are
+    shared singletons, so each enum slot costs one pointer, like an interned code.
+    The string form of the id is only formatted when asked for through label.
+    """
+    __slots__ = ("container_id", "_container_type", "_size", "_dwell_time", "_block",
+                 "_bay", "_cell", "_tier", "_from_interface", "_to_interface")
+    counter = 0  # this counter is for generating container ids
+
+    def __init__(self,
+                 container_type:ContainerType,
+                 size:ContainerSize,
+                 dwell_time:Optional[float] = 10.0) -> None:
+        CompactContainer.counter += 1
+        self.container_id:int = CompactContainer.counter
+        self._container_type = container_type
+        self._size = size
+        self._dwell_time = dwell_time
+        self._block:str = None
+        self._bay:int = None
+        self._cell:int = None
+        self._tier:int = None
+        self._from_interface:CTInterface = None
+        self._to_interface:CTInterface = None
+
+    @property
+    def label(self) -> str:
+        return f'{self._size}-{self.container_id}'
+
+    @classmethod
+    def create_batch(cls,
+                     container_type:ContainerType,
+                     size:ContainerSize,
+                     dwell_times:Sequence[float],
+                     from_interface:Optional[CTInterface]=None,
+                     to_interface:Optional[CTInterface]=None) -> List["CompactContainer"]:
+        """
+        Create one container per dwell time, reserving the ids in one step.
+        """
+        first_id = CompactContainer.counter + 1
+        CompactContainer.counter += len(dwell_times)
+        containers = []
+        for container_id, dwell_time in enumerate(dwell_times, first_id):
+            container = cls.__new__(cls)
+            container.container_id = container_id
+            container._container_type = container_type
+            container._size = size
+            container._dwell_time = dwell_time
+            container._block = container._bay = container._cell = container._tier = None
+            container._from_interface = from_interface
+            container._to_interface = to_interface
+            containers.append(container)
+        return containers
+
+    @property
+    def block(self) -> str:
+        return self._block
+
+    @block.setter
+    def block(self, block_name:str) -> None:
+        self._block = block_name
+
+    @property
+    def bay(self) -> int:
+        return self._bay
+
+    @bay.setter
+    def bay(self, bay:int) -> None:
+        self._bay = bay
+
+    @property
+    def cell(self) -> int:
+        return self._cell
+
+    @cell.setter
+    def cell(self, cell:int) -> None:
+        self._cell = cell
+
+    @property
+    def tier(self) -> int:
+        return self._tier
+
+    @tier.setter
+    def tier(self, tier:int) -> None:
+        self._tier = tier
+
+    @property
+    def to_interface(self) -> CTInterface:
+        return self._to_interface
+
+    @to_interface.setter
+    def to_interface(self, to_interface:CTInterface) -> None:
+        self._to_interface = to_interface
+
+    @property
+    def from_interface(self) -> CTInterface:
+        return self._from_interface
+
+    @from_interface.setter
+    def from_interface(self, from_interface:CTInterface) -> None:
+        self._from_interface = from_interface
+
+    def __str__(self):
+        return f"Container ID: {self.label}, Type: {self._container_type}, Size: {self._size}"
+
+class ContainerTable:
+    """
+    Struct-of-arrays storage of containers. Every attribute is a numpy column and a
+    container is a row. Enums are stored by their codes (0 = unset) and block names as
+    indices into block_names (-1 = not in the yard). Code that expects container objects
+    gets ContainerRow views through row(), the view is also the container id.
+    """
+    COLUMNS = {"container_type": np.int8, "size": np.int8, "dwell_time": np.float64,
+               "block": np.int16, "bay": np.int32, "cell": np.int32, "tier": np.int32,
+               "from_interface": np.int8, "to_interface": np.int8}
+
+    def __init__(self,
+                 initial_capacity:int=1024) -> None:
+        self.num_rows:int = 0
+        self.columns:Dict[str, np.ndarray] = {name: np.zeros(initial_capacity, dtype=dtype)
+                                              for name, dtype in self.COLUMNS.items()}
+        self.columns["block"][:] = -1
+        self.block_names:List[str] = []
+        self.block_codes:Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        """
+        Return the filled part of a column.
+        """
+        return self.columns[name][:self.num_rows]
+
+    def _reserve(self, n:int) -> int:
+        """
+        Reserve n rows, growing the columns geometrically, and return the first row.
+        """
+        first_row = self.num_rows
+        needed = first_row + n
+        capacity = len(self.columns["size"])
+        if needed > capacity:
+            new_capacity = max(needed, 2 * capacity)
+            for name, column in self.columns.items():
+                grown = np.zeros(new_capacity, dtype=column.dtype)
+                if name == "block":
+                    grown[:] = -1
+                grown[:first_row] = column[:first_row]
+                self.columns[name] = grown
+        self.num_rows = needed
+        return first_row
+
+    def append(self,
+               container_type:ContainerType,
+               size:ContainerSize,
+               dwell_time:Optional[float] = 10.0) -> int:
+        """
+        Add one container and return its row.
+        """
+        row = self._reserve(1)
+        self.columns["container_type"][row] = TYPE_CODES.get(container_type, 0)
+        self.columns["size"][row] = SIZE_CODES[size]
+        self.columns["dwell_time"][row] = dwell_time
+        return row
+
+    def append_batch(self,
+                     container_type:ContainerType,
+                     size:ContainerSize,
+                     dwell_times:np.ndarray,
+                     from_interface:Optional[CTInterface]=None,
+                     to_interface:Optional[CTInterface]=None) -> range:
+        """
+        Add one container per dwell time with column slice assignments and return their rows.
+        """
+        first_row = self._reserve(len(dwell_times))
+        rows = slice(first_row, self.num_rows)
+        self.columns["container_type"][rows] = TYPE_CODES.get(container_type, 0)
+        self.columns["size"][rows] = SIZE_CODES[size]
+        self.columns["dwell_time"][rows] = dwell_times
+        self.columns["from_interface"][rows] = _encode_interface(self, from_interface)
+        self.columns["to_interface"][rows] = _encode_interface(self, to_interface)
+        return range(first_row, self.num_rows)
+
+    def block_code(self, block_name:str) -> int:
+        """
+        Return the code of a block name, interning it on first use.
+        """
+        code = self.block_codes.get(block_name)
+        if code is None:
+            code = len(self.block_names)
+            self.block_names.append(block_name)
+            self.block_codes[block_name] = code
+        return code
+
+    def set_location(self,
+                     row:int,
+                     block:str,
+                     bay:int,
+                     cell:int,
+                     tier:int) -> None:
+        if not 0 <= row < self.num_rows:
+            raise IndexError(f"{row} is not a row of the container table")
+        self.columns["block"][row] = self.block_code(block)
+        self.columns["bay"][row] = bay
+        self.columns["cell"][row] = cell
+        self.columns["tier"][row] = tier
+
+    def location(self, row:int) -> Optional[Tuple[str, int, int, int]]:
+        if not 0 <= row < self.num_rows:
+            return None
+        block_code = int(self.columns["block"][row])
+        if block_code < 0:
+            return None
+        return (self.block_names[block_code], int(self.columns["bay"][row]),
+                int(self.columns["cell"][row]), int(self.columns["tier"][row]))
+
+    def clear_location(self, row:int) -> None:
+        if 0 <= row < self.num_rows:
+            self.columns["block"][row] = -1
+
+    def row(self, row:int) -> "ContainerRow":
+        if not 0 <= row < self.num_rows:
+            raise IndexError(f"{row} is not a row of the container table")
+        return ContainerRow(self, row)
+
+    def nbytes(self) -> int:
+        """
+        Return the memory taken by the filled part of the columns.
+        """
+        return sum(column.itemsize * self.num_rows for column in self.columns.values())
+
+def _row_column_property(name:str, decode=None, encode=None) -> property:
+    def getter(self):
+        value = self.table.columns[name][self.row]
+        return decode(value) if decode else value.item()
+
+    def setter(self, value):
+        self.table.columns[name][self.row] = encode(self.table, value) if encode else value
+    return property(getter, setter)
+
+def _decode_position(value) -> Optional[int]:
+    return int(value) or None
+
+def _encode_position(table:ContainerTable, value:Optional[int]) -> int:
+    return value or 0
+
+def _decode_interface(code) -> Optional[CTInterface]:
+    return INTERFACES_BY_CODE.get(int(code))
+
+def _encode_interface(table:ContainerTable, interface:Optional[CTInterface]) -> int:
+    return interface.value if interface is not None else 0
+
+class ContainerRow:
+    """
+    Lightweight view of one ContainerTable row with the attribute interface of Container.
+
+    The view is its own container id: it is equal to the views of the same row of the same
+    table only, so the ids of different tables and the integer ids of CompactContainer never
+    collide. The registry keeps the locations of these ids in their table.
+    """
+    __slots__ = ("table", "row")
+
+    def __init__(self, table:ContainerTable, row:int) -> None:
+        self.table:ContainerTable = table
+        self.row:int = row
+
+    @property
+    def container_id(self) -> "ContainerRow":
+        return self
+
+    def __index__(self) -> int:
+        # Index the table columns directly with the id
+        return self.row
+
+    @property
+    def label(self) -> str:
+        return f'{self._size}-{self.row}'
+
+    _container_type = _row_column_property("container_type", decode=lambda code: TYPES_BY_CODE.get(int(code)))
+    _size = _row_column_property("size", decode=lambda code: SIZES_BY_CODE.get(int(code)))
+    _dwell_time = _row_column_property("dwell_time")
+    # Positions are one-indexed, so 0 stands for an unset position
+    bay = _bay = _row_column_property("bay", _decode_position, _encode_position)
+    cell = _cell = _row_column_property("cell", _decode_position, _encode_position)
+    tier = _tier = _row_column_property("tier", _decode_position, _encode_position)
+    from_interface = _from_interface = _row_column_property("from_interface", _decode_interface, _encode_interface)
+    to_interface = _to_interface = _row_column_property("to_interface", _decode_interface, _encode_interface)
+
+    @property
+    def block(self) -> Optional[str]:
+        code = int(self.table.columns["block"][self.row])
+        return self.table.block_names[code] if code >= 0 else None
+
+    @block.setter
+    def block(self, block_name:str) -> None:
+        self.table.columns["block"][self.row] = self.table.block_code(block_name)
+
+    _block = block
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ContainerRow) and other.table is self.table and other.row == self.row
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.row))
+
+    def __str__(self):
+        return f"Container ID: {self.label}, Type: {self._container_type}, Size: {self._size}"
+
 class ContainerList:
     def __init__(self):
         self._containers:List[Container] = []
@@ -133,6 +480,12 @@ class ContainerList:
         return container
     
 class ContainerLocationRegistry:
+    """
+    Location of every container stored in the yard, keyed by container id.
+
+    The locations of ContainerRow ids are kept in the location columns of their own
+    ContainerTable instead of in the dictionary.
+    """
     _instance = None
     location_registry:Dict[str,Tuple[str, int, int, int]] = {}
     def __new__(cls):
@@ -140,6 +493,17 @@ class ContainerLocationRegistry:
             cls._instance = super(ContainerLocationRegistry, cls).__new__(cls)
         return cls._instance
 
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Forget every location, e.g. before building a new scenario in the same process.
+        """
+        cls.location_registry.clear()
+
+    @staticmethod
+    def _in_table(container_id:Any) -> bool:
+        return isinstance(container_id, ContainerRow)
+
     @classmethod
     def register_container(cls, 
                            container_id:str, 
@@ -147,22 +511,55 @@ class ContainerLocationRegistry:
                            bay:int, 
                            cell:int, 
                            tier:int) -> None:
+        if cls._in_table(container_id):
+            container_id.table.set_location(container_id.row, block, bay, cell, tier)
+            return
         cls.location_registry[container_id] = (block, bay, cell, tier)
 
     @classmethod
     def get_container_location(cls, 
                                container_id:str) -> Tuple[str, int, int, int]:
+        if cls._in_table(container_id):
+            return container_id.table.location(container_id.row)
         return cls.location_registry.get(container_id, None)
 
     @classmethod
     def remove_container(cls, 
                          container_id:str) -> None:
-        if container_id in cls.location_registry:
+        if cls._in_table(container_id):
+            container_id.table.clear_location(container_id.row)
+        elif container_id in cls.location_registry:
             del cls.location_registry[container_id]
 
+# Container representations a ContainerFactory can produce
+CONTAINER_MODES:Tuple[str, ...] = ("object", "compact", "table")
+
 class ContainerFactory:
-    @staticmethod
-    def create_container(container_type:ContainerType, 
+    """
+    Creates containers in one of the CONTAINER_MODES:
+        object: Container, string ids and validated attributes
+        compact: CompactContainer, integer ids and __slots__
+        table: a row of the factory's ContainerTable, returned as a ContainerRow view
+    The registry keeps the locations of table rows in their own table.
+    """
+    def __init__(self,
+                 mode:str="object",
+                 table:Optional[ContainerTable]=None) -> None:
+        """
+        Constructor for the container factory
+
+        @param mode: one of CONTAINER_MODES
+        @param table: table of the containers in table mode, a new one if None
+        """
+        if mode not in CONTAINER_MODES:
+            raise ValueError(f"Unknown container mode {mode}, expected one of {list(CONTAINER_MODES)}")
+        self.mode:str = mode
+        self.table:Optional[ContainerTable] = None
+        if mode == "table":
+            self.table = table if table is not None else ContainerTable()
+
+    def create_container(self,
+                         container_type:ContainerType, 
                          size:ContainerSize, 
                          additional_args=None):
         """
@@ -174,8 +571,55 @@ class ContainerFactory:
             additional_args (dict, optional): Additional arguments for container creation.
 
         Returns:
-            Container: A new container object.
+            Container, CompactContainer or ContainerRow, depending on the factory mode.
         """
         # Additional logic for container creation can be added here
         dwell_time = additional_args.get('dwell_time', 10.0) if additional_args else 10.0
-        return Container(container_type, size, dwell_time)
\ No newline at end of file
+        if self.mode == "compact":
+            return CompactContainer(container_type, size, dwell_time)
+        if self.mode == "table":
+            return ContainerRow(self.table, self.table.append(container_type, size, dwell_time))
+        return Container(container_type, size, dwell_time)
+
+    def create_batch(self,
+                     container_type:ContainerType,
+                     size:ContainerSize,
+                     n:int,
+                     dwell_time:DwellTimes=10.0,
+                     from_interface:Optional[CTInterface]=None,
+                     to_interface:Optional[CTInterface]=None) -> List:
+        """
+        Create the n containers of a whole row in one call.
+
+        Ids are reserved in one step and the attributes are assigned in bulk, without the
+        per-container constructor and setter validation of create_container.
+
+        @param container_type: type of the containers
+        @param size: size of the containers
+        @param n: number of containers
+        @param dwell_time: one dwell time, one per container, or a RandomTimeGenerator to sample n from
+        @param from_interface, to_interface: interfaces shared by the whole batch
+
+        returns the containers in id order, in the representation of the factory mode
+        """
+        if n < 0:
+            raise ValueError(f"Cannot create a batch of {n} containers")
+        dwell_times = self._dwell_times(dwell_time, n)
+        if self.mode == "compact":
+            return CompactContainer.create_batch(container_type, size, dwell_times.tolist(), from_interface, to_interface)
+        if self.mode == "table":
+            rows = self.table.append_batch(container_type, size, dwell_times, from_interface, to_interface)
+            return [ContainerRow(self.table, row) for row in rows]
+        return Container.create_batch(container_type, size, dwell_times.tolist(), from_interface, to_interface)
+
+    @staticmethod
+    def _dwell_times(dwell_time:DwellTimes,
+                     n:int) -> np.ndarray:
+        if isinstance(dwell_time, RandomTimeGenerator):
+            return dwell_time.generate(n).astype(float)
+        dwell_times = np.asarray(dwell_time, dtype=float)
+        if dwell_times.ndim == 0:
+            return np.full(n, float(dwell_times))
+        if dwell_times.shape != (n,):
+            raise ValueError(f"Expected {n} dwell times, got an array of shape {dwell_times.shape}")
+        return dwell_times
\ No newline at end of file
@@ -0,0 +1,383 @@
+import glob
+import json
+import operator
+import os
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from Scripts.Utils.port_objects_definition import *
+from Scripts.Utils.containers import SIZES_BY_CODE, TYPES_BY_CODE
+
+class EventKind(Enum):
+    VESSEL_ARRIVED = 1
+    PRE_INSPECTION_STARTED = 2
+    PRE_INSPECTION_FINISHED = 3
+    OPERATION_STARTED = 4
+    CONTAINER_DISCHARGED = 5
+    CONTAINER_LOADED = 6
+    HATCH_FINISHED = 7
+    CRANE_FINISHED = 8
+    CRANE_RELEASED = 9
+    POST_INSPECTION_STARTED = 10
+    POST_INSPECTION_FINISHED = 11
+    VESSEL_DEPARTED = 12
+
+# One record per event. Names (vessels, cranes, berths, blocks) are codes into EventTrace.names,
+# -1 when the event has none. An integer container id is stored as is, a string id as
+# -2 - its index in the container table of the chunk, and -1 stands for no container.
+# Positions are 0 and the move duration is nan when they do not apply.
+TRACE_DTYPE = np.dtype([("time", np.float64), ("kind", np.int8), ("vessel", np.int32), ("crane", np.int32),
+                        ("berth", np.int32), ("container", np.int64), ("block", np.int32), ("bay", np.int32),
+                        ("cell", np.int32), ("tier", np.int32), ("size", np.int8), ("container_type", np.int8),
+                        ("duration", np.float64)])
+TRACE_FORMATS:Tuple[str, ...] = ("npy", "parquet")
+NO_CONTAINER:int = -1
+# Records of the buffer when it is first needed, it doubles up to chunk_size
+INITIAL_BUFFER_SIZE:int = 1024
+
+def _merge_chunks(chunks:Iterator[Tuple[np.ndarray, List[str]]]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Concatenate chunks and their container tables, re-coding the string ids of every chunk
+    into one table.
+
+    returns the events and the container table of their string ids
+    """
+    codes:Dict[str, int] = {}  # merged table, in the order of first use
+    merged = []
+    for events, table in chunks:
+        if table:
+            remap = np.array([-2 - codes.setdefault(container_id, len(codes)) for container_id in table], dtype=np.int64)
+            column = events["container"]
+            strings = column <= -2
+            if strings.any():
+                events = events.copy()
+                events["container"][strings] = remap[-2 - column[strings]]
+        merged.append(events)
+    return (np.concatenate(merged) if merged else np.empty(0, dtype=TRACE_DTYPE)), list(codes)
+
+class EventTrace:
+    """
+    Structured trace of the simulation events.
+
+    Events are written into a NumPy buffer, allocated at the first event and doubled as
+    it fills up to chunk_size records. A full buffer is saved as one chunk file in
+    directory. Without a directory the chunks are dropped, unless max_events asks to keep
+    that many events in memory: the oldest chunks are dropped beyond it. String container
+    ids are interned in a table of the chunk, which is saved and emptied with it, so the
+    memory of the trace does not grow with the number of moves.
+    The names are interned for the whole trace, as the chunks refer to them by code: a
+    trace keeps every vessel name it has seen, a few dozen bytes each.
+    A text log is an optional view of the trace, see TextLogView.
+    """
+    def __init__(self,
+                 directory:Optional[str]=None,
+                 chunk_size:int=65536,
+                 file_format:str="npy",
+                 text_view:Optional["TextLogView"]=None,
+                 max_events:int=0) -> None:
+        """
+        Constructor for the event trace
+
+        @param directory: where the chunks and the name tables are written, in memory if None
+        @param chunk_size: largest number of records in the buffer, the records of a chunk
+        @param file_format: "npy", or "parquet" which needs pyarrow
+        @param text_view: view that writes every event as text lines as it is recorded
+        @param max_events: events kept in memory without a directory, besides the buffer;
+                           0 keeps none, for a trace that only feeds its text view
+        """
+        if file_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format {file_format}, expected one of {list(TRACE_FORMATS)}")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        if max_events < 0:
+            raise ValueError("max_events must not be negative")
+        self.directory:Optional[str] = directory
+        self.file_format:str = file_format
+        self.chunk_size:int = chunk_size
+        self.buffer:np.ndarray = np.empty(0, dtype=TRACE_DTYPE)
+        self.size:int = 0  # records in the buffer
+        self.num_chunks:int = 0
+        self.num_flushed:int = 0  # records in the chunks
+        self.max_events:int = max_events
+        self.num_dropped:int = 0  # records of the in-memory chunks dropped beyond max_events
+        self._chunks:Deque[Tuple[np.ndarray, List[str]]] = deque()  # flushed chunks when there is no directory
+        self._kept:int = 0  # records in _chunks
+        self.names:List[str] = []
+        self._name_codes:Dict[str, int] = {}
+        self.containers:List[str] = []  # string container ids of the buffer, by -2 - code
+        self._container_codes:Dict[str, int] = {}
+        self.text_view:Optional[TextLogView] = text_view
+        if text_view is not None:
+            text_view.trace = self
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def name_code(self, name:Optional[str]) -> int:
+        """
+        Return the code of a vessel, crane, berth or block name, interning it on first use.
+        The name is kept for the life of the trace.
+        """
+        if name is None:
+            return -1
+        code = self._name_codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self.names.append(name)
+            self._name_codes[name] = code
+        return code
+
+    def container_code(self, container_id:Any) -> int:
+        """
+        Return the code of a container id: an integer id is its own code, other ids are
+        interned in the container table of the buffer.
+        """
+        if type(container_id) is int:
+            return container_id
+        try:
+            return operator.index(container_id)
+        except TypeError:
+            pass
+        code = self._container_codes.get(container_id)
+        if code is None:
+            code = len(self.containers)
+            self.containers.append(container_id)
+            self._container_codes[container_id] = code
+        return -2 - code
+
+    def record(self,
+               kind:EventKind,
+               time:float,
+               vessel:int=-1,
+               crane:int=-1,
+               berth:int=-1,
+               container:Any=None,
+               duration:float=np.nan) -> None:
+        """
+        Record an event.
+
+        @param kind: the event kind
+        @param time: simulation time of the event
+        @param vessel, crane, berth: name codes from name_code
+        @param container: the container moved, its position is read from it
+        @param duration: duration of the move
+        """
+        if container is not None:
+            row = (time, kind.value, vessel, crane, berth, self.container_code(container.container_id),
+                   self.name_code(container.block), container.bay or 0, container.cell or 0, container.tier or 0,
+                   SIZE_CODES.get(container._size, 0), TYPE_CODES.get(container._container_type, 0), duration)
+        else:
+            row = (time, kind.value, vessel, crane, berth, NO_CONTAINER, -1, 0, 0, 0, 0, 0, duration)
+        if self.size == len(self.buffer):
+            self._grow()
+        self.buffer[self.size] = row
+        self.size += 1
+        if self.text_view is not None:
+            self.text_view.write_event(self.buffer[self.size - 1])
+        if self.size == self.chunk_size:
+            self.flush()
+
+    def _grow(self) -> None:
+        buffer = np.empty(min(self.chunk_size, max(INITIAL_BUFFER_SIZE, 2 * len(self.buffer))), dtype=TRACE_DTYPE)
+        buffer[:self.size] = self.buffer[:self.size]
+        self.buffer = buffer
+
+    def flush(self) -> None:
+        """
+        Write the buffered records as a chunk and empty the buffer.
+        """
+        if not self.size:
+            return
+        chunk = self.buffer[:self.size].copy()
+        if self.directory is None:
+            if self.max_events:
+                self._chunks.append((chunk, self.containers))
+                self._kept += len(chunk)
+            else:
+                self.num_dropped += len(chunk)
+            while self._kept > self.max_events:
+                dropped, _ = self._chunks.popleft()
+                self._kept -= len(dropped)
+                self.num_dropped += len(dropped)
+        elif self.file_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.table({name: chunk[name] for name in TRACE_DTYPE.names})
+            pq.write_table(table, os.path.join(self.directory, f"events_{self.num_chunks:06d}.parquet"))
+        else:
+            np.save(os.path.join(self.directory, f"events_{self.num_chunks:06d}.npy"), chunk)
+        if self.directory is not None and self.containers:
+            with open(os.path.join(self.directory, f"containers_{self.num_chunks:06d}.json"), "w") as containers_file:
+                json.dump(self.containers, containers_file)
+        self.containers = []
+        self._container_codes = {}
+        self.num_chunks += 1
+        self.num_flushed += self.size
+        self.size = 0
+
+    def close(self) -> None:
+        """
+        Flush the buffer and write the name table next to the chunks.
+        """
+        self.flush()
+        if self.directory is not None:
+            with open(os.path.join(self.directory, "names.json"), "w") as names_file:
+                json.dump({"names": self.names}, names_file)
+
+    def events_and_containers(self) -> Tuple[np.ndarray, List[str]]:
+        """
+        Return the events recorded so far, without those dropped beyond max_events, as one
+        structured array, and the table of their string container ids.
+        """
+        chunks = list(self._chunks) if self.directory is None else list(_load_chunks(self.directory))
+        chunks.append((self.buffer[:self.size], self.containers))
+        return _merge_chunks(chunks)
+
+    def events(self) -> np.ndarray:
+        """
+        Return the events recorded so far as one structured array.
+        """
+        return self.events_and_containers()[0]
+
+    def __len__(self) -> int:
+        return self.num_flushed + self.size
+
+def _load_chunks(directory:str) -> Iterator[Tuple[np.ndarray, List[str]]]:
+    """
+    Yield the chunks of a trace directory in order, each with its container table.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "events_*.npy")) + glob.glob(os.path.join(directory, "events_*.parquet")))
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+            chunk = np.empty(table.num_rows, dtype=TRACE_DTYPE)
+            for name in TRACE_DTYPE.names:
+                chunk[name] = table.column(name).to_numpy()
+        else:
+            chunk = np.load(path)
+        containers_path = os.path.join(directory, stem.replace("events_", "containers_") + ".json")
+        containers = []
+        if os.path.exists(containers_path):
+            with open(containers_path, "r") as containers_file:
+                containers = json.load(containers_file)
+        yield chunk, containers
+
+def load_events(directory:str) -> np.ndarray:
+    """
+    Load the chunks of a trace directory as one structured array.
+    """
+    return _merge_chunks(_load_chunks(directory))[0]
+
+def load_trace(directory:str) -> Tuple[np.ndarray, List[str], List[str]]:
+    """
+    Load a closed trace directory.
+
+    returns the events, the name table and the table of the string container ids, the
+    container code of an event is an integer id or -2 - an index into this table
+    """
+    with open(os.path.join(directory, "names.json"), "r") as names_file:
+        tables = json.load(names_file)
+    events, containers = _merge_chunks(_load_chunks(directory))
+    return events, tables["names"], containers
+
+# Text lines of each event kind, in the wording of the original text log. They are
+# %-formatted with a dictionary of fields, which Logger does in its writer thread
+TEXT_FORMATS:Dict[EventKind, Tuple[str, ...]] = {
+    EventKind.VESSEL_ARRIVED: ("The %(vessel)s is arrived at %(time)s",),
+    EventKind.PRE_INSPECTION_STARTED: ("The %(vessel)s started the pre-inspection at %(time)s",),
+    EventKind.PRE_INSPECTION_FINISHED: ("The %(vessel)s finished the pre-inspection at %(time)s",),
+    EventKind.OPERATION_STARTED: ("The %(vessel)s is started the operation at %(time)s",),
+    EventKind.CONTAINER_DISCHARGED: ("%(crane)s spent %(minutes)s minutes to move a %(container)s",
+                                     "%(crane)s moved a container from %(vessel)s at %(time)s"),
+    EventKind.CONTAINER_LOADED: ("%(crane)s spent %(minutes)s minutes to move a %(container)s",
+                                 "%(crane)s moved a container from %(vessel)s at %(time)s"),
+    EventKind.HATCH_FINISHED: ("%(crane)s finished a hatch and moving on to next, if any",),
+    EventKind.CRANE_FINISHED: ("No more hatches left, %(crane)s has completed all tasks for %(vessel)s at %(time)s",),
+    EventKind.CRANE_RELEASED: ("The %(crane)s is released from the %(vessel)s at %(time)s",),
+    EventKind.POST_INSPECTION_STARTED: ("The %(vessel)s starts the post_pcat inspection at %(time)s",),
+    EventKind.POST_INSPECTION_FINISHED: ("The %(vessel)s finished the post_pcat inspection at %(time)s",),
+    EventKind.VESSEL_DEPARTED: ("%(berth)s has completed all tasks for %(vessel)s at %(time)s",
+                                "%(vessel)s leaving the berth at %(time)s"),
+}
+KINDS_BY_VALUE:Dict[int, EventKind] = {kind.value: kind for kind in EventKind}
+
+class TextLogView:
+    """
+    Text log lines of trace events, in the format of the original text log. It formats
+    lines only when asked: live, for every recorded event when attached to an EventTrace
+    with a logger, or afterwards over the events of a trace:
+        trace = EventTrace(text_view=TextLogView(logger=logger))
+    """
+    def __init__(self,
+                 trace:Optional[EventTrace]=None,
+                 logger:Any=None) -> None:
+        """
+        @param trace: the trace whose name tables are used, set by the trace it is given to
+        @param logger: object with a log(message, args=...) method that receives the lines of write_event
+        """
+        self.trace:Optional[EventTrace] = trace
+        self.logger:Any = logger
+
+    def _container_text(self, record:np.void, containers:List[str]) -> str:
+        code = int(record["container"])
+        if code == NO_CONTAINER:
+            return "container"
+        size = SIZES_BY_CODE.get(int(record["size"]))
+        label = containers[-2 - code] if code < 0 else f"{size}-{code}"
+        return f"Container ID: {label}, Type: {TYPES_BY_CODE.get(int(record['container_type']))}, Size: {size}"
+
+    def lines(self,
+              record:np.void,
+              containers:Optional[List[str]]=None) -> List[str]:
+        """
+        Return the text lines of one event record.
+
+        @param containers: the container table of the record, the one of the trace buffer if None
+        """
+        fields = self.fields(record, containers)
+        return [line % fields for line in TEXT_FORMATS[KINDS_BY_VALUE[int(record["kind"])]]]
+
+    def fields(self,
+               record:np.void,
+               containers:Optional[List[str]]=None) -> Dict[str, Any]:
+        """
+        Return the values of the placeholders of TEXT_FORMATS for one event record.
+
+        @param containers: the container table of the record, the one of the trace buffer if None
+        """
+        names = self.trace.names
+        kind = KINDS_BY_VALUE[int(record["kind"])]
+        fields = {"time": float(record["time"]),
+                  "vessel": names[record["vessel"]] if record["vessel"] >= 0 else None,
+                  "crane": names[record["crane"]] if record["crane"] >= 0 else None,
+                  "berth": names[record["berth"]] if record["berth"] >= 0 else None}
+        if kind in (EventKind.CONTAINER_DISCHARGED, EventKind.CONTAINER_LOADED):
+            fields["minutes"] = float(record["duration"]) / 60
+            fields["container"] = self._container_text(record, self.trace.containers if containers is None else containers)
+        return fields
+
+    def write_event(self, record:np.void) -> None:
+        """
+        Pass the lines of an event record to the logger, as formats and fields so that the
+        logger formats them when it writes them. Nothing is built if the logger drops them.
+        """
+        if self.logger is None or not self.logger.enabled():
+            return
+        fields = self.fields(record)
+        for line in TEXT_FORMATS[KINDS_BY_VALUE[int(record["kind"])]]:
+            self.logger.log(line, args=fields)
+
+    def iter_lines(self,
+                   events:Optional[np.ndarray]=None,
+                   containers:Optional[List[str]]=None) -> Iterator[str]:
+        """
+        Yield the text lines of the events, all the events kept by the trace if None.
+
+        @param containers: the container table of the events, e.g. from load_trace
+        """
+        if events is None:
+            events, containers = self.trace.events_and_containers()
+        for record in events:
+            yield from self.lines(record, containers)
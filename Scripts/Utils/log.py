@@ -1,35 +1,164 @@
+import atexit
+import itertools
 import logging
-from typing import Any, Optional
+import logging.handlers
+import queue
+import threading
+from typing import Any, Callable, List, Mapping, Optional, TextIO
 import os
 
+_logger_ids = itertools.count()
+_quiet:bool = False
+
+def set_quiet(quiet:bool=True) -> None:
+    """
+    Silence, or restore, the console output of the simulation in this process.
+
+    @param quiet: True for batch and replication runs
+    """
+    global _quiet
+    _quiet = quiet
+
+def is_quiet() -> bool:
+    return _quiet
+
+def console(message:str,
+            *args:Any) -> None:
+    """
+    Print a message to the console unless the output is silenced by set_quiet. The
+    message is %-formatted with args only when it is printed.
+
+    @params message: message, with % placeholders for args
+    @params args: values of the placeholders
+    """
+    if not _quiet:
+        print(message % args if args else message)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves the formatting of the records to the writer thread. The
+    arguments of a record are plain values, so it is safe to format them later.
+    """
+    def prepare(self, record:logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class _BatchWriter(threading.Thread):
+    """
+    Thread that takes the records off the queue, formats them and writes them to the
+    log file in batches of up to batch_size records. It closes the file when it stops.
+    A record that fails to format goes to handle_error, like in logging.Handler, and the
+    rest of the batch is still written.
+    """
+    def __init__(self,
+                 records:queue.SimpleQueue,
+                 output:TextIO,
+                 formatter:logging.Formatter,
+                 batch_size:int,
+                 handle_error:Callable[[logging.LogRecord], None]) -> None:
+        super().__init__(name=f"Logger({output.name})", daemon=True)
+        self.records:queue.SimpleQueue = records
+        self.output:TextIO = output
+        self.formatter:logging.Formatter = formatter
+        self.batch_size:int = batch_size
+        self.handle_error:Callable[[logging.LogRecord], None] = handle_error
+
+    def _format(self, batch:List[logging.LogRecord]) -> str:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record) + "\n")
+            except Exception:
+                self.handle_error(record)
+        return "".join(lines)
+
+    def run(self) -> None:
+        with self.output as output:
+            stopped = False
+            while not stopped:
+                batch:List[logging.LogRecord] = [self.records.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.records.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    # close() queues None after the last record
+                    batch = batch[:batch.index(None)]
+                    stopped = True
+                text = self._format(batch)
+                if text:
+                    output.write(text)
+                    output.flush()
+
 class Logger:
     """Class for logging all the events"""
-    def __init__(self, 
-                 log_file:str, 
-                 log_level:int=logging.INFO) -> None:
+    def __init__(self,
+                 log_file:str,
+                 log_level:int=logging.INFO,
+                 batch_size:int=1024) -> None:
         """
         Constructor for the class logger
 
+        Every Logger has its own logging.Logger and file, the global logging configuration
+        is left alone. Messages are queued from the simulation and written by a background
+        thread; they are formatted there, and not at all below log_level.
+
         @params log_file: file name to be written
         @params log_level: if its info, warning etc.,
+        @params batch_size: maximum number of records written at once by the writer thread
         """
         self.log_file = log_file
         self.log_level = log_level
 
         # Create the directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
-        
-        # Configure the logging system in the constructor
-        logging.basicConfig(filename=self.log_file, level=self.log_level, format='%(asctime)s - %(levelname)s: %(message)s')
+        os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+
+        self._records:queue.SimpleQueue = queue.SimpleQueue()
+        handler = _DeferredQueueHandler(self._records)
+        self._writer:Optional[_BatchWriter] = _BatchWriter(self._records, open(self.log_file, "a"),
+                                                           logging.Formatter('%(asctime)s - %(levelname)s: %(message)s'),
+                                                           batch_size, handler.handleError)
+        self._writer.start()
+        self._logger = logging.getLogger(f"{__name__}.Logger{next(_logger_ids)}")
+        self._logger.setLevel(self.log_level)
+        self._logger.propagate = False
+        self._logger.addHandler(handler)
+        atexit.register(self.close)
 
-    def log(self, 
-            message:Any, 
-            log_level=logging.INFO) -> None:
+    def enabled(self,
+                log_level:int=logging.INFO) -> bool:
+        """
+        Return if messages of log_level are written, so that callers can skip building them.
+        """
+        return self._writer is not None and self._logger.isEnabledFor(log_level)
+
+    def log(self,
+            message:Any,
+            log_level=logging.INFO,
+            args:Any=()) -> None:
         """
         Method to log the message.
 
-        @params message: message to be logged
+        @params message: message to be logged, with % placeholders for args
         @params log_level: WARNING, INFO etc.,
+        @params args: tuple or mapping of the placeholder values, formatted by the writer thread
         """
         # Log a message with the specified log level
-        logging.log(log_level, message)
\ No newline at end of file
+        if self._writer is not None:
+            if isinstance(args, Mapping):
+                self._logger.log(log_level, message, args)
+            else:
+                self._logger.log(log_level, message, *args)
+
+    def close(self) -> None:
+        """
+        Write the queued messages and stop the writer thread. Messages logged afterwards are dropped.
+        """
+        if self._writer is None:
+            return
+        self._records.put(None)
+        self._writer.join()
+        self._writer = None
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+        atexit.unregister(self.close)
@@ -0,0 +1,68 @@
+import math
+from typing import Optional
+import simpy
+
+class TimeWeightedMonitor:
+    """
+    Time-weighted integral of a value that changes in steps, such as the number of users
+    of a resource or of containers in a block.
+
+    The monitor is updated only when the value changes and never polls. It keeps the sum
+    of the changes and the sum of the changes weighted by their time, so that the integral
+    up to any time T after the changes is
+        initial * (T - start) + sum(delta * (T - time)) = initial * (T - start) + (value - initial) * T - sum(delta * time)
+    Updates and queries are O(1), and the changes may be recorded out of time order, as a
+    coarse crane does when it places the containers of a row after the fact.
+    """
+    def __init__(self,
+                 env:simpy.Environment,
+                 value:float=0.0) -> None:
+        """
+        @param env: the simulation environment, its clock times the changes
+        @param value: the value at the current simulation time
+        """
+        self.env:simpy.Environment = env
+        self.start_time:float = env.now
+        self.initial:float = value
+        self.value:float = value
+        self._weighted_changes:float = 0.0
+
+    def change(self,
+               delta:float,
+               time:Optional[float]=None) -> None:
+        """
+        Change the value by delta.
+
+        @param delta: the change
+        @param time: simulation time of the change, env.now if None
+        """
+        self.value += delta
+        self._weighted_changes += delta * (self.env.now if time is None else time)
+
+    def set(self,
+            value:float,
+            time:Optional[float]=None) -> None:
+        """
+        Set the value.
+        """
+        if value != self.value:
+            self.change(value - self.value, time)
+
+    def integral(self,
+                 time:Optional[float]=None) -> float:
+        """
+        Return the integral of the value from the start of the monitor to time, env.now if
+        None. The time must not be earlier than the last change.
+        """
+        time = self.env.now if time is None else time
+        return self.initial * (time - self.start_time) + (self.value - self.initial) * time - self._weighted_changes
+
+    def mean(self,
+             time:Optional[float]=None) -> float:
+        """
+        Return the time average of the value from the start of the monitor to time, env.now
+        if None, or nan before any time has passed.
+        """
+        time = self.env.now if time is None else time
+        elapsed = time - self.start_time
+        return self.integral(time) / elapsed if elapsed > 0 else math.nan
@@ -16,4 +16,8 @@ class CTInterface(Enum):
     VESSEL_INTERFACE = auto()
     GATE_INTERFACE = auto()
     YARD_INTERFACE = auto()
-    RAIL_INTERFACE = auto()
\ No newline at end of file
+    RAIL_INTERFACE = auto()
+
+# Integer codes of the enums, used by array based storage. 0 always means empty.
+SIZE_CODES = {ContainerSize.TWENTY_FT: 1, ContainerSize.FORTY_FT: 2}
+TYPE_CODES = {ContainerType.LADEN: 1, ContainerType.EMPTY: 2}
\ No newline at end of file
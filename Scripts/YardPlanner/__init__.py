@@ -1,3 +1,4 @@
-from .blocks import Block, BlockFactory
-from .container_placement_rule import ContainerPlacementStrategy
+from .blocks import Block, BlockFactory, BlockOccupancy
+from .array_block import ArrayBlock
+from .container_placement_rule import ContainerPlacementStrategy, ScoredPlacementStrategy, get_placement_strategy
 from .yard_planner import YardPlanner
\ No newline at end of file
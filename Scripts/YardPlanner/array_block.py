@@ -0,0 +1,146 @@
+import simpy
+from typing import List, Optional, Tuple
+import numpy as np
+import matplotlib.pyplot as plt
+from Scripts.Utils.port_objects_definition import *
+from Scripts.Utils.containers import Container
+from Scripts.YardPlanner.blocks import Block, availability_mask
+
+EMPTY_SLOT:int = 0
+
+class ArrayBlock(Block):
+    """
+    Block whose yard is stored in numpy arrays instead of nested lists of stacks.
+
+    Arrays are indexed [bay - 1, cell - 1] so the public bay and cell numbers stay one-indexed:
+        heights: stack height of every (bay, cell)
+        slots: index of the container on each tier, -1 when the tier is empty
+        size_mask: EMPTY_SLOT or the SIZE_CODES value of the containers in the stack
+        types, due: TYPE_CODES value and due time of the container on each tier
+        top_type: TYPE_CODES value of the top container of every stack
+    The block behaves like Block for storing and retrieving containers, and can answer
+    availability questions for a whole bay or block as one vectorized mask.
+    """
+    def __init__(self,
+                 env:simpy.Environment,
+                 capacity:int,
+                 name:str) -> None:
+        self.slots:np.ndarray = np.full((0, 0, 0), -1, dtype=np.int64)
+        self.types:np.ndarray = np.zeros((0, 0, 0), dtype=np.int8)
+        self.due:np.ndarray = np.full((0, 0, 0), np.inf)
+        self._containers:List[Optional[Container]] = []
+        self._free_indices:List[int] = []
+        super().__init__(env, capacity, name)
+
+    @property
+    def matrix(self) -> None:
+        # There is no stack matrix, the yard lives in heights, slots and size_mask
+        return None
+
+    def update_matrix(self) -> None:
+        if self.num_containers:
+            raise ValueError(f"Cannot resize {self.name} while it holds {self.num_containers} containers")
+        shape = (self.num_bay_positions, self._num_cells)
+        self._allocate_occupancy()
+        self.slots = np.full(shape + (self._num_tiers,), -1, dtype=np.int64)
+        self.types = np.zeros(shape + (self._num_tiers,), dtype=np.int8)
+        self.due = np.full(shape + (self._num_tiers,), np.inf)
+        self._containers = []
+        self._free_indices = []
+        self._rebuild_slot_index()
+
+    def _rebuild_slot_index(self) -> None:
+        for size in ContainerSize:
+            self._available[size] = availability_mask(self.heights, self._num_tiers, size)
+            rows, cols = np.nonzero(self._available[size])
+            self._free_slots[size] = set(zip((rows + 1).tolist(), (cols + 1).tolist()))
+            # np.nonzero returns the slots in scan order, which is already a valid heap
+            self._free_slot_heaps[size] = list(zip((rows + 1).tolist(), (cols + 1).tolist()))
+
+    def _stack_height(self,
+                      bay:int,
+                      cell:int) -> int:
+        return int(self.heights[bay - 1, cell - 1])
+
+    def _push(self,
+              bay:int,
+              cell:int,
+              container:Container,
+              overstack:bool=False) -> None:
+        height = int(self.heights[bay - 1, cell - 1])
+        if height >= self._num_tiers and not overstack:
+            raise Exception("Stack overflow: Attempted to exceed stack max size")
+        if height >= self.slots.shape[2]:
+            # Temporary over-stacking needs one more tier than the block was built with
+            extra_shape = self.slots.shape[:2] + (1,)
+            self.slots = np.concatenate((self.slots, np.full(extra_shape, -1, dtype=np.int64)), axis=2)
+            self.types = np.concatenate((self.types, np.zeros(extra_shape, dtype=np.int8)), axis=2)
+            self.due = np.concatenate((self.due, np.full(extra_shape, np.inf)), axis=2)
+        if self._free_indices:
+            index = self._free_indices.pop()
+            self._containers[index] = container
+        else:
+            index = len(self._containers)
+            self._containers.append(container)
+        self.slots[bay - 1, cell - 1, height] = index
+        self.types[bay - 1, cell - 1, height] = TYPE_CODES.get(container._container_type, EMPTY_SLOT)
+        self.top_type[bay - 1, cell - 1] = self.types[bay - 1, cell - 1, height]
+        self.due[bay - 1, cell - 1, height] = self.due_times.get(container.container_id, np.inf)
+        self.min_due[bay - 1, cell - 1] = min(self.min_due[bay - 1, cell - 1], self.due[bay - 1, cell - 1, height])
+        self.heights[bay - 1, cell - 1] = height + 1
+        self.size_mask[bay - 1, cell - 1] = SIZE_CODES.get(container._size, EMPTY_SLOT)
+        self._refresh_slots(bay, cell)
+
+    def _pop(self,
+             bay:int,
+             cell:int) -> Container:
+        height = int(self.heights[bay - 1, cell - 1])
+        if height == 0:
+            raise IndexError(f"The stack ({bay}, {cell}) of {self.name} is empty")
+        index = int(self.slots[bay - 1, cell - 1, height - 1])
+        container = self._containers[index]
+        self._containers[index] = None
+        self._free_indices.append(index)
+        self.slots[bay - 1, cell - 1, height - 1] = -1
+        self.types[bay - 1, cell - 1, height - 1] = EMPTY_SLOT
+        self.due[bay - 1, cell - 1, height - 1] = np.inf
+        self.min_due[bay - 1, cell - 1] = self.due[bay - 1, cell - 1].min()
+        self.heights[bay - 1, cell - 1] = height - 1
+        self.top_type[bay - 1, cell - 1] = self.types[bay - 1, cell - 1, height - 2] if height > 1 else EMPTY_SLOT
+        if height == 1:
+            self.size_mask[bay - 1, cell - 1] = EMPTY_SLOT
+        self._refresh_slots(bay, cell)
+        return container
+
+    def stack_contents(self,
+                       bay:int,
+                       cell:int) -> List[Container]:
+        """
+        Return the containers of a stack, bottom first.
+        """
+        indices = self.slots[bay - 1, cell - 1, :self.heights[bay - 1, cell - 1]]
+        return [self._containers[index] for index in indices.tolist()]
+
+    def _find_next_cell_with_space(self,
+                                   bay:int,
+                                   current_cell:int) -> int:
+        if self._num_cells < 2:
+            return current_cell
+        heights = self.heights[bay - 1].astype(np.int64)
+        heights[current_cell - 1] = np.iinfo(np.int64).max
+        # argmin returns the first cell with the fewest containers, like the scan in Block
+        return int(np.argmin(heights)) + 1
+
+    def visualize_block_matrix_3d(self):
+        fig = plt.figure()
+        ax = fig.add_subplot(111, projection='3d')
+
+        bays, cells = np.nonzero(self.heights)
+        if len(bays):
+            ax.bar3d(bays, cells, 0, 1, 1, self.heights[bays, cells], color='blue', shade=True)
+
+        ax.set_title('3D Block Container Layout')
+        ax.set_xlabel('Bays')
+        ax.set_ylabel('Cells')
+        ax.set_zlabel('Tiers')
+        plt.show()
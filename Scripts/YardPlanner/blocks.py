@@ -1,17 +1,54 @@
-from Scripts.Utils.basic_objects import FilterStore
+from Scripts.Utils.basic_objects import IndexedStore
+from Scripts.Utils.monitors import TimeWeightedMonitor
 import simpy
-from typing import List, Any, Dict, Tuple, Optional
+import heapq
+from typing import List, Any, Dict, Tuple, Optional, NamedTuple
 from Scripts.Utils.port_objects_definition import *
 from Scripts.Utils.containers import Container, ContainerLocationRegistry
 from Scripts.Utils.basic_data_structures import OneIndexedList, Stack
+from Scripts.YardPlanner.retrieval_planner import RetrievalPlan, RetrievalMove, RETRIEVE, plan_bay_retrieval
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 
-class Block(FilterStore):
+class BlockOccupancy(NamedTuple):
+    """
+    Array view of a block, indexed [bay - 1, cell - 1].
+    """
+    heights: np.ndarray     # stack height
+    size_mask: np.ndarray   # SIZE_CODES of the stacked containers, 0 when empty
+    top_type: np.ndarray    # TYPE_CODES of the top container, 0 when empty
+    min_due: np.ndarray     # earliest due time of the stacked containers, inf when empty
+    num_tiers: int
+
+def availability_mask(heights:np.ndarray,
+                      num_tiers:int,
+                      size:ContainerSize) -> np.ndarray:
+    """
+    Vectorized form of Block._is_20ft_bay_available / _is_40ft_bay_available.
+
+    @@params heights: stack heights indexed [bay - 1, cell - 1]
+    @@params num_tiers: the maximum stack height
+    @@params size: The container size
+
+    returns the boolean mask of the slots a container of the size can be stored in
+    """
+    occupied = heights > 0
+    # A stack blocks the slots in the neighbouring bay positions of the same cell
+    blocked = np.zeros_like(occupied)
+    blocked[1:] |= occupied[:-1]
+    blocked[:-1] |= occupied[1:]
+    mask = (heights < num_tiers) & ~blocked
+    # Odd bays (even row indices) take 20ft containers, even bays take 40ft ones
+    parity = np.zeros(heights.shape[0], dtype=bool)
+    parity[0 if size == ContainerSize.TWENTY_FT else 1::2] = True
+    return mask & parity[:, None]
+
+class Block(IndexedStore):
     """
     This class executes the functionalites of the blocks in the container
-    terminal port.
+    terminal port. The stored containers are indexed by container id, and
+    get(container_id) is an event that waits until the container is in the block.
     """
     def __init__(self,
                  env:simpy.Environment,
@@ -25,6 +62,29 @@ class Block(FilterStore):
         self._num_tiers:int = 0
         self.location_registry:ContainerLocationRegistry = ContainerLocationRegistry()
         self._matrix:OneIndexedList[OneIndexedList[Stack[Container]]] = None
+        self.num_containers:int = 0
+        self.occupancy_monitor:TimeWeightedMonitor = TimeWeightedMonitor(env)  # containers in the block over time
+        self.due_times:Dict[str, float] = {}  # Time each stored container is expected to leave
+        self.distance_to_berth:float = 0.0  # Distance from the quay to the first bay, in meters
+        # Free (bay, cell) slots per container size, as min-heaps in placement scan order.
+        # Heap entries are removed lazily, the sets hold the slots that are really free.
+        self._free_slot_heaps:Dict[ContainerSize, List[Tuple[int, int]]] = {size: [] for size in ContainerSize}
+        self._free_slots:Dict[ContainerSize, set] = {size: set() for size in ContainerSize}
+        self._allocate_occupancy()
+
+    def _allocate_occupancy(self) -> None:
+        """
+        Allocate the empty occupancy arrays of the block, indexed [bay - 1, cell - 1]. They
+        are kept up to date stack by stack in _push and _pop, so the vectorized placement
+        strategies read them without a scan of the block.
+        """
+        shape = (self.num_bay_positions, self._num_cells)
+        self.heights:np.ndarray = np.zeros(shape, dtype=np.int32)
+        self.size_mask:np.ndarray = np.zeros(shape, dtype=np.int8)
+        self.top_type:np.ndarray = np.zeros(shape, dtype=np.int8)
+        self.min_due:np.ndarray = np.full(shape, np.inf)
+        # Slots a container of each size can be stored in, kept with the free slot index
+        self._available:Dict[ContainerSize, np.ndarray] = {size: np.zeros(shape, dtype=bool) for size in ContainerSize}
 
     @property
     def num_bays(self) -> int:
@@ -66,23 +126,220 @@ class Block(FilterStore):
     def matrix(self) -> List[List[List[Optional[str]]]]:
         return self._matrix
     
+    @property
+    def num_bay_positions(self) -> int:
+        # Odd positions hold 20ft stacks and the even positions between them 40ft stacks
+        return max(self._num_bays * 2 - 1, 0)
+
+    def configure(self,
+                  num_bays:int,
+                  num_cells:int,
+                  num_tiers:int) -> None:
+        """
+        Set all the block dimensions at once and build the storage a single time.
+
+        @@params num_bays: The number of 20ft bays
+        @@params num_cells: The number of cells (rows) per bay
+        @@params num_tiers: The maximum stack height
+        """
+        for label, value in (("bays", num_bays), ("cells", num_cells), ("tiers", num_tiers)):
+            if not isinstance(value, int):
+                raise ValueError(f"{label} must be an integer")
+        self._num_bays = num_bays
+        self._num_cells = num_cells
+        self._num_tiers = num_tiers
+        self.update_matrix()
+
     def update_matrix(self) -> None:
+        if self.num_containers:
+            raise ValueError(f"Cannot resize {self.name} while it holds {self.num_containers} containers")
         self._matrix = OneIndexedList([OneIndexedList([Stack(self._num_tiers) for _ in range(self._num_cells)]) for _ in range(self._num_bays * 2 - 1)])
+        self._allocate_occupancy()
+        self._rebuild_slot_index()
+
+    @staticmethod
+    def _slot_size(bay:int) -> ContainerSize:
+        # 20ft containers sit in the odd bays, 40ft containers span the even bays
+        return ContainerSize.TWENTY_FT if bay % 2 else ContainerSize.FORTY_FT
+
+    def _is_slot_available(self,
+                           bay:int,
+                           cell:int) -> bool:
+        if self._slot_size(bay) == ContainerSize.TWENTY_FT:
+            return self._is_20ft_bay_available(bay, cell)
+        return self._is_40ft_bay_available(bay, cell)
 
-    def put(self, 
-            container: Container) -> simpy.Event:
+    def _rebuild_slot_index(self) -> None:
         """
-        Put a container into the FilterStore.
-        This method can be customized to include additional logic.
+        Rebuild the free slot index of both container sizes from the matrix.
         """
-        print(f"Adding container {container.container_id} to the store.")
-        return super().put(container)
-    
+        for size in ContainerSize:
+            self._free_slots[size] = set()
+        for bay in range(1, self.num_bay_positions + 1):
+            size = self._slot_size(bay)
+            free_slots = self._free_slots[size]
+            available = self._available[size]
+            for cell in range(1, self._num_cells + 1):
+                available[bay - 1, cell - 1] = self._is_slot_available(bay, cell)
+                if available[bay - 1, cell - 1]:
+                    free_slots.add((bay, cell))
+        for size in ContainerSize:
+            self._free_slot_heaps[size] = list(self._free_slots[size])
+            heapq.heapify(self._free_slot_heaps[size])
+
+    def _refresh_slots(self,
+                       bay:int,
+                       cell:int) -> None:
+        """
+        Update the free slot index after the stack at (bay, cell) changed. Only the
+        stack itself and the neighbouring bays of the same cell can change availability.
+        """
+        for neighbour_bay in (bay - 1, bay, bay + 1):
+            if not 1 <= neighbour_bay <= self.num_bay_positions:
+                continue
+            size = self._slot_size(neighbour_bay)
+            slot = (neighbour_bay, cell)
+            free_slots = self._free_slots[size]
+            available = self._is_slot_available(neighbour_bay, cell)
+            self._available[size][neighbour_bay - 1, cell - 1] = available
+            if available:
+                if slot not in free_slots:
+                    free_slots.add(slot)
+                    heapq.heappush(self._free_slot_heaps[size], slot)
+            else:
+                free_slots.discard(slot)
+
+    def first_available_slot(self,
+                             size:ContainerSize) -> Optional[Tuple[int, int]]:
+        """
+        Return the first free (bay, cell) slot for the container size, in the order a
+        bay by bay, cell by cell scan of the block visits them, or None if the block is full.
+
+        @@params size: The container size
+        """
+        heap = self._free_slot_heaps[size]
+        free_slots = self._free_slots[size]
+        while heap and heap[0] not in free_slots:
+            heapq.heappop(heap)
+        if len(heap) > 2 * len(free_slots) + 64:
+            # Compact once stale entries dominate the heap
+            heap[:] = list(free_slots)
+            heapq.heapify(heap)
+        return heap[0] if heap else None
+
+    def average_occupancy(self,
+                          time:Optional[float]=None) -> float:
+        """
+        Time-averaged number of containers in the block, up to time or env.now.
+        """
+        return self.occupancy_monitor.mean(time)
+
+    def average_fill(self,
+                     time:Optional[float]=None) -> float:
+        """
+        Time-averaged share of the block's bay, cell and tier slots holding a container.
+        """
+        return self.occupancy_monitor.mean(time) / (self._num_bays * self._num_cells * self._num_tiers)
+
+    def occupancy(self) -> BlockOccupancy:
+        """
+        Return the array view of the block used by the vectorized placement strategies.
+        The arrays are the block's own, kept up to date as containers move: read them only.
+        """
+        return BlockOccupancy(self.heights, self.size_mask, self.top_type, self.min_due, self._num_tiers)
+
+    def available_mask(self,
+                       size:ContainerSize,
+                       bay:Optional[int]=None) -> np.ndarray:
+        """
+        Return the boolean mask of the slots a container of the given size can be stored in.
+
+        @@params size: The container size
+        @@params bay: Restrict the mask to this bay, the whole block otherwise
+
+        returns an array of shape (bay positions, cells), or (cells,) for a single bay, to read only
+        """
+        mask = self._available[size]
+        if bay is not None:
+            return mask[bay - 1]
+        return mask
+
+    def _stack_height(self,
+                      bay:int,
+                      cell:int) -> int:
+        return len(self._matrix[bay][cell])
+
+    def stack_contents(self,
+                       bay:int,
+                       cell:int) -> List[Container]:
+        """
+        Return the containers of a stack, bottom first.
+        """
+        return list(self._matrix[bay][cell].items)
+
+    def _push(self,
+              bay:int,
+              cell:int,
+              container:Container,
+              overstack:bool=False) -> None:
+        """
+        Push the container on the stack at (bay, cell) and refresh the free slot index.
+
+        @@params overstack: allow the stack to exceed the tier limit temporarily
+        """
+        stack = self._matrix[bay][cell]
+        if overstack:
+            stack.allow_temp_overstack()
+        stack.push(container)
+        if overstack:
+            stack.disallow_temp_overstack()
+        self._update_stack_occupancy(bay, cell)
+        self._refresh_slots(bay, cell)
+
+    def _pop(self,
+             bay:int,
+             cell:int) -> Container:
+        """
+        Pop the top container of the stack at (bay, cell) and refresh the free slot index.
+
+        raises IndexError if the stack is empty
+        """
+        if not self._matrix[bay][cell].items:
+            raise IndexError(f"The stack ({bay}, {cell}) of {self.name} is empty")
+        container = self._matrix[bay][cell].pop()
+        self._update_stack_occupancy(bay, cell)
+        self._refresh_slots(bay, cell)
+        return container
+
+    def _update_stack_occupancy(self,
+                                bay:int,
+                                cell:int) -> None:
+        """
+        Refresh the occupancy arrays of the stack at (bay, cell), in O(tiers).
+        """
+        items = self._matrix[bay][cell].items
+        self.heights[bay - 1, cell - 1] = len(items)
+        if items:
+            self.size_mask[bay - 1, cell - 1] = SIZE_CODES.get(items[-1]._size, 0)
+            self.top_type[bay - 1, cell - 1] = TYPE_CODES.get(items[-1]._container_type, 0)
+            self.min_due[bay - 1, cell - 1] = min(self.due_times.get(item.container_id, np.inf) for item in items)
+        else:
+            self.size_mask[bay - 1, cell - 1] = 0
+            self.top_type[bay - 1, cell - 1] = 0
+            self.min_due[bay - 1, cell - 1] = np.inf
+
     def store_container(self, 
                         container:Container, 
                         size:ContainerSize, 
                         bay:int, 
-                        cell:int) -> bool:
+                        cell:int,
+                        time:Optional[float]=None) -> bool:
+        """
+        Store the container on top of the stack at bay and cell.
+
+        @@params time: simulation time of the store, used for the due time. Defaults to env.now,
+                       callers that apply a batch of moves after the fact pass the time of each move.
+        """
         if size == ContainerSize.TWENTY_FT:
             if not self._is_20ft_bay_available(bay, cell):
                 return False
@@ -91,26 +348,29 @@ class Block(FilterStore):
                 return False
         
         # Store container in the specified bay and cell, on the top of the stack
-        self._matrix[bay][cell].push(container)
+        self.due_times[container.container_id] = (self.env.now if time is None else time) + container._dwell_time
+        self._push(bay, cell, container)
+        self.num_containers += 1
+        self.occupancy_monitor.change(1, time)
         container.bay = bay
         container.cell = cell
-        container.tier = len(self._matrix[bay][cell])
+        container.tier = self._stack_height(bay, cell)
         container.block = self.name
         self.location_registry.register_container(container.container_id, self.name, bay, cell, container.tier)
         #self.location_registry[container.container_id] = (self.name, bay, cell, container.tier)
         #self.env.process(self.put(container))
-        self.put(container)
+        self.add(container)
         return True
     
     def _is_20ft_bay_available(self, 
                                bay:int, 
                                cell:int) -> bool:
         # Check adjacent even bays
-        if bay > 1 and self._matrix[bay - 1][cell]:  # Check lower even bay
+        if bay > 1 and self._stack_height(bay - 1, cell):  # Check lower even bay
             return False
-        if bay < len(self._matrix) and self._matrix[bay + 1][cell]:  # Check upper even bay
+        if bay < self.num_bay_positions and self._stack_height(bay + 1, cell):  # Check upper even bay
             return False
-        if len(self._matrix[bay][cell]) >= self._num_tiers:
+        if self._stack_height(bay, cell) >= self._num_tiers:
             return False
         return True
 
@@ -120,11 +380,11 @@ class Block(FilterStore):
         # Check lower and upper odd bays for 40ft container
         lower_bay = bay - 1
         upper_bay = bay + 1
-        if lower_bay > 0 and self._matrix[lower_bay][cell]:
+        if lower_bay > 0 and self._stack_height(lower_bay, cell):
             return False
-        if upper_bay <= len(self._matrix) and self._matrix[upper_bay][cell]:
+        if upper_bay <= self.num_bay_positions and self._stack_height(upper_bay, cell):
             return False
-        if len(self._matrix[bay][cell]) >= self._num_tiers:
+        if self._stack_height(bay, cell) >= self._num_tiers:
             return False
         return True
     
@@ -132,55 +392,149 @@ class Block(FilterStore):
                            container_id:str, 
                            bay:int, 
                            cell:int) -> Container:
-        # Define a filter function based on container ID
-        def container_filter(container):
-            return container.container_id == container_id
-
-        # Use the get method with the filter function
-        #get_event = self.get(container_filter)
-        # Process the get event in the SimPy environment
-        #yield get_event
-
-        target_stack = self._matrix[bay][cell]
-
         # Dig for the container
         container_found = False
-        while not container_found and target_stack.items:
-            current_container = target_stack.pop()
+        while not container_found and self._stack_height(bay, cell):
+            current_container = self._pop(bay, cell)
             if current_container.container_id == container_id:
                 container_found = True
+                self._release_container(container_id)
             else:
                 temp_cell = self._find_next_cell_with_space(bay, cell)
                 # Allow temporary over-stacking in the temporary cell
-                self._matrix[bay][temp_cell].allow_temp_overstack()
-                self._matrix[bay][temp_cell].push(current_container)
-                current_container.tier = len(self._matrix[bay][temp_cell])
-                current_container.bay = self._matrix[bay]
-                current_container.cell = self._matrix[bay][temp_cell]
+                self._push(bay, temp_cell, current_container, overstack=True)
+                current_container.tier = self._stack_height(bay, temp_cell)
+                current_container.bay = bay
+                current_container.cell = temp_cell
                 self.location_registry.register_container(current_container.container_id, self.name, current_container._bay, current_container._cell, current_container._tier)
 
-                # Disallow temporary over-stacking after operation
-                self._matrix[bay][temp_cell].disallow_temp_overstack()
-
         # # Handle case where container is not found
         if not container_found:
         #     # Move containers back from temp_cell to original cell
         #     while self._matrix[bay][temp_cell].items:
         #         target_stack.push(self._matrix[bay][temp_cell].pop())
              return None
-        #print(f"Retrieving container {container_id} at time {self.env.now}")
-        #return self.get(filter=container_filter)
         return current_container  # or return the container object
 
+    def plan_retrieval(self,
+                       container_ids:List[str]) -> RetrievalPlan:
+        """
+        Plan the retrieval of a batch of containers from this block up front.
+
+        Picks are ordered stack by stack, and every blocker is relocated within its bay to a
+        stack that holds no container of the batch, so it is not dug out a second time.
+
+        @@params container_ids: ids of the containers to retrieve
+
+        returns the plan, which execute_retrieval_plan carries out
+        """
+        targets_by_bay:Dict[int, set] = {}
+        missing = []
+        for container_id in container_ids:
+            location = self.location_registry.get_container_location(container_id)
+            if location is None or location[0] != self.name:
+                missing.append(container_id)
+                continue
+            targets_by_bay.setdefault(location[1], set()).add(container_id)
+
+        moves:List[RetrievalMove] = []
+        for bay in sorted(targets_by_bay):
+            stacks = {cell: [container.container_id for container in self.stack_contents(bay, cell)]
+                      for cell in range(1, self._num_cells + 1)}
+            moves.extend(plan_bay_retrieval(bay, stacks, targets_by_bay[bay], self._num_tiers))
+        return RetrievalPlan(self.name, moves, missing)
+
+    def execute_retrieval_plan(self,
+                               plan:RetrievalPlan) -> List[Container]:
+        """
+        Carry out a retrieval plan of this block.
+
+        @@params plan: a plan made by plan_retrieval on the current block contents
+
+        returns the retrieved containers in pick order
+        raises ValueError, before any move, if the block changed since the plan was made
+        """
+        if plan.block_name != self.name:
+            raise ValueError(f"The retrieval plan is for {plan.block_name}, not {self.name}")
+        # Walk the moves over the ids of the stacks first, so a stale plan changes nothing
+        stacks:Dict[Tuple[int, int], List[Any]] = {}
+        def stack_ids(bay:int, cell:int) -> List[Any]:
+            if (bay, cell) not in stacks:
+                stacks[bay, cell] = [container.container_id for container in self.stack_contents(bay, cell)]
+            return stacks[bay, cell]
+        for move in plan.moves:
+            from_ids = stack_ids(move.bay, move.from_cell)
+            if not from_ids or from_ids[-1] != move.container_id:
+                raise ValueError(f"{self.name} changed since the retrieval plan was made")
+            from_ids.pop()
+            if move.kind != RETRIEVE:
+                stack_ids(move.bay, move.to_cell).append(move.container_id)
+
+        retrieved = []
+        for move in plan.moves:
+            container = self._pop(move.bay, move.from_cell)
+            if move.kind == RETRIEVE:
+                self._release_container(container.container_id)
+                retrieved.append(container)
+            else:
+                self._push(move.bay, move.to_cell, container, overstack=True)
+                container.cell = move.to_cell
+                container.tier = self._stack_height(move.bay, move.to_cell)
+                self.location_registry.register_container(container.container_id, self.name, move.bay, move.to_cell, container.tier)
+        return retrieved
+
+    def retrieve_batch(self,
+                       container_ids:List[str]) -> Tuple[List[Container], int]:
+        """
+        Retrieve a batch of containers with as few reshuffles as possible.
+
+        @@params container_ids: ids of the containers to retrieve
+
+        returns the retrieved containers in pick order and the number of reshuffle moves
+        """
+        plan = self.plan_retrieval(container_ids)
+        return self.execute_retrieval_plan(plan), plan.reshuffles
+
+    def _release_container(self,
+                           container_id:str) -> None:
+        """
+        Drop the bookkeeping of a container that left the block.
+        """
+        self.num_containers -= 1
+        self.occupancy_monitor.change(-1)
+        self.due_times.pop(container_id, None)
+        self.items.pop(container_id, None)
+        self.location_registry.remove_container(container_id)
+        self._space_freed()
+
+    def retrieve(self,
+                 container_id:str) -> Optional[Container]:
+        """
+        Retrieve a container by id alone, its bay and cell come from the location registry.
+
+        @@params container_id: The id of the container
+
+        returns the container, or None if it is not stored in this block
+        """
+        location = self.location_registry.get_container_location(container_id)
+        if location is None or location[0] != self.name:
+            return None
+        return self.retrieve_container(container_id, location[1], location[2])
+
+    def _take(self,
+              container_id:str) -> Container:
+        # A satisfied get event digs the container out of its stack
+        return self.retrieve(container_id)
+
     def _find_next_cell_with_space(self, 
                                    bay:int, 
                                    current_cell:int) -> int:
         # Find the next cell with the fewest containers
         min_containers = float('inf')
         next_cell = current_cell
-        for cell in range(len(self.matrix[bay])):
-            if cell != current_cell and len(self.matrix[bay][cell]) < min_containers:
-                min_containers = len(self.matrix[bay][cell])
+        for cell in range(1, self._num_cells + 1):
+            if cell != current_cell and self._stack_height(bay, cell) < min_containers:
+                min_containers = self._stack_height(bay, cell)
                 next_cell = cell
         return next_cell
     
@@ -208,18 +562,21 @@ class Block(FilterStore):
         plt.show()
     
 class BlockFactory:
-    _blocks = {}  # Dictionary to store block instances
+    def __init__(self) -> None:
+        # Blocks of one yard, so that several scenarios can live in the same process
+        self._blocks:Dict[str, Block] = {}  # Dictionary to store block instances
 
-    @staticmethod
-    def add_block(env:simpy.Environment, 
+    def add_block(self,
+                  env:simpy.Environment, 
                   capacity:int, 
-                  name:str) -> Block:
-        if name not in BlockFactory._blocks:
-            BlockFactory._blocks[name] = Block(env, capacity, name)
-        return BlockFactory._blocks[name]
+                  name:str,
+                  block_class:type=Block) -> Block:
+        if name not in self._blocks:
+            self._blocks[name] = block_class(env, capacity, name)
+        return self._blocks[name]
     
-    @staticmethod
-    def get_block(name:str) -> Block:
-        if name in BlockFactory._blocks:
-            return BlockFactory._blocks[name]
+    def get_block(self,
+                  name:str) -> Block:
+        if name in self._blocks:
+            return self._blocks[name]
         return None
\ No newline at end of file
@@ -1,9 +1,18 @@
-from typing import List, Any
+from typing import List, Any, Callable, Dict, Optional, Tuple
+import numpy as np
 from Scripts.Utils.containers import Container
 from Scripts.Utils.port_objects_definition import *
-from Scripts.YardPlanner.blocks import Block
+from Scripts.YardPlanner.blocks import Block, BlockOccupancy
+
+# Length of one bay position along a block (half a 40ft slot), in meters
+BAY_POSITION_LENGTH:float = 6.1
 
 class ContainerPlacementStrategy:
+    """
+    First fit placement: the first free slot in block, bay and cell order.
+    """
+    name:str = "first_fit"
+
     @staticmethod
     def find_placement_by_bay(blocks:List[Block],
                               container:Container):
@@ -16,14 +25,109 @@ class ContainerPlacementStrategy:
         returns block name, bay number, cell number
         """
         container_size = container._size
-        start_bay = 1 if container_size == ContainerSize.TWENTY_FT else 2
-        bay_increment = 2
 
+        # Each block keeps its free slots indexed in the order of a bay by bay, cell by cell
+        # scan (odd bays for 20ft, even bays for 40ft), so the first free slot is a heap lookup.
+        for block in blocks:
+            slot = block.first_available_slot(container_size)
+            if slot is not None:
+                return block.name, slot[0], slot[1]
+        return None, None, None
+
+class ScoredPlacementStrategy(ContainerPlacementStrategy):
+    """
+    Placement that scores every free slot of a block in one vectorized pass and picks the
+    cheapest one. The cost of a slot is the weighted sum of
+        reshuffle: 1 if the container would sit on one that is due out earlier
+        height: stack height as a fraction of the tier limit
+        distance: distance from the quay, relative to distance_scale
+        grouping: 0 on a stack topped by the same container type, 0.5 on an empty stack, 1 otherwise
+    Ties go to the first slot in first fit order. The block occupancy arrays and availability
+    masks are read through Block.occupancy and Block.available_mask, which both blocks keep
+    up to date as containers move, so a placement costs no scan of the block in Python.
+    """
+    name:str = "weighted"
+
+    def __init__(self,
+                 reshuffle_weight:float=1.0,
+                 height_weight:float=1.0,
+                 distance_weight:float=1.0,
+                 grouping_weight:float=1.0,
+                 distance_scale:float=1000.0) -> None:
+        """
+        Constructor for the scored placement strategy
+
+        @@params *_weight: weight of each criterion in the slot cost
+        @@params distance_scale: distance, in meters, that costs as much as one reshuffle
+        """
+        self.reshuffle_weight:float = reshuffle_weight
+        self.height_weight:float = height_weight
+        self.distance_weight:float = distance_weight
+        self.grouping_weight:float = grouping_weight
+        self.distance_scale:float = distance_scale
+
+    def score(self,
+              block:Block,
+              occupancy:BlockOccupancy,
+              container:Container) -> np.ndarray:
+        """
+        Return the cost of storing the container on every (bay, cell) of the block.
+
+        @@params block: The block object
+        @@params occupancy: The array view of the block
+        @@params container: The container object
+        """
+        heights = occupancy.heights
+        cost = np.zeros(heights.shape)
+        if self.reshuffle_weight:
+            due = block.env.now + container._dwell_time
+            cost += self.reshuffle_weight * (occupancy.min_due < due)
+        if self.height_weight and occupancy.num_tiers:
+            cost += self.height_weight * (heights / occupancy.num_tiers)
+        if self.distance_weight:
+            distance = block.distance_to_berth + np.arange(heights.shape[0]) * BAY_POSITION_LENGTH
+            cost += self.distance_weight * (distance / self.distance_scale)[:, None]
+        if self.grouping_weight:
+            same_type = occupancy.top_type == TYPE_CODES.get(container._container_type, 0)
+            cost += self.grouping_weight * np.where(heights == 0, 0.5, np.where(same_type, 0.0, 1.0))
+        return cost
+
+    def find_placement_by_bay(self,
+                              blocks:List[Block],
+                              container:Container):
+        best_cost = np.inf
+        best_placement = (None, None, None)
         for block in blocks:
-            for bay in range(start_bay, block.num_bays * 2, bay_increment):  # Adjusting for one-indexed list
-                for cell in range(1, block._num_cells + 1):
-                        if container_size == ContainerSize.TWENTY_FT and block._is_20ft_bay_available(bay, cell):
-                            return block.name, bay, cell
-                        elif container_size == ContainerSize.FORTY_FT and block._is_40ft_bay_available(bay, cell):
-                            return block.name, bay, cell
-        return None, None, None
\ No newline at end of file
+            occupancy = block.occupancy()
+            mask = block.available_mask(container._size)
+            if not mask.any():
+                continue
+            cost = np.where(mask, self.score(block, occupancy, container), np.inf)
+            index = int(np.argmin(cost))
+            if cost.flat[index] < best_cost:
+                best_cost = cost.flat[index]
+                bay, cell = np.unravel_index(index, cost.shape)
+                best_placement = (block.name, int(bay) + 1, int(cell) + 1)
+        return best_placement
+
+# Strategies selectable by name, each entry builds a new strategy object
+PLACEMENT_STRATEGIES:Dict[str, Callable[[], ContainerPlacementStrategy]] = {
+    "first_fit": ContainerPlacementStrategy,
+    "min_reshuffle": lambda: ScoredPlacementStrategy(1.0, 0.0, 0.0, 0.0),
+    "lowest_stack": lambda: ScoredPlacementStrategy(0.0, 1.0, 0.0, 0.0),
+    "nearest_berth": lambda: ScoredPlacementStrategy(0.0, 0.0, 1.0, 0.0),
+    "grouped": lambda: ScoredPlacementStrategy(0.0, 0.0, 0.0, 1.0),
+    "weighted": ScoredPlacementStrategy,
+}
+
+def get_placement_strategy(name:str) -> ContainerPlacementStrategy:
+    """
+    Return a new placement strategy object by name.
+
+    @@params name: a key of PLACEMENT_STRATEGIES
+    """
+    if name not in PLACEMENT_STRATEGIES:
+        raise ValueError(f"Unknown placement strategy {name}, expected one of {list(PLACEMENT_STRATEGIES)}")
+    strategy = PLACEMENT_STRATEGIES[name]()
+    strategy.name = name
+    return strategy
@@ -0,0 +1,84 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+RETRIEVE:str = "retrieve"
+RELOCATE:str = "relocate"
+
+class RetrievalMove(NamedTuple):
+    kind: str          # RETRIEVE or RELOCATE
+    container_id: Any
+    bay: int
+    from_cell: int
+    to_cell: Optional[int]  # destination cell of a relocation
+
+class RetrievalPlan:
+    """
+    Ordered moves that take a batch of containers out of one block.
+
+    The plan is computed once against the block contents and can be executed later with
+    Block.execute_retrieval_plan as long as the block has not changed in between.
+    """
+    def __init__(self,
+                 block_name:str,
+                 moves:List[RetrievalMove],
+                 missing:List[Any]) -> None:
+        self.block_name:str = block_name
+        self.moves:List[RetrievalMove] = moves
+        self.missing:List[Any] = missing  # requested ids that are not stored in the block
+
+    @property
+    def reshuffles(self) -> int:
+        return sum(1 for move in self.moves if move.kind == RELOCATE)
+
+    @property
+    def retrieval_order(self) -> List[Any]:
+        return [move.container_id for move in self.moves if move.kind == RETRIEVE]
+
+    def __str__(self):
+        return (f"Retrieval plan for {self.block_name}: {len(self.retrieval_order)} picks, "
+                f"{self.reshuffles} reshuffles, {len(self.missing)} missing")
+
+def plan_bay_retrieval(bay:int,
+                       stacks:Dict[int, List[Any]],
+                       targets:Set[Any],
+                       num_tiers:int) -> List[RetrievalMove]:
+    """
+    Plan the moves that dig every target out of the stacks of one bay.
+
+    Stacks are dug in increasing order of blockers above their deepest target. A blocker
+    goes to the lowest stack of the bay that holds no target any more, so it is never
+    moved twice; only when every other stack still holds targets does it land on one.
+
+    @param bay: the bay number
+    @param stacks: container ids of each cell of the bay, bottom first. Modified in place.
+    @param targets: ids of the containers to retrieve from the bay
+    @param num_tiers: the stack height limit of the block
+
+    returns the ordered list of moves
+    """
+    remaining:Dict[int, int] = {cell: sum(1 for cid in stack if cid in targets) for cell, stack in stacks.items()}
+
+    def blockers_above_deepest_target(cell:int) -> int:
+        stack = stacks[cell]
+        deepest = next(tier for tier, cid in enumerate(stack) if cid in targets)
+        return sum(1 for cid in stack[deepest + 1:] if cid not in targets)
+
+    moves:List[RetrievalMove] = []
+    for cell in sorted((cell for cell, count in remaining.items() if count), key=blockers_above_deepest_target):
+        stack = stacks[cell]
+        while remaining[cell]:
+            cid = stack.pop()
+            if cid in targets:
+                remaining[cell] -= 1
+                moves.append(RetrievalMove(RETRIEVE, cid, bay, cell, None))
+                continue
+            candidates = [other for other in stacks if other != cell]
+            if not candidates:
+                raise ValueError(f"Cannot dig {cid} out of bay {bay}, it has no other cell to relocate to")
+            settled = [other for other in candidates if not remaining[other]]
+            # Prefer settled stacks below the tier limit, then any settled stack, then the rest
+            pool = ([other for other in settled if len(stacks[other]) < num_tiers]
+                    or settled or candidates)
+            destination = min(pool, key=lambda other: (len(stacks[other]), other))
+            stacks[destination].append(cid)
+            moves.append(RetrievalMove(RELOCATE, cid, bay, cell, destination))
+    return moves
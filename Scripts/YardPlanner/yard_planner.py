@@ -1,39 +1,89 @@
-from Scripts.Utils.containers import ContainerFactory, Container
+from Scripts.Utils.containers import ContainerFactory, Container, ContainerLocationRegistry
 from Scripts.Utils.port_objects_definition import *
 from Scripts.YardPlanner.blocks import Block, BlockFactory
-from typing import List, Any, Tuple, Optional
+from Scripts.YardPlanner.array_block import ArrayBlock
+from typing import List, Any, Callable, Tuple, Optional
 import simpy
-from Scripts.YardPlanner.container_placement_rule import ContainerPlacementStrategy
+from Scripts.YardPlanner.container_placement_rule import ContainerPlacementStrategy, get_placement_strategy
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 from matplotlib.animation import FuncAnimation
 
+# Block storage models selectable by name in YardPlanner.add_block
+BLOCK_STORAGES = {"list": Block, "array": ArrayBlock}
+
 class YardPlanner:
     """
     The class is for the functionality of Yard Planner in the port simulation.
     """
-    def __init__(self, env:simpy.Environment):
+    def __init__(self,
+                 env:simpy.Environment,
+                 placement_rule:str="first_fit",
+                 container_mode:str="object"):
+        """
+        Constructor for the yard planner
+
+        @@params placement_rule: name of the container placement strategy
+        @@params container_mode: container representation, one of CONTAINER_MODES
+        """
         self.env = env
         self.blocks:BlockFactory = BlockFactory()  # List to store blocks
         self.block_list:List[Block] = []  # List to store block instances
-        self.container_placement_rule:ContainerPlacementStrategy = ContainerPlacementStrategy()
-        self.container_factory:ContainerFactory = ContainerFactory()
+        self.container_placement_rule = placement_rule
+        self.container_factory:ContainerFactory = ContainerFactory(container_mode)
+        # Callbacks called with (container, block name, bay, cell) after every placement
+        self.observers:List[Callable[[Container, str, int, int], None]] = []
+
+    @property
+    def container_placement_rule(self) -> ContainerPlacementStrategy:
+        return self._container_placement_rule
+
+    @container_placement_rule.setter
+    def container_placement_rule(self,
+                                 rule:Any) -> None:
+        """
+        Select the placement strategy by name (see PLACEMENT_STRATEGIES) or set a strategy object.
+        """
+        if isinstance(rule, str):
+            rule = get_placement_strategy(rule)
+        if not isinstance(rule, ContainerPlacementStrategy):
+            raise ValueError(f"placement rule must be a strategy name or a {ContainerPlacementStrategy}")
+        self._container_placement_rule = rule
 
     def add_block(self,
                   capacity:int, 
-                  block_name:str) -> None:
+                  block_name:str,
+                  storage:str="list") -> None:
         """
         This function add the block object to the Block factory.
 
         @@params capacity: The maximum capacity the block can hold
         @@params block_name: The name of the block to be added
+        @@params storage: "list" for stacks of containers, "array" for numpy array storage
         """
+        if storage not in BLOCK_STORAGES:
+            raise ValueError(f"Unknown block storage {storage}, expected one of {list(BLOCK_STORAGES)}")
         new_block = self.blocks.add_block(self.env,
                                         capacity=capacity,
-                                        name=block_name)
+                                        name=block_name,
+                                        block_class=BLOCK_STORAGES[storage])
         self.block_list.append(new_block)
 
+    def add_observer(self,
+                     observer:Callable[[Container, str, int, int], None]) -> None:
+        """
+        Register a callback that is called after every container placement, such as a visualisation.
+        """
+        self.observers.append(observer)
+
+    def needs_move_events(self) -> bool:
+        """
+        Whether another process has to see the yard change at the time of each move:
+        there are placement observers or a process is waiting to get a container from a block.
+        """
+        return bool(self.observers) or any(block._waiting for block in self.block_list)
+
     def get_block(self,
                   block_name:str) -> Block:
         """
@@ -52,7 +102,8 @@ class YardPlanner:
                              container:Container,
                              block_name:str,
                              bay:int,
-                             cell:int) -> None:
+                             cell:int,
+                             time:Optional[float]=None) -> None:
         """
         This function place the container in the yard.
 
@@ -60,13 +111,42 @@ class YardPlanner:
         @@params block_name: The name of the block where the container to be placed.
         @@params bay: The bay number.
         @@params cell: The cell number.
+        @@params time: The time of the placement, env.now if None.
         """
         block = self.get_block(block_name)
         block.store_container(container,
                               container._size,
                               bay,
-                              cell)
+                              cell,
+                              time)
+        for observer in self.observers:
+            observer(container, block_name, bay, cell)
     
+    def retrieve_batch(self,
+                       container_ids:List[str]) -> Tuple[List[Container], int]:
+        """
+        Retrieve a batch of containers spread over any blocks of the yard.
+
+        @@params container_ids: ids of the containers to retrieve
+
+        returns the retrieved containers and the total number of reshuffle moves
+        """
+        ids_by_block = {}
+        for container_id in container_ids:
+            location = ContainerLocationRegistry.get_container_location(container_id)
+            if location is not None:
+                ids_by_block.setdefault(location[0], []).append(container_id)
+        retrieved = []
+        reshuffles = 0
+        for block_name, block_ids in ids_by_block.items():
+            block = self.get_block(block_name)
+            if block is None:
+                continue
+            containers, moves = block.retrieve_batch(block_ids)
+            retrieved.extend(containers)
+            reshuffles += moves
+        return retrieved, reshuffles
+
     def update_blocks(self, num, ax, block_spacing):
         ax.clear()
         for block_index, block in enumerate(self.block_list):
@@ -1,13 +1,25 @@
 from .BerthPlanner.berth_planner import BerthPlanner
 from .BerthPlanner.vessel import Vessel, VesselArrival, HatchProfile
-from .Resources.resources import Berth, Crane
-from .Utils.basic_data_structures import OneIndexedList, Stack
-from .Utils.basic_objects import Resource, PreemptiveResource, PriorityResource, Container, Stores, FilterStore, EventHandler
-from .Utils.containers import Container, ContainerLocationRegistry, ContainerList, ContainerFactory
+from .BerthPlanner.arrival_source import ScheduledArrival, read_schedule, write_schedule
+from .BerthPlanner.hatch_queue import Hatch, HatchQueue
+from .Resources.resources import Berth, Crane, Quay
+from .Resources.crane_pool import CranePool, CraneGrant
+from .Utils.basic_data_structures import OneIndexedList, Stack, IntervalTreap, RankedTreap, FirstFitQueue
+from .Utils.basic_objects import Resource, PreemptiveResource, PriorityResource, Container, Stores, FilterStore, IndexedStore, EventHandler
+from .Utils.containers import Container, CompactContainer, ContainerTable, ContainerRow, ContainerLocationRegistry, ContainerList, ContainerFactory
 from .Utils.port_objects_definition import ContainerSize, ContainerType, ContainerHandling, CTInterface
 from .YardPlanner.blocks import Block, BlockFactory
-from .YardPlanner.container_placement_rule import ContainerPlacementStrategy
+from .YardPlanner.array_block import ArrayBlock
+from .YardPlanner.container_placement_rule import ContainerPlacementStrategy, ScoredPlacementStrategy, get_placement_strategy
 from .YardPlanner.yard_planner import YardPlanner
 from .Statistics.time_generator import RandomTimeGenerator
+from .Statistics.empirical_time_generator import EmpiricalTimeGenerator
+from .Statistics.random_streams import RandomStreams
+from .Statistics.streaming_statistics import StreamingStatistics, TDigest, Reservoir
 from .Statistics.statistics_collector import StatsCollector
-from .Utils.log import Logger
\ No newline at end of file
+from .Utils.event_trace import EventKind, EventTrace, TextLogView, load_trace
+from .Utils.monitors import TimeWeightedMonitor
+from .Utils.log import Logger, console, set_quiet
+from .Experiments.output_analysis import StoppingRule, BatchMeansResult, mser5, batch_means
+from .Experiments.scenario import HatchRow, BlockLayout, ScenarioConfig, Scenario, build_scenario, run_scenario
+from .Experiments.traffic import VesselClass, Traffic, generate_traffic
\ No newline at end of file
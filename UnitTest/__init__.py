@@ -1 +1 @@
-from ..Scripts import *
\ No newline at end of file
+from Scripts import *
\ No newline at end of file
@@ -0,0 +1,90 @@
+from UnitTest import *
+from Scripts.Utils.log import is_quiet
+from Scripts.BerthPlanner.arrival_source import arrival_from_row
+import os
+import tempfile
+import unittest
+import simpy
+
+class QueueTrackingEnvironment(simpy.Environment):
+    def __init__(self):
+        super().__init__()
+        self.max_queue = 0
+
+    def schedule(self, event, priority=1, delay=0):
+        super().schedule(event, priority, delay)
+        self.max_queue = max(self.max_queue, len(self._queue))
+
+def build_planner(env):
+    yard_planner = YardPlanner(env)
+    yard_planner.add_block(100000, "StreamBlock")
+    yard_planner.block_list[-1].configure(num_bays=100, num_cells=10, num_tiers=10)
+    berth_planner = BerthPlanner(env, yard_planner, None, RandomStreams(3), EventTrace())
+    berth_planner.add_berth("Berth1", capacity=2)
+    berth_planner.add_crane("Crane1", coarse=True)
+    berth_planner.add_crane("Crane2", coarse=True)
+    hatch_profile = HatchProfile("Hatch_1")
+    hatch_profile.add_row(ContainerHandling.LOAD, ContainerType.LADEN, ContainerSize.FORTY_FT, 2, 4)
+    berth_planner.add_hatch_profile(hatch_profile)
+    return berth_planner
+
+class TestArrivalDriver(unittest.TestCase):
+    def setUp(self):
+        self.was_quiet = is_quiet()
+        set_quiet(True)
+
+    def tearDown(self):
+        set_quiet(self.was_quiet)
+
+    def test_csv_schedule_is_streamed(self):
+        arrivals = [ScheduledArrival(f"Vessel{index}", 10000.0 * index, cranes=("Crane1",), hatch_profiles=("Hatch_1",))
+                    for index in range(300)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedule.csv")
+            write_schedule(path, arrivals)
+            self.assertEqual(list(read_schedule(path)), arrivals)
+            env = QueueTrackingEnvironment()
+            berth_planner = build_planner(env)
+            departed = []
+            def create_vessel(arrival):
+                vessel = berth_planner.create_vessel(arrival)
+                departed.append(vessel)
+                return vessel
+            berth_planner.process_arrivals(path, create_vessel)
+            env.run()
+        self.assertEqual(len(departed), 300)
+        self.assertTrue(all(vessel.departure_time is not None for vessel in departed))
+        self.assertEqual(berth_planner.vessels, [])
+        # Only the vessels in port have pending events, not the whole schedule
+        self.assertLess(env.max_queue, 20)
+
+    def test_berth_position_is_optional(self):
+        self.assertIsNone(arrival_from_row({"vessel": "Vessel1", "arrival_time": "0", "berth_position": ""}).berth_position)
+        self.assertEqual(arrival_from_row({"vessel": "Vessel1", "arrival_time": "0", "berth_position": "412.5"}).berth_position,
+                         412.5)
+        arrivals = [ScheduledArrival("Vessel1", 0.0), ScheduledArrival("Vessel2", 10.0, berth_position=412.5)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedule.csv")
+            write_schedule(path, arrivals)
+            self.assertEqual(list(read_schedule(path)), arrivals)
+
+    def test_unsorted_stream_is_rejected(self):
+        env = simpy.Environment()
+        berth_planner = build_planner(env)
+        berth_planner.process_arrivals(iter([ScheduledArrival("Vessel1", 50.0), ScheduledArrival("Vessel2", 10.0)]))
+        with self.assertRaises(ValueError):
+            env.run()
+
+    def test_list_is_sorted(self):
+        env = simpy.Environment()
+        berth_planner = build_planner(env)
+        arrived = []
+        def create_vessel(arrival):
+            arrived.append((arrival.vessel, env.now))
+            return berth_planner.create_vessel(arrival)
+        berth_planner.process_arrivals([ScheduledArrival("Vessel1", 50.0), ScheduledArrival("Vessel2", 10.0)], create_vessel)
+        env.run(until=60)
+        self.assertEqual(arrived, [("Vessel2", 10.0), ("Vessel1", 50.0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,10 @@
 #from Scripts.Utils import *
 from UnitTest import *
 import unittest
+import random
 import simpy
+import numpy as np
+from Scripts.YardPlanner.blocks import BlockOccupancy, availability_mask
 
 class TestBlock(unittest.TestCase):
     def setUp(self):
@@ -34,5 +37,279 @@ class TestBlock(unittest.TestCase):
         self.assertEqual(retrieved_container, container_20ft)
         # More tests can be added as needed
 
+def linear_scan_placement(blocks, size):
+    start_bay = 1 if size == ContainerSize.TWENTY_FT else 2
+    for block in blocks:
+        for bay in range(start_bay, block.num_bays * 2, 2):
+            for cell in range(1, block._num_cells + 1):
+                if size == ContainerSize.TWENTY_FT and block._is_20ft_bay_available(bay, cell):
+                    return block.name, bay, cell
+                elif size == ContainerSize.FORTY_FT and block._is_40ft_bay_available(bay, cell):
+                    return block.name, bay, cell
+    return None, None, None
+
+class TestFreeSlotIndex(unittest.TestCase):
+    def setUp(self):
+        self.env = simpy.Environment()
+        self.blocks = []
+        for name in ("IndexBlock1", "IndexBlock2"):
+            block = Block(self.env, capacity=1000, name=name)
+            block.num_bays = 4
+            block.num_cells = 3
+            block.num_tiers = 2
+            self.blocks.append(block)
+
+    def test_index_matches_linear_scan(self):
+        rng = random.Random(11)
+        stored = []
+        for _ in range(400):
+            size = rng.choice(list(ContainerSize))
+            if stored and rng.random() < 0.35:
+                block, container = stored.pop(rng.randrange(len(stored)))
+                stack = block.matrix[container.bay][container.cell]
+                if stack.items[-1] is container:
+                    block.retrieve_container(container.container_id, container.bay, container.cell)
+                else:
+                    stored.append((block, container))
+                continue
+            expected = linear_scan_placement(self.blocks, size)
+            container = Container(ContainerType.LADEN, size)
+            placement = ContainerPlacementStrategy.find_placement_by_bay(self.blocks, container)
+            self.assertEqual(placement, expected)
+            if placement[0] is not None:
+                block = next(block for block in self.blocks if block.name == placement[0])
+                self.assertTrue(block.store_container(container, size, placement[1], placement[2]))
+                stored.append((block, container))
+
+    def test_full_block_has_no_slot(self):
+        block = self.blocks[0]
+        for cell in (1, 2, 3):
+            for bay in (1, 3, 5, 7):
+                for _ in range(2):
+                    block.store_container(Container(ContainerType.LADEN, ContainerSize.TWENTY_FT),
+                                          ContainerSize.TWENTY_FT, bay, cell)
+        self.assertIsNone(block.first_available_slot(ContainerSize.TWENTY_FT))
+        self.assertIsNone(block.first_available_slot(ContainerSize.FORTY_FT))
+
+class TestArrayBlock(unittest.TestCase):
+    def setUp(self):
+        self.env = simpy.Environment()
+        self.list_block = Block(self.env, capacity=1000, name="ListBlock")
+        self.array_block = ArrayBlock(self.env, capacity=1000, name="ArrayBlock")
+        for block in (self.list_block, self.array_block):
+            block.configure(num_bays=4, num_cells=3, num_tiers=3)
+
+    def test_configure_sets_dimensions(self):
+        self.assertEqual(self.array_block.heights.shape, (7, 3))
+        self.assertEqual(self.array_block.num_tiers, 3)
+
+    def test_resize_with_containers_raises(self):
+        for block in (self.list_block, self.array_block):
+            block.store_container(Container(ContainerType.LADEN, ContainerSize.TWENTY_FT), ContainerSize.TWENTY_FT, 1, 1)
+            with self.assertRaises(ValueError):
+                block.num_bays = 5
+
+    def test_matches_list_block(self):
+        rng = random.Random(5)
+        stored = []
+        for _ in range(300):
+            if stored and rng.random() < 0.3:
+                twin = stored.pop(rng.randrange(len(stored)))
+                results = [block.retrieve_container(container.container_id, container.bay, container.cell)
+                           for block, container in zip((self.list_block, self.array_block), twin)]
+                self.assertIs(results[0], twin[0])
+                self.assertIs(results[1], twin[1])
+            else:
+                size = rng.choice(list(ContainerSize))
+                slot = self.list_block.first_available_slot(size)
+                self.assertEqual(slot, self.array_block.first_available_slot(size))
+                if slot is None:
+                    continue
+                twin = (Container(ContainerType.LADEN, size), Container(ContainerType.LADEN, size))
+                for block, container in zip((self.list_block, self.array_block), twin):
+                    self.assertTrue(block.store_container(container, size, *slot))
+                stored.append(twin)
+            for list_container, array_container in stored:
+                self.assertEqual((list_container.bay, list_container.cell, list_container.tier),
+                                 (array_container.bay, array_container.cell, array_container.tier))
+            # Both blocks keep the same occupancy arrays, and masks that match the heights
+            for field, list_array, array_array in zip(BlockOccupancy._fields, self.list_block.occupancy(), self.array_block.occupancy()):
+                np.testing.assert_array_equal(list_array, array_array, err_msg=field)
+            for size in ContainerSize:
+                expected = availability_mask(self.list_block.heights, self.list_block.num_tiers, size)
+                np.testing.assert_array_equal(self.list_block.available_mask(size), expected)
+                np.testing.assert_array_equal(self.array_block.available_mask(size), expected)
+        self.assertEqual(self.list_block.num_containers, self.array_block.num_containers)
+
+    def test_available_mask(self):
+        self.array_block.store_container(Container(ContainerType.LADEN, ContainerSize.FORTY_FT), ContainerSize.FORTY_FT, 2, 1)
+        mask = self.array_block.available_mask(ContainerSize.TWENTY_FT)
+        self.assertFalse(mask[0, 0])
+        self.assertFalse(mask[2, 0])
+        self.assertTrue(mask[0, 1])
+        self.assertFalse(mask[1].any())
+        self.assertTrue(self.array_block.available_mask(ContainerSize.FORTY_FT, bay=2)[0])
+
+class TestPlacementStrategies(unittest.TestCase):
+    def setUp(self):
+        self.env = simpy.Environment()
+        self.yard_planner = YardPlanner(self.env, placement_rule="min_reshuffle")
+        self.block = ArrayBlock(self.env, capacity=100, name="StrategyBlock")
+        self.block.configure(num_bays=2, num_cells=2, num_tiers=3)
+        early = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT, 100.0)
+        self.block.store_container(early, ContainerSize.TWENTY_FT, 1, 1)
+
+    def test_select_strategy_by_name(self):
+        self.assertEqual(self.yard_planner.container_placement_rule.name, "min_reshuffle")
+        self.yard_planner.container_placement_rule = "first_fit"
+        self.assertIsInstance(self.yard_planner.container_placement_rule, ContainerPlacementStrategy)
+        with self.assertRaises(ValueError):
+            self.yard_planner.container_placement_rule = "unknown"
+
+    def test_min_reshuffle_avoids_blocking_earlier_departures(self):
+        strategy = self.yard_planner.container_placement_rule
+        late = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT, 500.0)
+        self.assertEqual(strategy.find_placement_by_bay([self.block], late), ("StrategyBlock", 1, 2))
+        earlier = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT, 50.0)
+        self.assertEqual(strategy.find_placement_by_bay([self.block], earlier), ("StrategyBlock", 1, 1))
+
+    def test_scored_strategies_agree_on_list_blocks(self):
+        list_block = Block(self.env, capacity=100, name="StrategyBlock")
+        list_block.configure(num_bays=2, num_cells=2, num_tiers=3)
+        list_block.store_container(Container(ContainerType.LADEN, ContainerSize.TWENTY_FT, 100.0), ContainerSize.TWENTY_FT, 1, 1)
+        container = Container(ContainerType.EMPTY, ContainerSize.TWENTY_FT, 500.0)
+        strategy = get_placement_strategy("weighted")
+        self.assertEqual(strategy.find_placement_by_bay([list_block], container),
+                         strategy.find_placement_by_bay([self.block], container))
+
+class TestBatchRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.env = simpy.Environment()
+        self.block = Block(self.env, capacity=100, name="BatchBlock")
+        self.block.configure(num_bays=1, num_cells=3, num_tiers=4)
+        self.containers = {}
+        for cell, labels in ((1, ("T1", "B1", "T2", "B2")), (2, ("T3", "B3"))):
+            for label in labels:
+                container = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+                self.block.store_container(container, ContainerSize.TWENTY_FT, 1, cell)
+                self.containers[label] = container
+
+    def ids(self, *labels):
+        return [self.containers[label].container_id for label in labels]
+
+    def test_plan_never_moves_a_blocker_twice(self):
+        plan = self.block.plan_retrieval(self.ids("T1", "T2", "T3"))
+        self.assertEqual(plan.reshuffles, 3)
+        self.assertEqual(plan.retrieval_order, self.ids("T3", "T2", "T1"))
+        relocated = [move.container_id for move in plan.moves if move.kind == "relocate"]
+        self.assertEqual(len(relocated), len(set(relocated)))
+
+    def test_retrieve_batch_updates_block(self):
+        retrieved, reshuffles = self.block.retrieve_batch(self.ids("T1", "T2", "T3"))
+        self.assertEqual(set(retrieved), {self.containers[label] for label in ("T1", "T2", "T3")})
+        self.assertEqual(reshuffles, 3)
+        self.assertEqual(self.block.num_containers, 3)
+        for label in ("B1", "B2", "B3"):
+            container = self.containers[label]
+            location = self.block.location_registry.get_container_location(container.container_id)
+            self.assertEqual(location, ("BatchBlock", 1, container.cell, container.tier))
+            self.assertIs(self.block.stack_contents(1, container.cell)[container.tier - 1], container)
+
+    def snapshot(self, block):
+        stacks = [[container.container_id for container in block.stack_contents(1, cell)] for cell in (1, 2, 3)]
+        locations = {container_id: block.location_registry.get_container_location(container_id) for container_id in block.items}
+        arrays = [array.copy() for array in block.occupancy()[:4]] + [block.available_mask(ContainerSize.TWENTY_FT).copy()]
+        return stacks, set(block.items), locations, arrays
+
+    def assert_same_snapshot(self, first, second):
+        self.assertEqual(first[:3], second[:3])
+        for before, after in zip(first[3], second[3]):
+            np.testing.assert_array_equal(before, after)
+
+    def test_stale_plan_changes_nothing(self):
+        for block_class in (Block, ArrayBlock):
+            with self.subTest(block_class=block_class.__name__):
+                block = block_class(self.env, capacity=100, name=f"Stale{block_class.__name__}")
+                block.configure(num_bays=1, num_cells=3, num_tiers=4)
+                containers = {}
+                for cell, labels in ((1, ("T1", "B1", "T2", "B2")), (2, ("T3", "B3"))):
+                    for label in labels:
+                        containers[label] = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+                        block.store_container(containers[label], ContainerSize.TWENTY_FT, 1, cell)
+                plan = block.plan_retrieval([containers[label].container_id for label in ("T1", "T2", "T3")])
+                # The top of cell 1 is replaced after the plan was made
+                block.retrieve_container(containers["B2"].container_id, 1, 1)
+                block.store_container(Container(ContainerType.LADEN, ContainerSize.TWENTY_FT), ContainerSize.TWENTY_FT, 1, 1)
+                before = self.snapshot(block)
+                with self.assertRaises(ValueError):
+                    block.execute_retrieval_plan(plan)
+                self.assert_same_snapshot(before, self.snapshot(block))
+
+    def test_empty_stack_pop(self):
+        for block_class in (Block, ArrayBlock):
+            block = block_class(self.env, capacity=10, name=f"Empty{block_class.__name__}")
+            block.configure(num_bays=1, num_cells=1, num_tiers=2)
+            with self.assertRaises(IndexError):
+                block._pop(1, 1)
+
+    def test_yard_planner_retrieve_batch(self):
+        yard_planner = YardPlanner(self.env)
+        yard_planner.add_block(100, "BatchYardBlock")
+        yard_block = yard_planner.get_block("BatchYardBlock")
+        yard_block.configure(num_bays=1, num_cells=2, num_tiers=2)
+        bottom, top = (Container(ContainerType.LADEN, ContainerSize.TWENTY_FT) for _ in range(2))
+        yard_planner.yard_place_container(bottom, "BatchYardBlock", 1, 1)
+        yard_planner.yard_place_container(top, "BatchYardBlock", 1, 1)
+        retrieved, reshuffles = yard_planner.retrieve_batch([bottom.container_id, self.containers["T3"].container_id])
+        self.assertEqual(retrieved, [bottom])
+        self.assertEqual(reshuffles, 1)
+
+class TestIndexedBlockStore(unittest.TestCase):
+    def setUp(self):
+        self.env = simpy.Environment()
+        self.block = Block(self.env, capacity=100, name="IndexedBlock")
+        self.block.configure(num_bays=1, num_cells=2, num_tiers=3)
+
+    def store(self, cell=1):
+        container = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        self.block.store_container(container, ContainerSize.TWENTY_FT, 1, cell)
+        return container
+
+    def test_retrieve_by_id(self):
+        bottom, top = self.store(), self.store()
+        self.assertIs(self.block.retrieve(bottom.container_id), bottom)
+        self.assertNotIn(bottom.container_id, self.block.items)
+        self.assertIsNone(ContainerLocationRegistry.get_container_location(bottom.container_id))
+        self.assertEqual(ContainerLocationRegistry.get_container_location(top.container_id), ("IndexedBlock", 1, 2, 1))
+        self.assertIsNone(self.block.retrieve(bottom.container_id))
+
+    def test_get_waits_for_container(self):
+        container = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        received = []
+
+        def consumer():
+            received.append((yield self.block.get(container.container_id)))
+            received.append(self.env.now)
+
+        def producer():
+            yield self.env.timeout(5)
+            self.block.store_container(container, ContainerSize.TWENTY_FT, 1, 1)
+
+        self.env.process(consumer())
+        self.env.process(producer())
+        self.env.run()
+        self.assertEqual(received, [container, 5])
+        self.assertEqual(self.block.num_containers, 0)
+
+    def test_put_waits_for_capacity(self):
+        store = IndexedStore(self.env, capacity=1, key=lambda item: item)
+        store.put("first")
+        second = store.put("second")
+        self.env.run()
+        self.assertFalse(second.triggered)
+        self.assertEqual(store.remove("first"), "first")
+        self.env.run()
+        self.assertEqual(list(store.items), ["second"])
+
 if __name__ == '__main__':
     unittest.main()
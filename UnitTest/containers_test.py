@@ -0,0 +1,84 @@
+from UnitTest import *
+import unittest
+import simpy
+
+class TestCompactContainers(unittest.TestCase):
+    def test_compact_container(self):
+        container = ContainerFactory("compact").create_container(ContainerType.LADEN, ContainerSize.FORTY_FT)
+        self.assertIsInstance(container.container_id, int)
+        self.assertEqual(container.label, f"{ContainerSize.FORTY_FT}-{container.container_id}")
+        self.assertFalse(hasattr(container, "__dict__"))
+
+    def test_table_rows(self):
+        factory = ContainerFactory("table", ContainerTable(initial_capacity=2))
+        rows = [factory.create_container(ContainerType.EMPTY, ContainerSize.TWENTY_FT, {"dwell_time": 5.0})
+                for _ in range(3)]
+        self.assertEqual([row.container_id.row for row in rows], [0, 1, 2])
+        row = rows[2]
+        row.to_interface = CTInterface.YARD_INTERFACE
+        self.assertEqual(row._container_type, ContainerType.EMPTY)
+        self.assertEqual(row._size, ContainerSize.TWENTY_FT)
+        self.assertEqual(row._dwell_time, 5.0)
+        self.assertIs(row.to_interface, CTInterface.YARD_INTERFACE)
+        self.assertIsNone(row.from_interface)
+        self.assertIsNone(row.bay)
+
+    def test_table_rows_in_block(self):
+        factory = ContainerFactory("table")
+        block = Block(simpy.Environment(), capacity=10, name="TableBlock")
+        block.configure(num_bays=1, num_cells=2, num_tiers=2)
+        row = factory.create_container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        block.store_container(row, ContainerSize.TWENTY_FT, 1, 2)
+        self.assertEqual(ContainerLocationRegistry.get_container_location(row.container_id), ("TableBlock", 1, 2, 1))
+        self.assertEqual(factory.table["block"][row.container_id], factory.table.block_code("TableBlock"))
+        self.assertEqual(block.retrieve(row.container_id), row)
+        self.assertIsNone(ContainerLocationRegistry.get_container_location(row.container_id))
+
+    def test_table_ids_do_not_collide(self):
+        first, second = ContainerFactory("table"), ContainerFactory("table")
+        block = Block(simpy.Environment(), capacity=10, name="TableBlock")
+        block.configure(num_bays=1, num_cells=3, num_tiers=2)
+        rows = [factory.create_container(ContainerType.LADEN, ContainerSize.TWENTY_FT) for factory in (first, second)]
+        compact = CompactContainer(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        compact.container_id = 0
+        for cell, container in enumerate(rows + [compact], 1):
+            block.store_container(container, ContainerSize.TWENTY_FT, 1, cell)
+        # Row 0 of both tables and the integer id 0 each keep their own location
+        self.assertEqual([ContainerLocationRegistry.get_container_location(container.container_id)
+                          for container in rows + [compact]],
+                         [("TableBlock", 1, cell, 1) for cell in (1, 2, 3)])
+        self.assertIsNone(first.table.location(1))
+        with self.assertRaises(IndexError):
+            first.table.set_location(5, "TableBlock", 1, 1, 1)
+        block.retrieve(compact.container_id)
+        self.assertEqual(ContainerLocationRegistry.get_container_location(rows[0].container_id), ("TableBlock", 1, 1, 1))
+
+class TestContainerBatch(unittest.TestCase):
+    def test_batch_matches_single_creation(self):
+        factory = ContainerFactory()
+        first = factory.create_container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        batch = factory.create_batch(ContainerType.LADEN, ContainerSize.TWENTY_FT, 3, dwell_time=[1.0, 2.0, 3.0],
+                                     from_interface=CTInterface.VESSEL_INTERFACE)
+        last = factory.create_container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        number = int(first.container_id.rsplit("-", 1)[1])
+        self.assertEqual([container.container_id for container in batch],
+                         [f"{ContainerSize.TWENTY_FT}-{number + offset}" for offset in (1, 2, 3)])
+        self.assertEqual(last.container_id, f"{ContainerSize.TWENTY_FT}-{number + 4}")
+        self.assertEqual([container._dwell_time for container in batch], [1.0, 2.0, 3.0])
+        self.assertIs(batch[0].from_interface, CTInterface.VESSEL_INTERFACE)
+        self.assertIsNone(batch[0].to_interface)
+
+    def test_sampled_dwell_times(self):
+        generator = RandomTimeGenerator("uniform", seed=1, loc=5, scale=10)
+        for mode in ("compact", "table"):
+            batch = ContainerFactory(mode).create_batch(ContainerType.EMPTY, ContainerSize.FORTY_FT, 4,
+                                                        dwell_time=generator,
+                                                        to_interface=CTInterface.YARD_INTERFACE)
+            self.assertEqual(len(batch), 4)
+            for container in batch:
+                self.assertTrue(5 <= container._dwell_time <= 15)
+                self.assertIs(container.to_interface, CTInterface.YARD_INTERFACE)
+                self.assertIs(container._size, ContainerSize.FORTY_FT)
+
+if __name__ == '__main__':
+    unittest.main()
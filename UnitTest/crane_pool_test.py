@@ -0,0 +1,99 @@
+from UnitTest import *
+from UnitTest.experiments_test import SMALL_SCENARIO
+from Scripts.Resources.crane_pool import CranePool
+from Scripts.Utils.log import is_quiet
+import math
+import random
+import unittest
+import simpy
+
+class TestRankedTreap(unittest.TestCase):
+    def test_matches_a_linear_scan(self):
+        rng = random.Random(5)
+        treap = RankedTreap()
+        items, ranks = {}, {}
+        for sequence in range(1500):
+            if items and rng.random() < 0.4:
+                key = rng.choice(list(items))
+                self.assertEqual(treap.remove(key), items.pop(key))
+            else:
+                key = (float(rng.randrange(100)), sequence)
+                items[key], ranks[key] = f"item{sequence}", rng.random()
+                treap.add(key, items[key], rank=ranks[key])
+            low = float(rng.randrange(100))
+            high = low + rng.randrange(30)
+            inside = [key for key in items if low <= key[0] <= high]
+            found = treap.min_rank((low,), (high, math.inf))
+            if inside:
+                self.assertEqual(found[0], min(inside, key=ranks.get))
+            else:
+                self.assertIsNone(found)
+            below = max((key for key in items if key[0] < low), default=None)
+            above = min((key for key in items if key[0] >= low), default=None)
+            self.assertEqual([entry[0] if entry else None for entry in treap.neighbours((low,))], [below, above])
+        self.assertEqual([key for key, _ in treap], sorted(items))
+        self.assertEqual(len(treap), len(items))
+        with self.assertRaises(KeyError):
+            treap.remove((-1.0, 0))
+
+class TestCranePool(unittest.TestCase):
+    def setUp(self):
+        self.env = simpy.Environment()
+        yard_planner = YardPlanner(self.env)
+        self.pool = CranePool(self.env)
+        for index, position in enumerate((0.0, 300.0, 600.0, 900.0)):
+            self.pool.add(Crane(f"Crane{index + 1}", self.env, yard_planner, None, trace=EventTrace(), position=position))
+
+    def test_nearest_crane_within_reach(self):
+        grants = self.pool.request_any(2, position=620.0, reach=350.0)
+        self.assertEqual([grant.crane.name for grant in grants], ["Crane3", "Crane4"])
+        self.assertEqual([crane.name for crane in self.pool.idle], ["Crane1", "Crane2"])
+        # Crane2 is the nearest idle crane but out of reach, the request waits
+        waiting, = self.pool.request_any(1, position=650.0, reach=200.0)
+        self.assertFalse(waiting.triggered)
+        self.pool.release(grants[1].crane, grants[1].crane_request)
+        self.assertIs(waiting.crane, grants[1].crane)
+        self.assertEqual(waiting.crane.position, 650.0)
+
+    def test_freed_crane_serves_the_earliest_request(self):
+        first = self.pool.request("Crane1")
+        named = self.pool.request("Crane1")
+        anywhere = self.pool.request_any(4)
+        self.assertEqual(len([grant for grant in anywhere if grant.triggered]), 3)
+        late = anywhere[-1]
+        self.pool.release(first.crane, first.crane_request)
+        self.assertIs(named.crane, first.crane)
+        self.assertFalse(late.triggered)
+        late.cancel()
+        self.pool.release(named.crane, named.crane_request)
+        self.assertFalse(late.triggered)
+        self.assertIn(named.crane, self.pool.idle)
+
+    def test_requests_of_different_reaches(self):
+        busy = self.pool.request_any(4)
+        near, = self.pool.request_any(1, position=950.0, reach=60.0)
+        far, = self.pool.request_any(1, position=100.0, reach=1000.0)
+        anywhere, = self.pool.request_any(1)
+        # Crane1 is out of reach of the first request, the second one is the earliest it can serve
+        self.pool.release(busy[0].crane, busy[0].crane_request)
+        self.assertIs(far.crane, busy[0].crane)
+        self.assertFalse(near.triggered)
+        self.pool.release(busy[3].crane, busy[3].crane_request)
+        self.assertIs(near.crane, busy[3].crane)
+        self.pool.release(busy[1].crane, busy[1].crane_request)
+        self.assertIs(anywhere.crane, busy[1].crane)
+        self.assertEqual(self.pool._waiting_any, {})
+
+    def test_scenario_with_any_cranes(self):
+        config = SMALL_SCENARIO._replace(quay_length=900.0, num_cranes=3, cranes_per_vessel=1,
+                                         arrival_times=(10.0, 20.0, 30.0))
+        was_quiet = is_quiet()
+        set_quiet(True)
+        try:
+            metrics = run_scenario(config)["metrics"]
+        finally:
+            set_quiet(was_quiet)
+        self.assertEqual(metrics["vessels_completed"], 3.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from UnitTest import *
+import os
+import tempfile
+import unittest
+import simpy
+
+class CountingEnvironment(simpy.Environment):
+    def __init__(self):
+        super().__init__()
+        self.scheduled = 0
+
+    def schedule(self, event, priority=1, delay=0):
+        self.scheduled += 1
+        super().schedule(event, priority, delay)
+
+class TestCoarseCrane(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.logger = Logger(os.path.join(self.log_dir.name, "crane.log"))
+
+    def tearDown(self):
+        self.logger.close()
+        self.log_dir.cleanup()
+
+    def run_crane(self, coarse):
+        env = CountingEnvironment()
+        yard_planner = YardPlanner(env)
+        yard_planner.add_block(1000, f"CoarseBlock{coarse}")
+        yard_planner.block_list[-1].configure(num_bays=20, num_cells=6, num_tiers=5)
+        crane = Crane("Crane1", env, yard_planner, self.logger, streams=RandomStreams(7), coarse=coarse)
+        hatch_profile = HatchProfile("Hatch_1")
+        hatch_profile.add_row(ContainerHandling.DISCHARGE, ContainerType.LADEN, ContainerSize.TWENTY_FT, 40, 60)
+        hatch_profile.add_row(ContainerHandling.LOAD, ContainerType.LADEN, ContainerSize.FORTY_FT, 40, 60)
+        vessel = Vessel(env, "Vessel1", self.logger, 300, 30)
+        vessel.add_hatch_profile(hatch_profile)
+        env.process(crane.process_hatch_profiles(vessel))
+        env.run()
+        block = yard_planner.block_list[-1]
+        return env, crane, [(c.bay, c.cell, c.tier, block.due_times[c.container_id] - c._dwell_time)
+                            for c in block.items.values()]
+
+    def test_same_completion_time_with_fewer_events(self):
+        fine_env, fine_crane, fine_yard = self.run_crane(False)
+        coarse_env, coarse_crane, coarse_yard = self.run_crane(True)
+        self.assertEqual(coarse_env.now, fine_env.now)
+        self.assertEqual(coarse_crane.stats_collector.data, fine_crane.stats_collector.data)
+        self.assertEqual(coarse_yard, fine_yard)
+        self.assertLess(coarse_env.scheduled * 10, fine_env.scheduled)
+
+    def test_falls_back_with_yard_observers(self):
+        env = simpy.Environment()
+        yard_planner = YardPlanner(env)
+        crane = Crane("Crane1", env, yard_planner, self.logger, coarse=True)
+        self.assertTrue(crane.can_coarsen())
+        yard_planner.add_observer(lambda container, block, bay, cell: None)
+        self.assertFalse(crane.can_coarsen())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+from UnitTest import *
+from UnitTest.experiments_test import SMALL_SCENARIO
+import tempfile
+import unittest
+
+class ListLogger:
+    def __init__(self):
+        self.lines = []
+
+    def enabled(self):
+        return True
+
+    def log(self, message, log_level=None, args=()):
+        self.lines.append(message % args)
+
+class TestEventTrace(unittest.TestCase):
+    def test_chunks_are_written_and_loaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace = EventTrace(directory, chunk_size=4)
+            vessel = trace.name_code("Vessel_1")
+            for index in range(10):
+                trace.record(EventKind.VESSEL_ARRIVED, float(index), vessel=vessel)
+            self.assertEqual(trace.num_chunks, 2)
+            self.assertEqual(len(trace), 10)
+            trace.close()
+            events, names, containers = load_trace(directory)
+        self.assertEqual(events["time"].tolist(), [float(index) for index in range(10)])
+        self.assertEqual(names, ["Vessel_1"])
+        self.assertEqual(containers, [])
+
+    def test_text_view_matches_the_log_wording(self):
+        logger = ListLogger()
+        trace = EventTrace(text_view=TextLogView(logger=logger))
+        trace.record(EventKind.VESSEL_DEPARTED, 5.0, vessel=trace.name_code("Vessel_1"), berth=trace.name_code("Berth"))
+        self.assertEqual(logger.lines, ["Berth has completed all tasks for Vessel_1 at 5.0",
+                                        "Vessel_1 leaving the berth at 5.0"])
+        self.assertEqual(list(trace.text_view.iter_lines()), logger.lines)
+
+    def test_container_tables_are_per_chunk(self):
+        trace = EventTrace(chunk_size=2, max_events=2)
+        compact = CompactContainer(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        objects = [Container(ContainerType.LADEN, ContainerSize.TWENTY_FT) for _ in range(4)]
+        for container in [compact] + objects:
+            trace.record(EventKind.CONTAINER_DISCHARGED, 1.0, container=container, duration=60.0)
+        # Integer ids go straight into the column, string ids only into the table of the buffer
+        self.assertEqual(trace.containers, [objects[-1].container_id])
+        # The first chunk is dropped beyond max_events
+        self.assertEqual(trace.num_dropped, 2)
+        events, containers = trace.events_and_containers()
+        self.assertEqual(len(events), 3)
+        self.assertEqual(containers, [container.container_id for container in objects[1:]])
+        lines = list(TextLogView(trace).iter_lines())
+        self.assertIn(f"Container ID: {objects[1].container_id}", lines[0])
+
+    def test_in_memory_trace_is_bounded(self):
+        trace = EventTrace(chunk_size=4096)
+        self.assertEqual(trace.buffer.nbytes, 0)
+        for index in range(5000):
+            trace.record(EventKind.VESSEL_ARRIVED, float(index), vessel=trace.name_code("Vessel_1"))
+            if index == 0:
+                self.assertEqual(len(trace.buffer), 1024)
+        # The full chunk is dropped, only the buffer is kept
+        self.assertEqual((len(trace), trace.num_dropped, len(trace.events())), (5000, 4096, 904))
+        self.assertEqual(len(trace.buffer), 4096)
+        self.assertEqual(trace.events()["time"][0], 4096.0)
+
+    def test_scenario_trace(self):
+        with tempfile.TemporaryDirectory() as directory:
+            build_scenario(SMALL_SCENARIO._replace(trace_path=directory)).run()
+            events, names, containers = load_trace(directory)
+        kinds = events["kind"]
+        self.assertEqual(int((kinds == EventKind.VESSEL_DEPARTED.value).sum()), 2)
+        moves = (kinds == EventKind.CONTAINER_DISCHARGED.value) | (kinds == EventKind.CONTAINER_LOADED.value)
+        discharged = kinds == EventKind.CONTAINER_DISCHARGED.value
+        self.assertGreater(int(discharged.sum()), 0)
+        self.assertEqual(len(set(events["container"][discharged].tolist())), int(discharged.sum()))
+        self.assertEqual(len(containers), int(discharged.sum()))
+        self.assertTrue((events["duration"][moves] > 0).all())
+        self.assertTrue((events["bay"][discharged] > 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+from UnitTest import *
+from Scripts.Experiments.output_analysis import StoppingRule, batch_means, mser5
+from Scripts.Experiments.replications import replication_configs, run_replications, run_replications_until, summarize
+from Scripts.Experiments.result_cache import ResultCache, cached_run, scenario_key
+from Scripts.Experiments.sweep import apply_parameters, expand_runs, grid_design, latin_hypercube_design, run_sweep
+import json
+import numpy as np
+import os
+import tempfile
+import unittest
+
+SMALL_SCENARIO = ScenarioConfig(
+    simulation_time=100000.0,
+    hatch_rows=(HatchRow(ContainerHandling.DISCHARGE, ContainerType.LADEN, ContainerSize.TWENTY_FT, 5, 10),
+                HatchRow(ContainerHandling.LOAD, ContainerType.LADEN, ContainerSize.FORTY_FT, 5, 10)),
+    hatches_per_vessel=1,
+    blocks=(BlockLayout("Block1", 1000, 10, 4, 4),))
+
+class TestReplications(unittest.TestCase):
+    def test_replications_are_independent_and_reproducible(self):
+        configs = replication_configs(SMALL_SCENARIO, 3)
+        self.assertEqual(len({config.seed.spawn_key for config in configs}), 3)
+        first = run_replications(SMALL_SCENARIO, 3, workers=1)
+        second = run_replications(SMALL_SCENARIO, 3, workers=1)
+        self.assertEqual([result["metrics"] for result in first], [result["metrics"] for result in second])
+        self.assertEqual(first[0]["metrics"]["vessels_completed"], 2.0)
+        self.assertNotEqual(first[0]["metrics"]["turnaround.mean"], first[1]["metrics"]["turnaround.mean"])
+
+    def test_summarize(self):
+        results = [{"metrics": {"turnaround.mean": value}} for value in (1.0, 2.0, 3.0)]
+        summary = summarize(results)["turnaround.mean"]
+        self.assertEqual(summary["n"], 3)
+        self.assertAlmostEqual(summary["mean"], 2.0)
+        self.assertAlmostEqual(summary["std"], 1.0)
+        # t(0.975, 2) = 4.303
+        self.assertAlmostEqual(summary["half_width"], 4.303 / 3 ** 0.5, places=3)
+
+class TestSweep(unittest.TestCase):
+    def test_designs(self):
+        self.assertEqual(len(grid_design({"berth_capacity": [1, 2], "num_cranes": [1, 2, 3]})), 6)
+        points = latin_hypercube_design({"num_bays": (10, 19), "arrival_interval": (100.0, 200.0)}, 10, seed=3)
+        self.assertEqual(sorted(point["num_bays"] for point in points), list(range(10, 20)))
+        self.assertTrue(all(100.0 <= point["arrival_interval"] <= 200.0 for point in points))
+
+    def test_apply_parameters(self):
+        config = apply_parameters(SMALL_SCENARIO, {"num_tiers": 3, "num_vessels": 3, "arrival_interval": 50.0,
+                                                   "num_cranes": 1, "move_time.scale": 10.0})
+        self.assertEqual(config.blocks[0].num_tiers, 3)
+        self.assertEqual(config.arrival_times, (10.0, 60.0, 110.0))
+        self.assertEqual(config.num_cranes, 1)
+        self.assertEqual(dict(config.move_time_params)["scale"], 10.0)
+        with self.assertRaises(ValueError):
+            apply_parameters(SMALL_SCENARIO, {"num_berths": 2})
+
+    def test_resume(self):
+        points = grid_design({"num_cranes": [1, 2]})
+        with tempfile.TemporaryDirectory() as directory:
+            output_path = os.path.join(directory, "sweep.jsonl")
+            self.assertEqual(run_sweep(SMALL_SCENARIO, points[:1], output_path, replications=2, workers=2), 2)
+            with open(output_path, "a") as output:
+                output.write('{"run_id": "cut')  # an interrupted write
+            self.assertEqual(run_sweep(SMALL_SCENARIO, points, output_path, replications=2, workers=2), 2)
+            with open(output_path) as output:
+                records = [json.loads(line) for line in output if line.startswith('{"run_id": "') and line.endswith("}\n")]
+        self.assertEqual(len(records), 4)
+        self.assertTrue(all("metrics" in record for record in records))
+
+    def test_run_ids_cover_the_configuration(self):
+        points = grid_design({"num_cranes": [1, 2]})
+        ids = [run.run_id for run in expand_runs(SMALL_SCENARIO, points, 2)]
+        self.assertEqual(len(set(ids)), 4)
+        self.assertEqual(ids, [run.run_id for run in expand_runs(SMALL_SCENARIO, points, 2)])
+        # Another base seed or base configuration does not reuse the runs of the first one
+        for base in (SMALL_SCENARIO._replace(seed=7), SMALL_SCENARIO._replace(hatches_per_vessel=2)):
+            self.assertFalse(set(ids) & {run.run_id for run in expand_runs(base, points, 2)})
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key(self):
+        seed = replication_configs(SMALL_SCENARIO, 1)[0].seed
+        config = SMALL_SCENARIO._replace(seed=seed)
+        self.assertEqual(scenario_key(config), scenario_key(config._replace(log_path="other.log")))
+        self.assertNotEqual(scenario_key(config), scenario_key(config._replace(num_cranes=1)))
+        self.assertNotEqual(scenario_key(config), scenario_key(config, version="older code"))
+
+    def test_hit_refresh_and_bypass(self):
+        self.cache.put(scenario_key(SMALL_SCENARIO), {"metrics": {"cached": 1.0}})
+        self.assertEqual(cached_run(SMALL_SCENARIO, self.cache)["metrics"], {"cached": 1.0})
+        self.assertNotIn("cached", cached_run(SMALL_SCENARIO)["metrics"])
+        refreshed = cached_run(SMALL_SCENARIO, self.cache, refresh=True)
+        self.assertEqual(self.cache.get(scenario_key(SMALL_SCENARIO)), refreshed)
+
+    def test_lru_eviction(self):
+        self.cache.max_bytes = 140  # three entries of 43 bytes
+        for key in ("a", "b", "c"):
+            self.cache.put(key, {"value": "x" * 30})
+        self.cache.get("a")
+        self.cache.put("d", {"value": "x" * 30})
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertLessEqual(self.cache.total_bytes(), 140)
+
+class TestOutputAnalysis(unittest.TestCase):
+    def test_mser5_truncates_the_warm_up(self):
+        rng = np.random.default_rng(1)
+        series = np.concatenate((np.linspace(10, 1, 100), rng.normal(1, 0.1, 900)))
+        self.assertEqual(mser5(series), 100)
+        result = batch_means(series)
+        self.assertLess(abs(result.mean - 1), result.half_width)
+        self.assertEqual(result.num_batches, 20)
+
+    def test_run_stops_once_precise(self):
+        # Load only, so the yard does not fill up over the long run
+        config = SMALL_SCENARIO._replace(
+            simulation_time=1e7,
+            hatch_rows=SMALL_SCENARIO.hatch_rows[1:],
+            arrival_times=tuple(10.0 + 5000.0 * index for index in range(2000)),
+            stopping=StoppingRule(kpis=("Berth1.utilization",), relative_precision=0.1, checkpoint_interval=5000.0))
+        metrics = run_scenario(config)["metrics"]
+        self.assertLess(metrics["run_time"], 1e7)
+        self.assertLessEqual(metrics["Berth1.utilization.half_width"], 0.1 * metrics["Berth1.utilization.batch_mean"])
+
+    def test_replications_stop_once_precise(self):
+        results = run_replications_until(SMALL_SCENARIO, ["turnaround.mean"], relative_precision=0.5,
+                                         min_replications=3, max_replications=20, workers=1)
+        self.assertGreaterEqual(len(results), 3)
+        self.assertLess(len(results), 20)
+        first = run_replications(SMALL_SCENARIO, 3, workers=1)
+        self.assertEqual(results[0]["metrics"], first[0]["metrics"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+from UnitTest import *
+from Scripts.BerthPlanner.hatch_queue import HatchQueue
+import unittest
+import simpy
+
+class TestHatchQueue(unittest.TestCase):
+    def test_cranes_split_the_vessel(self):
+        queue = HatchQueue(simpy.Environment(), list("abcdefghij"))
+        first, second = object(), object()
+        # The first crane starts in the middle, the second one in the middle of the larger side
+        self.assertEqual(queue.take(first).index, 4)
+        self.assertEqual(queue.take(second).index, 7)
+        # The first crane works its side, the busier way first, up to the second crane
+        self.assertEqual([queue.take(first).index for _ in range(6)], [3, 2, 1, 0, 5, 6])
+        # Its side empty, it steals from the other side of the second crane
+        self.assertEqual(queue.take(first).index, 8)
+        self.assertEqual(queue.take(second).index, 9)
+        self.assertIsNone(queue.take(first))
+        self.assertIsNone(queue.take(second))
+
+    def test_every_hatch_is_done_once(self):
+        env = simpy.Environment()
+        queue = HatchQueue(env, list(range(23)))
+        done = []
+        def crane(name, speed):
+            hatch = yield queue.get(name)
+            while hatch is not None:
+                yield env.timeout(speed)
+                done.append(hatch.profile)
+                queue.done(hatch)
+                hatch = yield queue.get(name)
+        for name, speed in (("Crane1", 3), ("Crane2", 5), ("Crane3", 7)):
+            env.process(crane(name, speed))
+        env.run()
+        self.assertEqual(sorted(done), list(range(23)))
+        self.assertTrue(queue.finished.triggered)
+        self.assertEqual(queue.remaining, 0)
+
+    def test_done_needs_a_hatch_being_worked(self):
+        queue = HatchQueue(simpy.Environment(), list("abc"))
+        with self.assertRaises(ValueError):
+            queue.done(queue.items[0])
+        hatch = queue.take("Crane1")
+        queue.done(hatch)
+        with self.assertRaises(ValueError):
+            queue.done(hatch)
+        self.assertEqual(queue.remaining, 2)
+
+    def test_vessel_leaves_once_every_hatch_is_done(self):
+        env = simpy.Environment()
+        berth = Berth("Berth1", env, 1)
+        vessel = Vessel(env, "Vessel1", None, trace=EventTrace())
+        vessel.prePcat, vessel.postPcat = 0.0, 5.0
+        for name in ("Hatch_1", "Hatch_2"):
+            vessel.add_hatch_profile(HatchProfile(name))
+        def berthing():
+            request = berth.request()
+            yield request
+            vessel.on_berth_acquired(berth, request)
+        def worker():
+            # Works the hatches without ever being one of the vessel's cranes
+            hatch = vessel.hatch_queue.take("Worker")
+            while hatch is not None:
+                yield env.timeout(10)
+                vessel.hatch_queue.done(hatch)
+                hatch = vessel.hatch_queue.take("Worker")
+        env.process(berthing())
+        env.process(worker())
+        env.run()
+        self.assertEqual(vessel.departure_time, 25.0)
+        self.assertEqual(berth.count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+from UnitTest import *
+from Scripts.Statistics.log_analyzer import analyze_log, analyze_logs, iter_windows
+import os
+import tempfile
+import unittest
+
+HEADER = "2024-01-02 08:47:44,928 - INFO: "
+VESSEL_LINES = ["The Vessel1 is arrived at 10.0",
+                "The Vessel1 started the pre-inspection at 10.0",
+                "The Vessel1 finished the pre-inspection at 1010.0",
+                "The Vessel1 is started the operation at 1010.0"]
+DEPARTURE_LINES = ["Crane1 finished a hatch and moving on to next, if any",
+                   "No more hatches left, Crane1 has completed all tasks for Vessel1 at 8210.0",
+                   "The Crane1 is released from the Vessel1 at 8210.0",
+                   "The Vessel1 starts the post_pcat inspection at 8210.0",
+                   "The Vessel1 finished the post_pcat inspection at 9210.0",
+                   "Berth1 has completed all tasks for Vessel1 at 9210.0",
+                   "Vessel1 leaving the berth at 9210.0"]
+
+class TestLogAnalyzer(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".log")
+        move_lines = []
+        for index in range(1, 201):
+            move_lines.append(f"Crane1 spent 0.5 minutes to move a Container ID: 20-{index}, Type: LADEN, Size: 20")
+            move_lines.append(f"Crane1 moved a container from Vessel1 at {1010.0 + 36.0 * index}")
+        with os.fdopen(handle, "w") as log_file:
+            log_file.writelines(HEADER + line + "\n" for line in VESSEL_LINES + move_lines + DEPARTURE_LINES)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_windows_cover_whole_lines(self):
+        with open(self.path, "rb") as log_file:
+            content = log_file.read()
+        pieces = [bytes(window[start:end]) for window, start, end in iter_windows(self.path, chunk_size=1000)]
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual(b"".join(pieces), content)
+        self.assertTrue(all(piece.endswith(b"\n") for piece in pieces))
+
+    def test_summary(self):
+        summary = analyze_log(self.path, chunk_size=1000)
+        names = summary.names
+        vessel = summary.vessels[0]
+        self.assertEqual(names[vessel["vessel"]], "Vessel1")
+        durations = summary.vessel_durations()
+        self.assertEqual(durations["pre_inspection"].tolist(), [1000.0])
+        self.assertEqual(durations["post_inspection"].tolist(), [1000.0])
+        self.assertEqual(durations["turnaround"].tolist(), [9200.0])
+        crane = summary.cranes[0]
+        self.assertEqual((names[crane["crane"]], crane["moves"], crane["first_move"], crane["last_move"]),
+                         ("Crane1", 200, 1046.0, 8210.0))
+        # 200 moves from the start of the operation at 1010 to the release at 8210
+        self.assertEqual(summary.crane_productivity(), {"Crane1": (200, 100.0)})
+        berth = summary.berths[0]
+        self.assertEqual((names[berth["berth"]], berth["start"], berth["end"]), ("Berth1", 10.0, 9210.0))
+
+    def test_files_in_parallel(self):
+        summaries = analyze_logs([self.path, self.path], workers=2)
+        self.assertEqual([len(summary.cranes) for summary in summaries], [1, 1])
+        self.assertEqual(summaries[0].cranes.tolist(), analyze_log(self.path).cranes.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+from UnitTest import *
+from Scripts.Statistics.log_fitting import extract_inter_move_times, fit_distributions, build_crane_time_generators
+import os
+import tempfile
+import unittest
+import simpy
+import numpy as np
+
+LOG_LINES = """2024-01-02 08:47:44,928 - INFO: The Vessel1 is arrived at 10.0
+2024-01-02 08:47:44,928 - INFO: Crane1 moved a container from Vessel1 at 100.0
+2024-01-02 08:47:44,928 - INFO: Crane2 moved a container from Vessel1 at 110.0
+2024-01-02 08:47:44,928 - INFO: Crane1 moved a container from Vessel1 at 300.0
+2024-01-02 08:47:44,928 - INFO: Crane1 moved a container from Vessel2 at 5000.0
+2024-01-02 08:47:44,928 - INFO: Crane1 moved a container from Vessel2 at 5250.0
+"""
+
+class TestEmpiricalTimeGenerator(unittest.TestCase):
+    def test_alias_sampling_matches_frequencies(self):
+        generator = EmpiricalTimeGenerator([1.0, 2.0, 2.0, 3.0, 3.0, 3.0], seed=3)
+        draws = generator.generate(60000)
+        for value, share in ((1.0, 1 / 6), (2.0, 2 / 6), (3.0, 3 / 6)):
+            self.assertAlmostEqual(np.mean(draws == value), share, delta=0.01)
+
+    def test_binned_samples_stay_in_range(self):
+        generator = EmpiricalTimeGenerator(np.linspace(100, 200, 1000), bins=10, seed=3)
+        draws = generator.generate(1000)
+        self.assertTrue(((draws >= 100) & (draws <= 200)).all())
+
+    def test_plugs_into_crane(self):
+        env = simpy.Environment()
+        crane = Crane("Crane1", env, YardPlanner(env), None)
+        crane.loading_time = EmpiricalTimeGenerator([200.0], seed=1)
+        self.assertEqual(crane.loading_time.next(), 200.0)
+
+class TestLogFitting(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".log")
+        with os.fdopen(handle, "w") as log_file:
+            log_file.write(LOG_LINES)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_inter_move_times_per_crane_and_vessel(self):
+        times = extract_inter_move_times([self.path])
+        self.assertEqual(times["Crane1"].tolist(), [200.0, 250.0])
+        self.assertNotIn("Crane2", times)
+
+    def test_generators_from_logs(self):
+        generators = build_crane_time_generators([self.path], seed=1)
+        self.assertIn(generators["Crane1"].next(), (200.0, 250.0))
+        # The stream of a crane is keyed by its name, not by its rank among the cranes of the logs
+        self.assertEqual(generators["Crane1"].seed.spawn_key, RandomStreams(1).seed_for("Crane1.moves").spawn_key)
+
+    def test_fit_ranks_true_distribution_first(self):
+        samples = np.random.default_rng(5).normal(200, 25, 2000)
+        self.assertEqual(fit_distributions(samples, ("norm", "expon"))[0].distribution, "norm")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from UnitTest import *
+from Scripts.Utils.log import console
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import unittest
+
+class TestLogger(unittest.TestCase):
+    def test_loggers_write_to_their_own_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = Logger(os.path.join(directory, "first.log"))
+            second = Logger(os.path.join(directory, "second.log"), log_level=logging.WARNING)
+            first.log("The %s is arrived at %s", args=("Vessel1", 10.0))
+            first.log("%(crane)s finished a hatch", args={"crane": "Crane1"})
+            second.log("dropped")
+            second.log("kept", logging.WARNING)
+            self.assertFalse(second.enabled())
+            first.close()
+            second.close()
+            first.log("after close")
+            with open(os.path.join(directory, "first.log")) as log_file:
+                first_lines = log_file.read().splitlines()
+            with open(os.path.join(directory, "second.log")) as log_file:
+                second_lines = log_file.read().splitlines()
+        self.assertEqual(len(first_lines), 2)
+        self.assertTrue(first_lines[0].endswith("INFO: The Vessel1 is arrived at 10.0"))
+        self.assertTrue(first_lines[1].endswith("INFO: Crane1 finished a hatch"))
+        self.assertEqual(len(second_lines), 1)
+        self.assertTrue(second_lines[0].endswith("WARNING: kept"))
+
+    def test_malformed_record_keeps_the_writer_alive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            logger = Logger(os.path.join(directory, "bad.log"))
+            errors = io.StringIO()
+            with contextlib.redirect_stderr(errors):
+                logger.log("first")
+                logger.log("bad %d", args=("x",))
+                logger.log("last")
+                logger.close()
+            with open(os.path.join(directory, "bad.log")) as log_file:
+                lines = log_file.read().splitlines()
+        self.assertEqual([line.rsplit(": ", 1)[1] for line in lines], ["first", "last"])
+        self.assertIn("bad %d", errors.getvalue())
+
+    def test_quiet_console(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            console("The %s is arrived at %s", "Vessel1", 10.0)
+            set_quiet(True)
+            try:
+                console("The %s is arrived at %s", "Vessel2", 20.0)
+            finally:
+                set_quiet(False)
+        self.assertEqual(output.getvalue(), "The Vessel1 is arrived at 10.0\n")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+from UnitTest import *
+from Scripts.Utils.monitors import TimeWeightedMonitor
+import unittest
+import simpy
+
+class TestTimeWeightedMonitor(unittest.TestCase):
+    def test_changes_out_of_order(self):
+        env = simpy.Environment()
+        env.run(until=10)
+        monitor = TimeWeightedMonitor(env, value=2)
+        env.run(until=40)
+        monitor.change(1, time=30)
+        monitor.change(-2, time=20)
+        # 2 from 10 to 20, 0 from 20 to 30, 1 from 30 to 40
+        self.assertEqual(monitor.value, 1)
+        self.assertEqual(monitor.integral(), 30)
+        self.assertEqual(monitor.mean(50), 40 / 40)
+
+class TestResourceMonitors(unittest.TestCase):
+    def test_utilization_and_queue(self):
+        env = simpy.Environment()
+        berth = Berth("Berth1", env, capacity=1)
+
+        def vessel(arrival, stay):
+            yield env.timeout(arrival)
+            with berth.request() as request:
+                yield request
+                yield env.timeout(stay)
+
+        env.process(vessel(0, 10))
+        env.process(vessel(5, 10))
+        env.run(until=40)
+        # Busy from 0 to 20, the second vessel waits from 5 to 10
+        self.assertEqual(berth.utilization(), 0.5)
+        self.assertEqual(berth.average_queue_length(), 5 / 40)
+
+    def test_block_occupancy(self):
+        env = simpy.Environment()
+        block = Block(env, capacity=100, name="MonitoredBlock")
+        block.configure(num_bays=2, num_cells=2, num_tiers=2)
+        container = Container(ContainerType.LADEN, ContainerSize.TWENTY_FT)
+        block.store_container(container, ContainerSize.TWENTY_FT, 1, 1)
+        env.run(until=30)
+        block.retrieve_container(container.container_id, 1, 1)
+        env.run(until=40)
+        self.assertEqual(block.occupancy_monitor.value, 0)
+        self.assertEqual(block.average_occupancy(), 30 / 40)
+        self.assertEqual(block.average_fill(), 30 / 40 / 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+from UnitTest import *
+from UnitTest.experiments_test import SMALL_SCENARIO
+from Scripts.Utils.log import is_quiet
+import random
+import unittest
+import simpy
+
+class TestIntervalTreap(unittest.TestCase):
+    def test_matches_a_linear_scan(self):
+        rng = random.Random(3)
+        treap = IntervalTreap()
+        treap.add(0.0, 2000.0)
+        taken = []
+        for _ in range(800):
+            if taken and rng.random() < 0.45:
+                start, length = taken.pop(rng.randrange(len(taken)))
+                treap.add(start, start + length)
+                continue
+            length = rng.choice([120.0, 200.0, 300.0, 400.0])
+            position = rng.uniform(0.0, 2000.0)
+            fits = [min(max(position, start), end - length) for start, end in treap if end - start >= length]
+            place = treap.take(length, position)
+            if not fits:
+                self.assertIsNone(place)
+                continue
+            self.assertAlmostEqual(abs(place - position), min(abs(fit - position) for fit in fits))
+            taken.append((place, length))
+            intervals = list(treap)
+            self.assertEqual(len(intervals), len(treap))
+            self.assertTrue(all(end < next_start for (_, end), (next_start, _) in zip(intervals, intervals[1:])))
+            self.assertAlmostEqual(treap.max_length, max((end - start for start, end in intervals), default=0.0))
+
+    def test_overlap_is_rejected(self):
+        treap = IntervalTreap()
+        treap.add(0.0, 100.0)
+        with self.assertRaises(ValueError):
+            treap.add(50.0, 150.0)
+        self.assertEqual(list(treap), [(0.0, 100.0)])
+
+class TestFirstFitQueue(unittest.TestCase):
+    def test_first_fit_in_order(self):
+        queue = FirstFitQueue(len)
+        items = [[index] * (index % 7 + 1) for index in range(100)]
+        for item in items:
+            queue.append(item)
+        for item in items[:40:3]:
+            queue.remove(item)
+        remaining = list(queue)
+        for limit in range(1, 8):
+            self.assertIs(queue.first_fit(limit), next(item for item in remaining if len(item) <= limit))
+        self.assertIsNone(queue.first_fit(0))
+        self.assertEqual(len(queue), len(remaining))
+
+class TestQuay(unittest.TestCase):
+    def test_vessels_share_the_quay_and_queue(self):
+        env = simpy.Environment()
+        quay = Quay("Quay", env, 1000.0)
+        berthed = []
+        def vessel(name, arrival, length, position, stay):
+            yield env.timeout(arrival)
+            request = quay.request(length, position)
+            yield request
+            berthed.append((name, env.now, request.start))
+            yield env.timeout(stay)
+            yield quay.release(request)
+        env.process(vessel("A", 0, 400.0, 0.0, 100))
+        env.process(vessel("B", 0, 400.0, 900.0, 50))
+        env.process(vessel("C", 1, 400.0, None, 10))  # waits for B
+        env.process(vessel("D", 2, 150.0, None, 10))  # fits the gap in between, overtakes C
+        env.run()
+        self.assertEqual(berthed, [("A", 0, 0.0), ("B", 0, 600.0), ("D", 2, 400.0), ("C", 50, 400.0)])
+        self.assertEqual(list(quay.free), [(0.0, 1000.0)])
+        self.assertAlmostEqual(quay.busy_monitor.integral(), 400 * 100 + 400 * 50 + 400 * 10 + 150 * 10)
+
+    def test_scenario_on_a_quay(self):
+        scenario = build_scenario(SMALL_SCENARIO._replace(quay_length=600.0))
+        was_quiet = is_quiet()
+        set_quiet(True)
+        try:
+            scenario.run()
+        finally:
+            set_quiet(was_quiet)
+        metrics = scenario.results()["metrics"]
+        # Two vessels of 300 meters fill the quay
+        self.assertEqual(metrics["vessels_completed"], 2.0)
+        self.assertGreater(metrics["Berth1.utilization"], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+from UnitTest import *
+import unittest
+import numpy as np
+
+class TestStatsCollector(unittest.TestCase):
+    def test_streaming_matches_the_values(self):
+        values = np.random.default_rng(3).normal(200, 25, 20000)
+        collector = StatsCollector(streaming=True, reservoir_size=500, seed=1)
+        for value in values[:5000]:
+            collector.add_item("Loading Time", float(value))
+        collector.add_items("Loading Time", values[5000:])
+        self.assertEqual(collector.data, {})
+        self.assertEqual(collector.count("Loading Time"), 20000)
+        self.assertAlmostEqual(collector.total("Loading Time"), values.sum(), places=6)
+        self.assertAlmostEqual(collector.average("Loading Time"), values.mean(), places=9)
+        self.assertAlmostEqual(collector.std("Loading Time"), values.std(ddof=1), places=9)
+        self.assertEqual((collector.min("Loading Time"), collector.max("Loading Time")), (values.min(), values.max()))
+        for q in (0.01, 0.5, 0.99):
+            self.assertAlmostEqual(collector.quantile("Loading Time", q), np.quantile(values, q), delta=1.0)
+        sample = collector.retrieve_items("Loading Time")
+        self.assertEqual(len(sample), 500)
+        self.assertTrue(set(sample) <= set(values.tolist()))
+
+    def test_list_mode_keeps_the_values(self):
+        collector = StatsCollector()
+        collector.add_items("Unloading Time", [1, 2, 3])
+        self.assertEqual(collector.retrieve_items("Unloading Time"), [1, 2, 3])
+        self.assertEqual((collector.total("Unloading Time"), collector.min("Unloading Time")), (6, 1))
+        self.assertIsNone(collector.average("Loading Time"))
+
+    def test_merge(self):
+        rng = np.random.default_rng(4)
+        first, second = rng.exponential(100, 3000), rng.exponential(300, 7000)
+        collectors = [StatsCollector(streaming=True), StatsCollector()]
+        collectors[0].add_items("Loading Time", first)
+        collectors[1].add_items("Loading Time", second)
+        merged = StatsCollector.merged(collectors)
+        values = np.concatenate((first, second))
+        self.assertEqual(merged.count("Loading Time"), 10000)
+        self.assertAlmostEqual(merged.average("Loading Time"), values.mean(), places=9)
+        self.assertAlmostEqual(merged.std("Loading Time"), values.std(ddof=1), places=9)
+        self.assertAlmostEqual(merged.quantile("Loading Time", 0.9), np.quantile(values, 0.9), delta=0.02 * np.quantile(values, 0.9))
+
+    def test_keys_sample_their_own_streams(self):
+        collector = StatsCollector(streaming=True, reservoir_size=10, seed=5)
+        values = list(range(1000))
+        collector.add_items("Loading Time", values)
+        collector.add_items("Unloading Time", values)
+        self.assertNotEqual(collector.retrieve_items("Loading Time"), collector.retrieve_items("Unloading Time"))
+        again = StatsCollector(streaming=True, reservoir_size=10, seed=5)
+        again.add_items("Unloading Time", values)
+        self.assertEqual(again.retrieve_items("Unloading Time"), collector.retrieve_items("Unloading Time"))
+
+    def test_extreme_quantiles(self):
+        values = np.random.default_rng(6).lognormal(0, 1, 200000)
+        collector = StatsCollector(streaming=True)
+        collector.add_items("Waiting Time", values)
+        for q in (0.5, 0.99, 0.999):
+            self.assertAlmostEqual(collector.quantile("Waiting Time", q), np.quantile(values, q),
+                                   delta=0.025 * np.quantile(values, q))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+from UnitTest import *
+import unittest
+import numpy as np
+import simpy
+
+class TestRandomTimeGenerator(unittest.TestCase):
+    def setUp(self):
+        self.generator = RandomTimeGenerator("norm", block_size=8, seed=7, loc=200, scale=25)
+
+    def test_next_returns_scalar(self):
+        value = self.generator.next()
+        self.assertIsInstance(value, float)
+
+    def test_pool_is_refilled(self):
+        samples = [self.generator.next() for _ in range(20)]
+        self.assertEqual(len(set(samples)), 20)
+
+    def test_same_seed_reproduces_sequence(self):
+        other = RandomTimeGenerator("norm", block_size=8, seed=7, loc=200, scale=25)
+        self.assertEqual([self.generator.next() for _ in range(20)],
+                         [other.next() for _ in range(20)])
+
+    def test_reset_restarts_sequence(self):
+        first = [self.generator.next() for _ in range(5)]
+        self.generator.reset()
+        self.assertEqual(first, [self.generator.next() for _ in range(5)])
+
+    def test_reset_replays_a_generator_seed(self):
+        generator = RandomTimeGenerator("norm", block_size=8, seed=np.random.default_rng(3), loc=200, scale=25)
+        first = [generator.next() for _ in range(20)]
+        generator.reset()
+        self.assertEqual(first, [generator.next() for _ in range(20)])
+
+    def test_invalid_block_size(self):
+        with self.assertRaises(ValueError):
+            RandomTimeGenerator("norm", block_size=0)
+
+    def test_native_and_scipy_backends(self):
+        native = RandomTimeGenerator("gamma", seed=1, a=2.0, scale=3.0).generate(20000)
+        fallback = RandomTimeGenerator("weibull_min", seed=1, c=1.5, scale=2.0).generate(20000)
+        self.assertAlmostEqual(native.mean(), 6.0, delta=0.2)
+        self.assertAlmostEqual(fallback.mean(), 1.805, delta=0.05)
+
+    def test_generate_does_not_repeat_draws(self):
+        self.assertNotEqual(self.generator.generate()[0], self.generator.generate()[0])
+
+class TestRandomStreams(unittest.TestCase):
+    def test_named_streams_are_reproducible(self):
+        first = RandomStreams(42).generator("Crane1.loading").random(5)
+        second = RandomStreams(42).generator("Crane1.loading").random(5)
+        self.assertEqual(first.tolist(), second.tolist())
+
+    def test_named_streams_are_independent(self):
+        streams = RandomStreams(42)
+        self.assertNotEqual(streams.generator("Crane1.loading").random(),
+                            streams.generator("Crane2.loading").random())
+
+    def test_stream_does_not_depend_on_other_entities(self):
+        streams = RandomStreams(42)
+        streams.generator("Crane1.loading")
+        self.assertEqual(streams.generator("Crane2.loading").random(),
+                         RandomStreams(42).generator("Crane2.loading").random())
+
+    def test_crane_without_streams_is_reproducible(self):
+        env = simpy.Environment()
+        first, second = (Crane("Crane1", env, YardPlanner(env), None, trace=EventTrace()) for _ in range(2))
+        self.assertEqual(first.loading_time.take(5).tolist(), second.loading_time.take(5).tolist())
+        self.assertEqual(first.rng.random(), second.rng.random())
+
+    def test_spawned_replication_seeds_differ(self):
+        first, second = RandomStreams(42).spawn(2)
+        self.assertNotEqual(RandomStreams(first).generator("arrivals").random(),
+                            RandomStreams(second).generator("arrivals").random())
+
+if __name__ == '__main__':
+    unittest.main()
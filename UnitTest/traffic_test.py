@@ -0,0 +1,58 @@
+from UnitTest import *
+from UnitTest.arrival_source_test import build_planner
+from Scripts.Experiments.traffic import VesselClass, generate_traffic
+from Scripts.Utils.log import is_quiet
+import os
+import tempfile
+import unittest
+import numpy as np
+import simpy
+
+SMALL_CLASSES = (VesselClass("Small", 0.7, 150.0, 23.0, (1, 2), (2, 6)),
+                 VesselClass("Large", 0.3, 300.0, 40.0, (2, 3), (4, 8)))
+
+class TestTrafficGenerator(unittest.TestCase):
+    def test_arrays(self):
+        traffic = generate_traffic(20000, mean_interarrival=100.0, seed=5)
+        self.assertEqual(len(traffic), 20000)
+        self.assertTrue((np.diff(traffic.arrival_times) >= 0).all())
+        self.assertAlmostEqual(float(np.diff(traffic.arrival_times).mean()), 100.0, delta=3.0)
+        self.assertEqual(traffic.hatch_offsets[-1], len(traffic.hatch_templates))
+        # The hatches of a vessel are templates of its class
+        templates = np.array([profile.name.split("_")[0] for profile in traffic.templates])
+        first = traffic.hatch_templates[traffic.hatch_offsets[:-1]]
+        classes = np.array([vessel_class.name for vessel_class in traffic.classes])
+        self.assertTrue((templates[first] == classes[traffic.vessel_classes]).all())
+        again = generate_traffic(20000, mean_interarrival=100.0, seed=5)
+        self.assertTrue(np.array_equal(again.hatch_templates, traffic.hatch_templates))
+
+    def test_seasonal_arrivals(self):
+        period = 1000.0
+        traffic = generate_traffic(horizon=200 * period, mean_interarrival=1.0, seasonal_amplitude=0.8,
+                                   seasonal_period=period, seed=2)
+        self.assertLess(traffic.arrival_times.max(), 200 * period)
+        high = ((traffic.arrival_times % period) < period / 2).sum()
+        self.assertGreater(high, 2 * (len(traffic) - high))
+
+    def test_feeds_the_planner(self):
+        traffic = generate_traffic(30, mean_interarrival=20000.0, classes=SMALL_CLASSES, seed=1)
+        was_quiet = is_quiet()
+        set_quiet(True)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "traffic.csv")
+                traffic.write(path)
+                self.assertEqual(list(read_schedule(path)), list(traffic.arrivals()))
+            env = simpy.Environment()
+            berth_planner = build_planner(env)
+            traffic.add_hatch_profiles(berth_planner)
+            vessels = traffic.add_to_schedule(berth_planner)
+            berth_planner.process_arrivals()
+            env.run()
+        finally:
+            set_quiet(was_quiet)
+        self.assertEqual(len(berth_planner.scheduler.schedule), 30)
+        self.assertTrue(all(vessel.departure_time is not None for vessel in vessels))
+
+if __name__ == '__main__':
+    unittest.main()